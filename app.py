@@ -1,6 +1,9 @@
+import os
 import dash
-from dash import Dash, html, dcc, callback, Output, Input
+from dash import Dash, html, dcc, clientside_callback, Output, Input
 import dash_bootstrap_components as dbc
+import flask
+from utils import memo, tasks, warmup
 
 # dash app initialisation
 app = Dash(
@@ -12,6 +15,19 @@ app = Dash(
 
 server = app.server
 
+# figure cache counters, used to size the cache's bounds (see utils/memo.py)
+@server.route('/cache-stats')
+def cache_stats():
+    return flask.jsonify(memo.stats())
+
+# per-task timings of the callbacks' concurrent figure generation (see utils/tasks.py)
+@server.route('/task-stats')
+def task_stats():
+    return flask.jsonify(tasks.stats())
+
+# background warm-up of the figure caches, with its progress at /ready
+warmup.init_app(server)
+
 # sidebar nav
 sidebar = html.Div(
     [
@@ -128,23 +144,25 @@ app.index_string = """
 app.layout = html.Div(
     [
         dcc.Location(id='url', refresh=False),  # tracks URL changes
-        html.Div(id="sidebar-container"),  # sidebar will be inserted dynamically
+        html.Div(sidebar, id="sidebar-container", style={'display':'none'}),  # shown on every page but home
         content,
         dash.page_container, 
     ]
 )
 
-# Callback to Show/Hide Sidebar
-@callback(
-    Output("sidebar-container", "children"),
+# Callback to Show/Hide Sidebar, in the browser
+clientside_callback(
+    """
+    function(pathname) {
+        return {display: pathname === '/' ? 'none' : 'block'};
+    }
+    """,
     Output("sidebar-container", "style"),
     Input("url", "pathname")
 )
-def toggle_sidebar(pathname):
-    if pathname == "/": 
-        return "", {'display':'none'}
-    return sidebar, {'display':'block'}
-
 
 if __name__ == '__main__':
+    # with the reloader, requests are served by the child process
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warmup.start()
     app.run_server(debug=True)
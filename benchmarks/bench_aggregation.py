@@ -0,0 +1,45 @@
+## Microbenchmarks of the integer-coded group-by engine (utils/aggregation.py)
+## against the pandas groupby path it replaces, on the rollups the component
+## functions run on every callback.
+##
+## Run from the root folder: python -m benchmarks.bench_aggregation
+
+import pandas as pd
+from benchmarks.common import timed
+from utils import data_partition
+from utils.aggregation import aggregate
+from utils.data_store import results_df, income_df, phd_df
+
+REGIONS = ['London', 'Scotland', 'Wales', 'North West', 'South East', 'East Midlands']
+
+overall = results_df[results_df['Profile'] == 'Overall']
+sources = data_partition.source_rows(income_df)
+regional = results_df[results_df['Region'].isin(REGIONS) & (results_df['Profile'] == 'Overall')]
+
+# (label, frame, keys, aggregations) - the shapes used by the components
+CASES = [
+    ('leaderboard: GPA mean by institution', overall, 'Institution name', {'GPA': 'mean'}),
+    ('leaderboard: income sum by institution', sources, 'Institution name', {'2013-2020 (total)': 'sum'}),
+    ('map: PhD sum by region', phd_df, 'Region', {'Total': 'sum'}),
+    ('map: GPA mean by region', overall, 'Region', {'GPA': 'mean'}),
+    ('scatter: GPA mean by institution (6 regions)', regional, 'Institution name', {'GPA': 'mean'}),
+    ('line chart: income sums by region', sources, 'Region', {'2013-14': 'sum', '2014-15': 'sum', '2015-2020 (avg)': 'sum'}),
+    ('rankings: GPA mean by UOA x institution', overall, ['UOA name', 'Institution name'], {'GPA': 'mean'}),
+    ('cube: income sums by institution x UOA x source', sources, ['Institution name', 'UOA name', 'Income source'], {'2013-2020 (total)': 'sum'}),
+]
+
+def main():
+    print(f"{'rollup':<50} {'pandas (ms)':>12} {'engine (ms)':>12} {'speed-up':>9}")
+    for label, df, by, agg in CASES:
+        pd.testing.assert_frame_equal(
+            aggregate(df, by, agg),
+            df.groupby(by, observed=True).agg(agg).reset_index(),
+            check_exact=False,
+        )
+        pandas_time = timed(lambda: df.groupby(by, observed=True).agg(agg).reset_index(), 50)
+        engine_time = timed(lambda: aggregate(df, by, agg), 50)
+        print(f"{label:<50} {pandas_time * 1e3:>12.3f} {engine_time * 1e3:>12.3f} {pandas_time / engine_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
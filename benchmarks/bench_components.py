@@ -0,0 +1,66 @@
+## Latency of the main component functions, and memory of the datasets they
+## read, with the dimension columns held as shared categoricals (as loaded by
+## utils/data_store.py) vs as plain object (string) columns.
+##
+## Run from the root folder: python -m benchmarks.bench_components
+
+from unittest.mock import patch
+import pandas as pd
+from benchmarks.common import timed
+import utils.data_store as data_store
+import utils.dashboard_components as components
+
+REGIONS = ['London', 'Scotland', 'Wales', 'North West', 'South East', 'East Midlands']
+
+# (label, function, args) - the first two isolate the filter/groupby kernels
+# that the encoding targets from the Plotly figure construction
+CASES = [
+    ('mask: Income source != Total income', lambda: components.income_df['Income source'] != 'Total income', ()),
+    ('groupby: Institution name sum', lambda: components.income_df.groupby('Institution name', observed=True).agg({'2013-2020 (total)': 'sum'}), ()),
+    ('generateIncomeChart ins', components.generateIncomeChart, ('ins', 'University of Oxford', 'Clinical Medicine', None)),
+    ('generateIncomeChart nat', components.generateIncomeChart, ('nat', None, 'All', None)),
+    ('generatePhdChartAndKPICard reg', components.generatePhdChartAndKPICard, ('reg', None, 'All', 'London')),
+    ('generateIncomeCategoryChartAndKPICard ins', components.generateIncomeCategoryChartAndKPICard, ('ins', 'University of Oxford', 'All', None)),
+    ('generateStaffFTEKPICard ins', components.generateStaffFTEKPICard, ('ins', 'University of Oxford', 'All', None)),
+    ('generateInKindKPICard reg', components.generateInKindKPICard, ('reg', None, 'All', 'London')),
+    ('generateQualityPieChart', components.generateQualityPieChart, ('University of Oxford', 'Clinical Medicine', 'Overall')),
+    ('generateRankingCards', components.generateRankingCards, ('ins', 'University of Oxford', 'All')),
+    ('generateRegionScatterPlots income', components.generateRegionScatterPlots, ('income', REGIONS, 'All', 'Overall')),
+    ('generateRegionLineCharts income', components.generateRegionLineCharts, ('income', REGIONS, 'All')),
+    ('generateRegionIncomeSankey', components.generateRegionIncomeSankey, (REGIONS, 'All')),
+    ('generateRegionGPADist', components.generateRegionGPADist, (REGIONS, 'All', 'Overall')),
+    ('generateDataFrameForMap Income', components.generateDataFrameForMap, ('Income', 'All')),
+]
+
+FRAMES = ['results_df', 'income_df', 'incomeiK_df', 'phd_df', 'regions_mapping']
+
+def as_strings(df):
+    return df.astype({col: object for col in data_store.DIMENSIONS if col in df.columns})
+
+def memory_mb(df):
+    return df.copy().memory_usage(deep=True).sum() / 1e6
+
+def main():
+    string_frames = {name: as_strings(getattr(data_store, name)) for name in FRAMES}
+
+    print(f"{'dataset':<16} {'strings (MB)':>13} {'categorical (MB)':>17}")
+    for name in FRAMES:
+        print(f"{name:<16} {memory_mb(string_frames[name]):>13.2f} {memory_mb(getattr(data_store, name)):>17.2f}")
+
+    print()
+    print(f"{'function':<42} {'strings (ms)':>13} {'categorical (ms)':>17} {'speed-up':>9}")
+    for label, func, args in CASES:
+        categorical_time = timed(lambda: func(*args), 20)
+        patches = [patch(f'utils.dashboard_components.{name}', df) for name, df in string_frames.items()]
+        for p in patches:
+            p.start()
+        try:
+            string_time = timed(lambda: func(*args), 20)
+        finally:
+            for p in patches:
+                p.stop()
+        print(f"{label:<42} {string_time * 1e3:>13.2f} {categorical_time * 1e3:>17.2f} {string_time / categorical_time:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
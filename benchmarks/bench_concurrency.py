@@ -0,0 +1,57 @@
+## Wall-clock latency of the pages' update callbacks with their figure
+## generators run serially, on the thread pool and on the process pool (see
+## utils/tasks.py): Regional Trends for 1, 6 and 12 regions, and the
+## Multi-level View's institution, regional and national views. Memoisation
+## is turned off so every run computes its figures, and the pools are
+## created (and the process pool forked) with it off.
+##
+## Run from the root folder: python -m benchmarks.bench_concurrency
+
+import importlib
+import os
+from unittest.mock import patch
+from benchmarks.common import timed
+import utils.data_store as data_store
+from utils import tasks
+
+REGIONS = [
+    'London', 'South West', 'South East', 'East of England', 'West Midlands', 'East Midlands',
+    'North West', 'North East', 'Yorkshire and The Humber', 'Northern Ireland', 'Wales', 'Scotland',
+]
+
+def callbacks():
+    # pages register themselves with the app, so it must exist first
+    importlib.import_module('app')
+    trends = importlib.import_module('pages.regional_trends')
+    view = importlib.import_module('pages.multi_level_view')
+    cases = [(f'regional trends: {n} region(s)', lambda n=n: trends.updatePage(1, REGIONS[:n], 'All', 'Overall'))
+             for n in [1, 6, 12]]
+    cases += [
+        ('multi-level view: institution', lambda: view.updatePanels(1, 'ins', 'University of Oxford', None, 'Clinical Medicine', 'Overall')),
+        ('multi-level view: region', lambda: view.updatePanels(1, 'reg', None, 'London', 'All', 'Overall')),
+        ('multi-level view: national', lambda: view.updatePanels(1, 'nat', None, None, 'All', 'Overall')),
+    ]
+    return cases
+
+def main():
+    cases = callbacks()
+    print(f"{os.cpu_count()} CPU(s), {tasks.MAX_WORKERS} workers per pool\n")
+    print(f"{'callback':<34}" + ''.join(f"{mode + ' (ms)':>16}" for mode in tasks.MODES))
+    with patch.object(data_store, 'data_version', None):
+        for label, callback in cases:
+            row = []
+            for mode in tasks.MODES:
+                with patch.object(tasks, 'MODE', mode):
+                    callback()
+                    row.append(timed(callback, 10))
+            print(f"{label:<34}" + ''.join(f"{seconds * 1e3:>16.1f}" for seconds in row))
+        tasks.shutdown()
+
+    print(f"\n{'task':<24} {'calls':>6} {'mean (ms)':>10} {'max (ms)':>10}")
+    for label, entry in tasks.stats()['tasks'].items():
+        print(f"{label:<24} {entry['calls']:>6} {entry['seconds'] / entry['calls'] * 1e3:>10.1f} "
+              f"{entry['max_seconds'] * 1e3:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+## Cost of building vs serialising each figure type, and of serving it from
+## the pre-serialised figure cache (utils/memo.py) instead.
+##
+## A request for a figure costs its construction (data + Plotly validation)
+## plus Dash's serialisation of the go.Figure. A cache hit costs parsing the
+## cached JSON plus Dash's serialisation of the resulting plain dict.
+##
+## Run from the root folder: python -m benchmarks.bench_figure_cache
+
+import app          # noqa: F401 - registers the pages before the components are used
+from plotly.io.json import to_json_plotly
+from benchmarks.common import timed
+import utils.dashboard_components as components
+
+REGIONS = ['London', 'Scotland', 'Wales', 'North West', 'South East', 'East Midlands']
+
+# (label, memoised function, args) - the seven regional trends figures, then
+# the multi-level view's
+CASES = [
+    ('line chart: phd', components.generateRegionLineCharts, ('phd', REGIONS, 'All')),
+    ('line chart: income', components.generateRegionLineCharts, ('income', REGIONS, 'All')),
+    ('gpa distribution', components.generateRegionGPADist, (REGIONS, 'All', 'Overall')),
+    ('scatter: phd', components.generateRegionScatterPlots, ('phd', REGIONS, 'All', 'Overall')),
+    ('scatter: income', components.generateRegionScatterPlots, ('income', REGIONS, 'All', 'Overall')),
+    ('scatter: in-kind', components.generateRegionScatterPlots, ('incomeik', REGIONS, 'All', 'Overall')),
+    ('sankey', components.generateRegionIncomeSankey, (REGIONS, 'All')),
+    ('income chart', components.generateIncomeChart, ('ins', 'University of Oxford', 'All', None)),
+    ('phd chart', components.generatePhdChartAndKPICard, ('reg', None, 'All', 'London')),
+    ('income treemap', components.generateIncomeCategoryChartAndKPICard, ('ins', 'University of Oxford', 'All', None)),
+    ('quality pie', components.generateQualityPieChart, ('University of Oxford', 'Clinical Medicine', 'Overall')),
+]
+
+def figure_of(result):
+    return result[0] if isinstance(result, tuple) else result
+
+def main():
+    print(f"{'figure':<20} {'build (ms)':>11} {'serialise (ms)':>15} {'hit (ms)':>9} "
+          f"{'serialise hit (ms)':>19} {'KB':>7} {'speed-up':>9}")
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for label, func, args in CASES:
+        build = lambda: func.__wrapped__(*args)
+        fig = figure_of(build())
+        func(*args)                                 # warm the cache
+        hit = figure_of(func(*args))
+        assert to_json_plotly(hit) == to_json_plotly(fig)
+
+        times = [
+            timed(build, 10),
+            timed(lambda: to_json_plotly(fig), 10),
+            timed(lambda: func(*args), 50),
+            timed(lambda: to_json_plotly(hit), 50),
+        ]
+        totals = [t + u for t, u in zip(totals, times)]
+        size = len(to_json_plotly(fig)) / 1e3
+        print(f"{label:<20} {times[0] * 1e3:>11.2f} {times[1] * 1e3:>15.2f} {times[2] * 1e3:>9.2f} "
+              f"{times[3] * 1e3:>19.2f} {size:>7.1f} {(times[0] + times[1]) / (times[2] + times[3]):>8.0f}x")
+    print(f"{'total':<20} {totals[0] * 1e3:>11.2f} {totals[1] * 1e3:>15.2f} {totals[2] * 1e3:>9.2f} "
+          f"{totals[3] * 1e3:>19.2f} {'':>7} {(totals[0] + totals[1]) / (totals[2] + totals[3]):>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
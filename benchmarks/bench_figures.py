@@ -0,0 +1,92 @@
+## Per-figure cost of the Institution and Regional pages' px charts - the
+## yearly income and PhD lines, the regions' line charts, the GPA scatter plots
+## and the GPA bar chart - built with plotly.express and update_layout, against
+## the plain-dict builders of utils/figures.py, on the same data. Build is the
+## figure alone; serialised adds the JSON the memo cache holds and Dash sends.
+## The frames are prepared once and not timed.
+##
+## Run from the root folder: python -m benchmarks.bench_figures
+
+import app          # noqa: F401 - registers the pages before the components are used
+import json
+import numpy as np
+import plotly.express as px
+from plotly.io.json import to_json_plotly
+from benchmarks.common import timed
+from utils import data_cube, data_partition, figures
+from utils.aggregation import aggregate
+from utils.data_store import results_df, income_df, phd_df, regions_mapping
+
+REGIONS = [
+    'London', 'South West', 'South East', 'East of England', 'West Midlands', 'East Midlands',
+    'North West', 'North East', 'Yorkshire and The Humber', 'Northern Ireland', 'Wales', 'Scotland',
+]
+
+# what the charts' update_layout calls set
+LAYOUT = dict(
+    title=dict(text='Chart', font=dict(color='#9b58b6', size=18)),
+    xaxis=dict(color='#9b58b6', tickfont=dict(color='#9b58b6'), gridcolor='lightgrey'),
+    yaxis=dict(color='#9b58b6', tickfont=dict(color='#9b58b6'), gridcolor='lightgrey'),
+    plot_bgcolor='rgba(0, 0, 0, 0)',
+    font=dict(family='Inter, sans-serif'),
+    margin=dict(t=50, l=35, r=35, b=10),
+)
+
+def frames():
+    income = data_cube.lookup(income_df, 'income', 'ins', 'University of Oxford', 'All')
+    phd = data_cube.lookup(phd_df, 'phd', 'reg', 'London', 'All').drop('Total')
+
+    years = ['2013-14', '2014-15', '2015-2020 (avg)']
+    by_region = aggregate(data_partition.source_rows(income_df), 'Region', {year: 'sum' for year in years})
+    lines = by_region.melt(id_vars=['Region'], var_name='Year', value_name='Value')
+
+    gpa = aggregate(results_df[results_df['Profile'] == 'Overall'], 'Institution name', {'GPA': 'mean'})
+    totals = aggregate(income_df, 'Institution name', {'2013-2020 (total)': 'sum'})
+    points = gpa.merge(totals, on='Institution name').merge(regions_mapping, on='Institution name')
+
+    bars = aggregate(results_df[results_df['Profile'] == 'Overall'], 'Region', {'GPA': 'mean'})
+    bars['GPA'] = np.round(bars['GPA'], 2)
+    return income, phd, lines, points, bars
+
+def cases():
+    income, phd, lines, points, bars = frames()
+    scatter_labels = {'x': '2013-2020 (total)', 'y': 'GPA', 'color': 'Region'}
+    # (label, px build, figures build)
+    return [
+        ('income chart (1 line)',
+         lambda: px.line(income, markers=True).update_layout(LAYOUT),
+         lambda: figures.update(figures.line(income.index, income.to_numpy()), {'layout': LAYOUT})),
+        ('phd chart (1 line)',
+         lambda: px.line(phd, markers=True).update_layout(LAYOUT),
+         lambda: figures.update(figures.line(phd.index, phd.to_numpy()), {'layout': LAYOUT})),
+        (f'region lines ({len(REGIONS)})',
+         lambda: px.line(lines, x='Year', y='Value', color='Region', markers=True).update_layout(LAYOUT),
+         lambda: figures.update(figures.line(lines['Year'], lines['Value'], color=lines['Region'],
+                                             labels={'x': 'Year', 'y': 'Value', 'color': 'Region'}), {'layout': LAYOUT})),
+        (f'gpa scatter ({len(points)} points)',
+         lambda: px.scatter(points, x='2013-2020 (total)', y='GPA', hover_name='Institution name',
+                            color='Region', log_x=True).update_layout(LAYOUT),
+         lambda: figures.update(figures.scatter(points['2013-2020 (total)'], points['GPA'], color=points['Region'],
+                                                hover_name=points['Institution name'], labels=scatter_labels,
+                                                log_x=True), {'layout': LAYOUT})),
+        (f'gpa bars ({len(bars)})',
+         lambda: px.bar(bars, x='Region', y='GPA', text='GPA', color='Region').update_layout(LAYOUT),
+         lambda: figures.update(figures.bar(bars['Region'].to_numpy(dtype=object), bars['GPA'].to_numpy(),
+                                            labels={'x': 'Region', 'y': 'GPA'}), {'layout': LAYOUT})),
+    ]
+
+def main():
+    print(f"{'figure':<28} {'px build (ms)':>14} {'dict build (ms)':>16} {'speed-up':>9} "
+          f"{'px + JSON (ms)':>14} {'dict + JSON (ms)':>16} {'speed-up':>9}")
+    for label, old, new in cases():
+        same = json.loads(to_json_plotly(old())) == json.loads(to_json_plotly(new()))
+        old_build, new_build = timed(old, 20), timed(new, 20)
+        old_total = timed(lambda: to_json_plotly(old()), 20)
+        new_total = timed(lambda: to_json_plotly(new()), 20)
+        print(f"{label:<28} {old_build * 1e3:>14.2f} {new_build * 1e3:>16.2f} {old_build / new_build:>8.0f}x "
+              f"{old_total * 1e3:>14.2f} {new_total * 1e3:>16.2f} {old_total / new_total:>8.0f}x"
+              f"{'' if same else '  (output differs)'}")
+
+
+if __name__ == '__main__':
+    main()
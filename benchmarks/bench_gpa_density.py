@@ -0,0 +1,51 @@
+## Cost of the curves of the Regional Trends GPA distribution chart ("All"
+## UOAs): filtering, fitting and evaluating them per request with plotly's
+## create_distplot (through SciPy), against assembling the curves precomputed
+## at load by utils/densities.py into a figure. Both charts then get the same
+## layout, which is not timed. Also reports what importing plotly.figure_factory
+## and SciPy used to add to start-up.
+##
+## Run from the root folder: python -m benchmarks.bench_gpa_density
+
+import subprocess
+import sys
+import app          # noqa: F401 - registers the pages before the components are used
+import plotly.graph_objects as go
+from benchmarks.common import timed
+from utils import densities
+from utils.aggregation import aggregate
+from utils.data_store import results_df
+
+REGIONS = [
+    'London', 'South West', 'South East', 'East of England', 'West Midlands', 'East Midlands',
+    'North West', 'North East', 'Yorkshire and The Humber', 'Northern Ireland', 'Wales', 'Scotland',
+]
+
+def distplot(region, profile):
+    # the chart's curves as they were built before
+    import plotly.figure_factory as ff
+    df = results_df[(results_df['Profile'] == profile) & (results_df['Region'].isin(region))]
+    data = [aggregate(df[df['Region'] == r], 'UOA name', {'GPA': 'mean'})['GPA'] for r in region]
+    return ff.create_distplot(data, region, bin_size=.1, curve_type='normal', show_hist=False, show_rug=False)
+
+def precomputed(region, profile):
+    return go.Figure(data=densities.densities_for(results_df).traces(region, profile))
+
+def import_seconds(module):
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return float(out.stdout)
+
+def main():
+    print(f"{'regions':>8} {'create_distplot (ms)':>21} {'precomputed (ms)':>17} {'speed-up':>9}")
+    for n in [1, 6, 12]:
+        region = REGIONS[:n]
+        old = timed(lambda: distplot(region, 'Overall'), 10)
+        new = timed(lambda: precomputed(region, 'Overall'), 10)
+        print(f"{n:>8} {old * 1e3:>21.1f} {new * 1e3:>17.1f} {old / new:>8.1f}x")
+    print(f"\nimporting plotly.figure_factory (and SciPy): {import_seconds('plotly.figure_factory; import scipy.stats') * 1e3:.0f} ms, "
+          f"no longer on the start-up path")
+
+
+if __name__ == '__main__':
+    main()
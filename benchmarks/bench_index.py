@@ -0,0 +1,40 @@
+## Lookup benchmark: selecting the rows for an institution / UOA / profile
+## with boolean masks over the whole frame vs a slice of the sorted composite
+## index in utils/data_index.py.
+##
+## Run from the root folder: python -m benchmarks.bench_index
+
+from benchmarks.common import timed
+from utils.data_index import select
+from utils.data_store import results_df, income_df, phd_df
+
+UNI = 'University of Oxford'
+UOA = 'Clinical Medicine'
+
+# (label, mask lookup, index lookup)
+CASES = [
+    ('results: institution',
+     lambda: results_df[results_df['Institution name'] == UNI],
+     lambda: select(results_df, UNI)),
+    ('results: institution + UOA + profile',
+     lambda: results_df[(results_df['Institution name'] == UNI) & (results_df['UOA name'] == UOA) & (results_df['Profile'] == 'Overall')],
+     lambda: select(results_df, UNI, UOA, 'Overall')),
+    ('income: institution + UOA + source',
+     lambda: income_df[(income_df['Institution name'] == UNI) & (income_df['UOA name'] == UOA) & (income_df['Income source'] == 'Total income')],
+     lambda: select(income_df, UNI, UOA, 'Total income')),
+    ('phd: institution + UOA',
+     lambda: phd_df[(phd_df['Institution name'] == UNI) & (phd_df['UOA name'] == UOA)],
+     lambda: select(phd_df, UNI, UOA)),
+]
+
+def main():
+    print(f"{'lookup':<38} {'mask (ms)':>10} {'index (ms)':>11} {'speed-up':>9}")
+    for label, mask, index in CASES:
+        assert mask().index.equals(index().index)
+        mask_time = timed(mask, 50)
+        index_time = timed(index, 50)
+        print(f"{label:<38} {mask_time * 1e3:>10.3f} {index_time * 1e3:>11.3f} {mask_time / index_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
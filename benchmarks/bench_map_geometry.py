@@ -0,0 +1,58 @@
+## Payload and parse cost of the map at each geometry level (utils/geometry.py).
+##
+## For each level: the GeoJSON's size (raw and gzipped, as served), its vertex
+## count (what the browser projects and draws on every render), the time to
+## build and serialise a choropleth embedding it, and - when Node.js is on the
+## PATH - the time for a JavaScript engine to parse it, the first step of the
+## browser's render.
+##
+## Run from the root folder: python -m benchmarks.bench_map_geometry
+
+import gzip
+import os
+import shutil
+import subprocess
+import app          # noqa: F401 - registers the pages before the components are used
+from plotly.io.json import to_json_plotly
+from benchmarks.common import timed
+from utils import geometry
+import utils.dashboard_components as components
+
+# parses a file 20 times and prints the median time in ms
+NODE_PARSE = """
+const text = require('fs').readFileSync(process.argv[1], 'utf8');
+const times = [];
+for (let i = 0; i < 20; i++) {
+    const start = process.hrtime.bigint();
+    JSON.parse(text);
+    times.push(Number(process.hrtime.bigint() - start) / 1e6);
+}
+times.sort((a, b) => a - b);
+console.log(times[10]);
+"""
+
+def node_parse_ms(path):
+    if shutil.which('node') is None:
+        return None
+    out = subprocess.run(['node', '-e', NODE_PARSE, path], capture_output=True, text=True, check=True)
+    return float(out.stdout)
+
+def main():
+    df = components.generateDataFrameForMap('Overall GPA', 'All')
+    print(f"{'level':<8} {'KB':>7} {'gzip KB':>8} {'vertices':>9} {'build (ms)':>11} "
+          f"{'serialise (ms)':>15} {'JS parse (ms)':>14}")
+    for level in geometry.LEVELS:
+        path = os.path.join(geometry.ASSETS_DIR, geometry.asset_name(level))
+        with open(path, 'rb') as f:
+            raw = f.read()
+        fig = components.generateMap(df, 'Overall GPA', level=level)
+        parse = node_parse_ms(path)
+        print(f"{level:<8} {len(raw) / 1e3:>7.1f} {len(gzip.compress(raw)) / 1e3:>8.1f} "
+              f"{geometry.vertex_count(geometry.load(level)):>9} "
+              f"{timed(lambda: components.generateMap(df, 'Overall GPA', level=level), 5) * 1e3:>11.1f} "
+              f"{timed(lambda: to_json_plotly(fig), 5) * 1e3:>15.1f} "
+              f"{'-' if parse is None else f'{parse:.1f}':>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+## Bytes sent to the browser for the National Overview's map: per metric
+## switch when the server built each choropleth with the GeoJSON embedded,
+## against the prebuilt variants switched by a clientside callback (the
+## variants ship once, with the page, and the geometry is fetched once, as
+## a cacheable static asset).
+##
+## Run from the root folder: python -m benchmarks.bench_map_payload
+
+import os
+import app          # noqa: F401 - registers the pages before the components are used
+from dash._utils import to_json
+from benchmarks.common import timed
+import utils.dashboard_components as components
+from pages import national_overview
+
+def server_map(filter, weighted):
+    # the figure the server used to build and send on every switch
+    df = components.generateDataFrameForMap(filter, 'All', weighted)
+    return components.generateMap(df, filter, weighted)
+
+def main():
+    geojson_kb = os.path.getsize('assets/regions.geojson') / 1e3
+    variants = national_overview.generateMapVariants()
+
+    print(f"{'metric':<18} {'server build (ms)':>18} {'server response (KB)':>21} {'clientside (KB)':>16}")
+    total = 0.0
+    for filter in national_overview.MAP_METRICS:
+        fig = server_map(filter, False)
+        kb = len(to_json({'figure': fig})) / 1e3
+        total += kb
+        print(f"{filter:<18} {timed(lambda: server_map(filter, False), 5) * 1e3:>18.1f} {kb:>21.1f} {0:>16.1f}")
+
+    print(f"\nswitching through all {len(national_overview.MAP_METRICS)} metrics: "
+          f"{total:.0f} KB from the server before, 0 KB now")
+    print(f"sent once: prebuilt variants {len(to_json(variants)) / 1e3:.1f} KB with the page, "
+          f"geometry {geojson_kb:.0f} KB as a cached asset "
+          f"(build {timed(national_overview.generateMapVariants, 5) * 1e3:.0f} ms, at start-up)")
+
+
+if __name__ == '__main__':
+    main()
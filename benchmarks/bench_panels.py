@@ -0,0 +1,74 @@
+## Time to first panel and to the whole page of the Multi-level View's
+## "Update dashboard" click, for the institution, regional and national views.
+## Computed as one response (every panel arrives together, as with a single
+## callback) against the panel callbacks of pages/multi_level_view.py as Dash
+## dispatches them: one request each, served one after another (a single
+## server thread) or concurrently (a threaded server). Cold runs compute every
+## result (memoisation off); warm runs are served from the memo cache.
+##
+## Run from the root folder: python -m benchmarks.bench_panels
+
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from unittest.mock import patch
+import numpy as np
+import utils.data_store as data_store
+
+REPEATS = 10
+
+SELECTIONS = {
+    'institution': ('ins', 'University of Oxford', None, 'Clinical Medicine'),
+    'region': ('reg', None, 'London', 'All'),
+    'national': ('nat', None, None, 'All'),
+}
+
+def one_response(page, args):
+    start = time.perf_counter()
+    for panel in page.PANELS:
+        panel(*args)
+    total = time.perf_counter() - start
+    return total, total
+
+def one_after_another(page, args):
+    start = time.perf_counter()
+    first = None
+    for panel in page.PANELS:
+        panel(*args)
+        first = first or time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+def concurrently(page, args, pool):
+    start = time.perf_counter()
+    done = [time.perf_counter() - start for _ in as_completed([pool.submit(panel, *args) for panel in page.PANELS])]
+    return done[0], done[-1]
+
+def median(strategy):
+    runs = np.array([strategy() for _ in range(REPEATS)])
+    return np.median(runs, axis=0)
+
+def main():
+    # pages register themselves with the app, so it must exist first
+    importlib.import_module('app')
+    page = importlib.import_module('pages.multi_level_view')
+
+    print(f"{'selection':<13} {'cache':<6} {'panels served':<22} {'first panel (ms)':>17} {'whole page (ms)':>16}")
+    with ThreadPoolExecutor(len(page.PANELS)) as pool:
+        for label, (view, ins, reg, uoa) in SELECTIONS.items():
+            args = (1, view, ins, reg, uoa, 'Overall', False)
+            strategies = [
+                ('in one response', lambda: one_response(page, args)),
+                ('one after another', lambda: one_after_another(page, args)),
+                ('concurrently', lambda: concurrently(page, args, pool)),
+            ]
+            for cache in ['cold', 'warm']:
+                version = None if cache == 'cold' else data_store.data_version
+                with patch.object(data_store, 'data_version', version):
+                    for name, strategy in strategies:
+                        strategy()
+                        first, total = median(strategy)
+                        print(f"{label:<13} {cache:<6} {name:<22} {first * 1e3:>17.1f} {total * 1e3:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+## Startup benchmark: time to load every dataset from CSV vs from the
+## compiled columnar bundles in utils/data_cache.py.
+##
+## Run from the root folder: python -m benchmarks.bench_startup
+
+import pandas as pd
+from benchmarks.common import timed
+from utils import data_cache
+from utils.data_store import DATA_DIR, DATASETS
+
+def main():
+    print(f"{'dataset':<10} {'csv (ms)':>10} {'compiled (ms)':>14} {'speed-up':>9}")
+    total_csv = total_compiled = 0
+
+    for name, file_name in DATASETS.items():
+        csv_path = f"{DATA_DIR}/{file_name}"
+        bundle = data_cache.write_bundle(pd.read_csv(csv_path), csv_path)
+
+        csv_time = timed(lambda: pd.read_csv(csv_path))
+        # includes hashing the CSV, as the freshness check does on every boot
+        compiled_time = timed(lambda: data_cache.read_csv_cached(csv_path))
+        total_csv += csv_time
+        total_compiled += compiled_time
+
+        pd.testing.assert_frame_equal(data_cache.read_bundle(bundle), pd.read_csv(csv_path))
+        print(f"{name:<10} {csv_time * 1e3:>10.1f} {compiled_time * 1e3:>14.1f} {csv_time / compiled_time:>8.1f}x")
+
+    print(f"{'total':<10} {total_csv * 1e3:>10.1f} {total_compiled * 1e3:>14.1f} {total_csv / total_compiled:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+## Bytes sent to the browser per "Update Dashboard" click on the Regional
+## Trends page: the seven figures resent in full on every click, against the
+## partial updates (dash.Patch, see utils/figures.py::diff) sent when only the
+## regions changed. Walks through a session: adding regions one at a time,
+## removing and swapping one, then changing the GPA profile and the UOA (both
+## rebuilt in full).
+##
+## Run from the root folder: python -m benchmarks.bench_trends_payload
+
+import app          # noqa: F401 - registers the pages before the components are used
+from dash._utils import to_json
+from benchmarks.common import timed
+from pages import regional_trends
+
+REGIONS = [
+    'London', 'South West', 'South East', 'East of England', 'West Midlands', 'East Midlands',
+    'North West', 'North East', 'Yorkshire and The Humber', 'Northern Ireland', 'Wales', 'Scotland',
+]
+
+def session():
+    """
+    Returns the clicks' (label, regions, uoa, profile), in order.
+    """
+    clicks = [(f'add {region}', REGIONS[:n + 1], 'All', 'Overall') for n, region in enumerate(REGIONS[:6])]
+    clicks += [
+        ('remove London', REGIONS[1:6], 'All', 'Overall'),
+        ('swap South West for Wales', REGIONS[2:6] + ['Wales'], 'All', 'Overall'),
+        ('profile: Impact', REGIONS[2:6] + ['Wales'], 'All', 'Impact'),
+        ('uoa: Clinical Medicine', REGIONS[2:6] + ['Wales'], 'Clinical Medicine', 'Impact'),
+        ('add Scotland', REGIONS[2:6] + ['Wales', 'Scotland'], 'Clinical Medicine', 'Impact'),
+    ]
+    return clicks
+
+def response_bytes(outputs):
+    # the figures' part of the callback's response
+    return len(to_json(list(outputs[:7])))
+
+def main():
+    print(f"{'click':<32} {'full (KB)':>10} {'patched (KB)':>13} {'saved':>7} {'patched response (ms)':>22}")
+    shown = None
+    totals = [0, 0]
+    for label, regions, uoa, profile in session():
+        full = regional_trends.updatePage(1, regions, uoa, profile)
+        patched = regional_trends.updatePage(1, regions, uoa, profile, shown)
+        ms = timed(lambda: regional_trends.updatePage(1, regions, uoa, profile, shown), 5) * 1e3
+        before, after = response_bytes(full), response_bytes(patched)
+        totals[0] += before
+        totals[1] += after
+        print(f"{label:<32} {before / 1e3:>10.1f} {after / 1e3:>13.1f} {1 - after / before:>7.0%} {ms:>22.1f}")
+        shown = patched[-1]
+
+    print(f"\n{'session':<32} {totals[0] / 1e3:>10.1f} {totals[1] / 1e3:>13.1f} {1 - totals[1] / totals[0]:>7.0%}")
+
+
+if __name__ == '__main__':
+    main()
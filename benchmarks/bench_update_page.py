@@ -0,0 +1,57 @@
+## Latency of the Multi-level View's "Update dashboard" callbacks, every
+## panel (pages/multi_level_view.py::updatePanels), over a sample of clicks
+## across the institution, regional and national views, reported as
+## p50 / p95 / max.
+##
+## Run from the root folder: python -m benchmarks.bench_update_page
+
+import importlib
+import time
+import numpy as np
+from utils.data_store import results_df
+
+CLICKS_PER_VIEW = 100
+
+def sample_clicks(seed=0):
+    """
+    Returns (view, ins, reg, uoa) tuples, as the page's dropdowns would send them.
+    """
+    rng = np.random.default_rng(seed)
+    overall = results_df[results_df['Profile'] == 'Overall']
+    pairs = overall[['Institution name', 'UOA name']].drop_duplicates().to_numpy()
+    regions = overall['Region'].unique()
+    uoas = ['All'] + list(overall['UOA name'].unique())
+
+    clicks = []
+    for _ in range(CLICKS_PER_VIEW):
+        ins, uoa = pairs[rng.integers(len(pairs))]
+        clicks.append(('ins', ins, None, uoa if rng.random() < 0.7 else 'All'))
+        clicks.append(('reg', None, rng.choice(regions), rng.choice(uoas)))
+        clicks.append(('nat', None, None, rng.choice(uoas)))
+    return clicks
+
+def main():
+    # pages register themselves with the app, so it must exist first
+    importlib.import_module('app')
+    page = importlib.import_module('pages.multi_level_view')
+    clicks = sample_clicks()
+
+    # first call of each code path warms imports & plotly's validators
+    for view in ['ins', 'reg', 'nat']:
+        page.updatePanels(1, *next(c for c in clicks if c[0] == view), 'Overall')
+
+    times = {}
+    for view, ins, reg, uoa in clicks:
+        start = time.perf_counter()
+        page.updatePanels(1, view, ins, reg, uoa, 'Overall')
+        times.setdefault(view, []).append(time.perf_counter() - start)
+    times['all'] = sum(times.values(), [])
+
+    print(f"{'view':<6} {'clicks':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9}")
+    for view, t in times.items():
+        p50, p95 = np.percentile(t, [50, 95]) * 1e3
+        print(f"{view:<6} {len(t):>7} {p50:>9.1f} {p95:>9.1f} {max(t) * 1e3:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
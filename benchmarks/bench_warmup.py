@@ -0,0 +1,98 @@
+## Time to first useful response after a server start, with and without the
+## background cache warm-up (utils/warmup.py).
+##
+## Each scenario runs in a fresh process: the app is loaded, then a visitor
+## arrives and requests the landing selection (the national leaderboard; the
+## map is prebuilt and switched in the browser), then - after THINK_SECONDS
+## each - the multi-level view's national "All" view and one single-region view. The time to first useful
+## response is measured from the visitor's arrival, and from the process start.
+##
+## Run from the root folder: python -m benchmarks.bench_warmup
+
+import time
+PROCESS_START = time.perf_counter()
+
+import json
+import subprocess
+import sys
+
+# seconds a visitor spends on a view before the next request
+THINK_SECONDS = 2
+
+# label -> (warm-up on, seconds after the app has loaded that the visitor
+# arrives, or None for once the warm-up is complete)
+SCENARIOS = {
+    'no warm-up': (False, 0),
+    'warm-up, visitor arrives at once': (True, 0),
+    'warm-up, visitor arrives after 5 s': (True, 5),
+    'warm-up, visitor arrives when ready': (True, None),
+}
+
+def visit():
+    """
+    Serves the visitor's requests as the server would, returning each one's latency in ms.
+    """
+    from pages import multi_level_view, national_overview, regional_trends
+    from utils import warmup
+
+    requests = [
+        ('national overview', lambda: national_overview.generateLeaderboard('Overall GPA', False)),
+        ('multi-level: national', lambda: multi_level_view.updatePanels(1, 'nat', None, None, 'All', 'Overall', False)),
+        ('regional trends: Wales', lambda: regional_trends.updatePage(1, ['Wales'], 'All', 'Overall')),
+    ]
+    latencies = {}
+    arrived = time.perf_counter()
+    first = None
+    for i, (label, request) in enumerate(requests):
+        if i:
+            time.sleep(THINK_SECONDS)
+        warmup.request_started()
+        start = time.perf_counter()
+        request()
+        latencies[label] = (time.perf_counter() - start) * 1e3
+        warmup.request_finished()
+        first = first or time.perf_counter()
+    return latencies, (first - arrived) * 1e3, (first - PROCESS_START) * 1e3
+
+def scenario(label):
+    import app          # noqa: F401 - loads the data and registers the pages
+    from utils import warmup
+
+    enabled, arrives = SCENARIOS[label]
+    loaded = time.perf_counter() - PROCESS_START
+    if enabled:
+        warmup.start()
+    if arrives is None:
+        while not warmup.state['ready']:
+            time.sleep(0.05)
+    else:
+        time.sleep(arrives)
+    latencies, first, since_start = visit()
+    print(json.dumps({
+        'loaded': loaded,
+        'first': first,
+        'since_start': since_start,
+        'latencies': latencies,
+        'warmup': warmup.state['seconds'],
+    }))
+
+def main():
+    print(f"{'scenario':<38} {'loaded (s)':>10} {'warm-up (s)':>11} {'1st response (ms)':>18} "
+          f"{'since start (s)':>16}   request latencies (ms)")
+    for label in SCENARIOS:
+        out = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_warmup', label],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        r = json.loads(out)
+        warm = f"{r['warmup']:.1f}" if r['warmup'] else '-'
+        requests = ', '.join(f"{name} {ms:.0f}" for name, ms in r['latencies'].items())
+        print(f"{label:<38} {r['loaded']:>10.1f} {warm:>11} {r['first']:>18.0f} "
+              f"{r['since_start'] / 1e3:>16.1f}   {requests}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        scenario(sys.argv[1])
+    else:
+        main()
@@ -0,0 +1,15 @@
+## Helpers shared by the benchmark scripts.
+
+import statistics
+import time
+
+def timed(func, repeats=10):
+    """
+    Returns the median wall-clock time of func() in seconds over `repeats` runs.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
@@ -0,0 +1,7 @@
+## gunicorn settings, read automatically when gunicorn is started from the root folder.
+
+def post_worker_init(worker):
+    # precompute the most common selections in each worker, in the background
+    # (see utils/warmup.py)
+    from utils import warmup
+    warmup.start()
@@ -1,15 +1,12 @@
 import dash
-from dash import callback, html, dcc, Input, Output, State, ctx
+from dash import callback, clientside_callback, html, dcc, Input, Output, State, ctx
 import dash_bootstrap_components as dbc
 import pandas as pd
-import numpy as np
 import utils.dashboard_components as components
-
-# read in datasets
-results_df = pd.read_csv('data/results_cleaned.csv')
-income_df = pd.read_csv('data/income_cleaned.csv')
-incomeiK_df = pd.read_csv('data/incomeiK_cleaned.csv')
-phd_df = pd.read_csv('data/phd_awarded_cleaned.csv')
+from utils import tasks
+from utils.data_index import select
+from utils.data_store import results_df
+from utils.tasks import Task
 
 dash.register_page(
     module= __name__,
@@ -122,8 +119,14 @@ layout = dbc.Container(
                                 xs=12, sm=12, md=12, lg=3, xl=3,
                                 id='uoa-col'
                                 ),
-                                dbc.Col(
-
+                                dbc.Col([
+                                    html.Label(
+                                        "GPA",
+                                        className='subtitle-small',
+                                    ),
+                                    components.create_gpa_mode_switch('gpa-weighted-switch'),
+                                ],
+                                xs=12, sm=12, md=12, lg=1, xl=1,
                                 ),
                                 dbc.Col([
                                     html.Div(
@@ -232,6 +235,7 @@ layout = dbc.Container(
                                                                         ),
                                                                         className = 'submissions-dropdown'
                                                                     ),
+                                                                    dcc.Store(id='quality-profiles'),
                                                                     dcc.Graph(
                                                                         id="submissions-quality",
                                                                         config={"displayModeBar": False},
@@ -299,6 +303,16 @@ layout = dbc.Container(
                                                     )
                                                 ], width=6, id='reg-ranking-col')
                                             ]),
+                                            dbc.Row([       # rank & percentile of every metric
+                                                dbc.Col([
+                                                    dcc.Loading(
+                                                        html.Div(
+                                                            id="metric-ranks",
+                                                            className='card card-body ranking-card'
+                                                        )
+                                                    )
+                                                ], width=12, id='metric-ranks-col')
+                                            ]),
                                             dbc.Row(        # income in-kind category treemap
                                                 dbc.Col(        
                                                     dcc.Loading(
@@ -352,21 +366,24 @@ layout = dbc.Container(
 )
 
 ## Callback Functions
-@callback(
+# the UI-state callbacks only look at the dropdowns, so they run in the browser
+clientside_callback(
+    """
+    function(view) {
+        const shown = {display: 'block'}, hidden = {display: 'none'};
+        switch (view) {
+            case 'ins': return [shown, hidden, shown];
+            case 'reg': return [hidden, shown, shown];
+            case 'nat': return [hidden, hidden, shown];
+            default: return [hidden, hidden, hidden];
+        }
+    }
+    """,
     Output("institution-col", "style"),
     Output("region-col", "style"),
     Output("uoa-col", "style"),
     Input("view-dropdown", "value"),
 )
-def updateDropdownsbyView(view):
-    if view == None:
-        return ({"display": "none"}, {"display": "none"}, {"display": "none"})
-    elif view == 'ins':
-        return ({"display": "block"}, {"display": "none"}, {"display": "block"})
-    elif view == 'reg':
-        return ({"display": "none"}, {"display": "block"}, {"display": "block"})
-    elif view == 'nat':
-        return ({"display": "none"}, {"display": "none"}, {"display": "block"})
 
 @callback(
     Output("uoa-dropdown", "options", allow_duplicate=True),
@@ -381,7 +398,7 @@ def updateUOAbyUni(ins, view):
             ] + [
             {"label": col, "value": col}
             for col in sorted(
-                results_df[(results_df["Institution name"] == ins)]["UOA name"].unique()
+                select(results_df, ins)["UOA name"].unique()
             )
         ]
     else:
@@ -389,16 +406,21 @@ def updateUOAbyUni(ins, view):
 
     return options
 
-@callback(
+# Re-enable button when dropdown changes
+clientside_callback(
+    """
+    function() {
+        return false;
+    }
+    """,
     Output("update-dashboard-btn", "disabled", allow_duplicate=True),
     Input("view-dropdown", "value"),
     Input("uoa-dropdown", "value"),
     Input("institution-dropdown", "value"),
     Input("region-dropdown", "value"),
+    Input("gpa-weighted-switch", "value"),
     prevent_initial_call=True
 )
-def enableUpdateButton(view, uoa, ins, reg):
-    return False  # Re-enable button when dropdown changes
 
 @callback(
     Output("uoa-dropdown", "options", allow_duplicate=True),
@@ -420,7 +442,38 @@ def updateUOAIfRegionalOrNational(view):
 
     return options
 
-@callback(
+# shows the cards for a complete selection, or an alert naming what is missing
+clientside_callback(
+    """
+    function(n_clicks, view, uoa, ins, reg) {
+        const missing = (message) => [true, true, message, true, true, true];
+        if (view == null) {
+            return missing('Please select a View');
+        }
+        if (view === 'ins') {
+            if (uoa == null && ins == null) {
+                return missing('Please make a selection for Institution and Unit of Assessment.');
+            } else if (uoa == null) {
+                return missing('Please select a Unit of Assessment.');
+            } else if (ins == null) {
+                return missing('Please select an Institution.');
+            }
+        } else if (view === 'reg') {
+            if (uoa == null && reg == null) {
+                return missing('Please make a selection for Region and Unit of Assessment.');
+            } else if (uoa == null) {
+                return missing('Please select a Unit of Assessment.');
+            } else if (reg == null) {
+                return missing('Please select a Region.');
+            }
+        } else if (view === 'nat') {
+            if (uoa == null) {
+                return missing('Please select a Unit of Assessment.');
+            }
+        }
+        return [false, false, '', false, false, false];
+    }
+    """,
     Output("left-col", 'hidden'),
     Output("right-col", 'hidden'),
     Output("ins-ov-alert-msg", "children"), 
@@ -434,71 +487,40 @@ def updateUOAIfRegionalOrNational(view):
     State("region-dropdown", "value"),
     prevent_initial_call = True
 )
-def showCardsAndDisableUpdateButton(n_clicks, view, uoa, ins, reg):
-    if view is None:
-        return True, True, "Please select a View", True, True, True
-    
-    if view == 'ins':
-        if uoa is None and ins is None:
-            return True, True, "Please make a selection for Institution and Unit of Assessment.", True, True, True
-        elif uoa is None:
-            return True, True, "Please select a Unit of Assessment.", True, True, True
-        elif ins is None:
-            return True, True, "Please select an Institution.", True, True, True
-    elif view == 'reg':
-        if uoa is None and reg is None:
-            return True, True, "Please make a selection for Region and Unit of Assessment.", True, True, True
-        elif uoa is None:
-            return True, True, "Please select a Unit of Assessment.", True, True, True
-        elif reg is None:
-            return True, True, "Please select a Region.", True, True, True
-    elif view == 'nat':
-        if uoa is None:
-            return True, True, "Please select a Unit of Assessment.", True, True, True
-        
-    return False, False, '', False, False, False
 
-@callback(
+# the pie's profile is switched in the browser, from the profiles sent with the update
+clientside_callback(
+    """
+    function(profile, profiles, figure) {
+        if (!profiles || !figure || !profiles[profile]) {
+            return window.dash_clientside.no_update;
+        }
+        const trace = Object.assign({}, figure.data[0], profiles[profile]);
+        const annotation = Object.assign({}, figure.layout.annotations[0], {text: profile + '<br>Quality'});
+        const layout = Object.assign({}, figure.layout, {annotations: [annotation]});
+        return {data: [trace], layout: layout};
+    }
+    """,
     Output("submissions-quality", 'figure', allow_duplicate=True),
     Input('submissions-radios', 'value'),
-    State('institution-dropdown', 'value'),
-    State('uoa-dropdown', 'value'),
+    State('quality-profiles', 'data'),
+    State('submissions-quality', 'figure'),
     prevent_initial_call = True
 )
-def updateSubmissionsPieChart(profile, uni, uoa):
-    return components.generateQualityPieChart(uni, uoa, profile)
 
-@callback(
-    Output("overall-card", "children"),
-    Output("outputs-card", "children"),
-    Output("impact-card", "children"),
-    Output("env-card", "children"),
-    Output("income-chart", "figure"),
-    Output("phd-awarded-chart", "figure"),
-    Output("income-cat-chart", "figure"),
-    Output('submissions-quality', 'figure'),
-    Output('submissions-pie-div', 'hidden'),
-    Output('submissions-col', 'style'),
-    Output('phd-col', 'className'),
-    Output('inc-chart-col', 'className'),
-    Output("nat-ranking", "children"),
-    Output("reg-ranking", "children"),
-    Output("staff-fte-kpi", "children"),
-    Output("income-kpi", "children"),
-    Output("in-kind-kpi", "children"),
-    Output("phd-kpi", "children"),
-    Output('nat-ranking', 'style'),
-    Output('reg-ranking', 'style'),
+# the selection every panel is computed for, on "Update Dashboard"
+SELECTION = [
     Input("update-dashboard-btn", 'n_clicks'),
     State("view-dropdown", "value"),
     State("institution-dropdown", "value"),
     State("region-dropdown", "value"),
     State("uoa-dropdown", "value"),
     State("submissions-radios", 'value'),
-    prevent_initial_call = True,
-)
-def updatePage(update, view, ins, reg, uoa, gpa_profile):
+    State("gpa-weighted-switch", 'value'),
+]
 
+def checkSelection(view, ins, reg, uoa):
+    # the panels are only updated for a complete selection
     if view is None:
         raise dash.exceptions.PreventUpdate
     
@@ -510,82 +532,111 @@ def updatePage(update, view, ins, reg, uoa, gpa_profile):
     
     if view == 'nat' and (uoa is None):
         raise dash.exceptions.PreventUpdate
-    
-    if view == 'ins':
-        if uoa == 'All':
-            df = results_df[
-                (results_df['Institution name'] == ins) 
-            ]
-            hide_submissions = True
-            submissions_col_style = {'display':'none'}
-            phd_inc_col_class = 'col-12 col-xl-6'
-            ranking_col_style = {}
-        else:
-            df = results_df[
-                (results_df['Institution name'] == ins) &
-                (results_df['UOA name'] == uoa)
-            ]
-            hide_submissions = False
-            submissions_col_style = {}
-            phd_inc_col_class = 'col-12 col-xl-4'
-            ranking_col_style = {}
-    elif view == 'reg':
-        df = results_df[results_df['Region'] == reg]
-        if uoa == 'All':
-            df = df.groupby(['Region', 'Profile']).agg({'GPA':'mean'}).reset_index()
-        else:
-            df = df.groupby(['Region', 'Profile', 'UOA name']).agg({'GPA':'mean'}).reset_index()
-            df = df[df['UOA name'] == uoa]
-        hide_submissions = True
-        submissions_col_style = {'display':'none'}
-        phd_inc_col_class = 'col-12 col-xl-6'
-        ranking_col_style = {'display':'none'}
-    else:
-        if uoa != 'All':
-            df = results_df[results_df['UOA name'] == uoa]
-        else:
-            df = results_df
-        hide_submissions = True
-        submissions_col_style = {'display':'none'}
-        phd_inc_col_class = 'col-12 col-xl-6'
-        ranking_col_style = {'display':'none'}
 
-    # GPA cards
-    if view == 'nat':
-        overall = np.round(np.mean(df[df['Profile'] == 'Overall']['GPA']),2)
-        outputs = np.round(np.mean(df[df['Profile'] == 'Outputs']['GPA']),2)
-        impact = np.round(np.mean(df[df['Profile'] == 'Impact']['GPA']),2)
-        env = np.round(np.mean(df[df['Profile'] == 'Environment']['GPA']),2)
-    else:
-        overall = np.round(np.mean(df.loc[(df["Profile"] == "Overall")]["GPA"]),2)
-        outputs = np.round(np.mean(df.loc[(df["Profile"] == "Outputs")]["GPA"]), 2)
-        impact = np.round(np.mean(df.loc[(df["Profile"] == "Impact")]["GPA"]), 2)
-        env = np.round(np.mean(df.loc[(df["Profile"] == "Environment")]["GPA"]), 2)
+def showsSubmissions(view, uoa):
+    # the quality pie is shown for an institution's single uoa
+    return view == 'ins' and uoa != 'All'
+
+def chartColumnClass(view, uoa):
+    # the phd & income charts share their row with the quality pie when it is shown
+    return 'col-12 col-xl-4' if showsSubmissions(view, uoa) else 'col-12 col-xl-6'
+
+## Panel callbacks - each panel is its own request, computed from results
+## memoised under its own key, so panels render as soon as they are ready
+@callback(
+    Output("overall-card", "children"),
+    Output("outputs-card", "children"),
+    Output("impact-card", "children"),
+    Output("env-card", "children"),
+    *SELECTION,
+    prevent_initial_call = True,
+)
+def updateGPACards(update, view, ins, reg, uoa, gpa_profile, weighted=False):
+    checkSelection(view, ins, reg, uoa)
+    return components.generateGPACards(view, ins, uoa, reg, weighted)
 
-    ranking_cards = components.generateRankingCards(view, ins, uoa)
+@callback(
+    Output("nat-ranking", "children"),
+    Output("reg-ranking", "children"),
+    Output("metric-ranks", "children"),
+    Output('nat-ranking', 'style'),
+    Output('reg-ranking', 'style'),
+    Output('metric-ranks', 'style'),
+    *SELECTION,
+    prevent_initial_call = True,
+)
+def updateRankings(update, view, ins, reg, uoa, gpa_profile, weighted=False):
+    checkSelection(view, ins, reg, uoa)
+    ranking_col_style = {} if view == 'ins' else {'display':'none'}
+    nat_ranking, reg_ranking = components.generateRankingCards(view, ins, uoa, weighted)
+    return (nat_ranking, reg_ranking,
+            components.generateMetricRankCard(view, ins, uoa, weighted),
+            ranking_col_style, ranking_col_style, ranking_col_style)
 
-    income_charts = components.generateIncomeCategoryChartAndKPICard(view, ins, uoa, reg)
+@callback(
+    Output("income-chart", "figure"),
+    Output("income-cat-chart", "figure"),
+    Output('inc-chart-col', 'className'),
+    *SELECTION,
+    prevent_initial_call = True,
+)
+def updateIncomePanel(update, view, ins, reg, uoa, gpa_profile, weighted=False):
+    checkSelection(view, ins, reg, uoa)
+    return (components.generateIncomeChart(view, ins, uoa, reg),
+            components.generateIncomeCategoryChartAndKPICard(view, ins, uoa, reg)[0],
+            chartColumnClass(view, uoa))
 
-    phd_charts = components.generatePhdChartAndKPICard(view, ins, uoa, reg)
+@callback(
+    Output("phd-awarded-chart", "figure"),
+    Output('phd-col', 'className'),
+    *SELECTION,
+    prevent_initial_call = True,
+)
+def updatePhdPanel(update, view, ins, reg, uoa, gpa_profile, weighted=False):
+    checkSelection(view, ins, reg, uoa)
+    return components.generatePhdChartAndKPICard(view, ins, uoa, reg)[0], chartColumnClass(view, uoa)
 
+@callback(
+    Output('submissions-quality', 'figure'),
+    Output('submissions-pie-div', 'hidden'),
+    Output('submissions-col', 'style'),
+    Output('quality-profiles', 'data'),
+    *SELECTION,
+    prevent_initial_call = True,
+)
+def updateQualityPanel(update, view, ins, reg, uoa, gpa_profile, weighted=False):
+    checkSelection(view, ins, reg, uoa)
+    if not showsSubmissions(view, uoa):
+        # hidden: the pie is left as it is, and its profiles are cleared
+        return dash.no_update, True, {'display':'none'}, None
+    return (components.generateQualityPieChart(ins, uoa, gpa_profile), False, {},
+            components.generateQualityProfiles(ins, uoa))
 
+@callback(
+    Output("staff-fte-kpi", "children"),
+    Output("income-kpi", "children"),
+    Output("in-kind-kpi", "children"),
+    Output("phd-kpi", "children"),
+    *SELECTION,
+    prevent_initial_call = True,
+)
+def updateKPIs(update, view, ins, reg, uoa, gpa_profile, weighted=False):
+    checkSelection(view, ins, reg, uoa)
+    return components.generateKPICards(view, ins, uoa, reg)
 
-    return (overall, outputs, impact, env, 
-            components.generateIncomeChart(view, ins, uoa, reg), 
-            phd_charts[0], 
-            income_charts[0],
-            components.generateQualityPieChart(ins, uoa, gpa_profile),
-            hide_submissions,
-            submissions_col_style,
-            phd_inc_col_class,
-            phd_inc_col_class,
-            ranking_cards[0],
-            ranking_cards[1],
-            components.generateStaffFTEKPICard(view, ins, uoa, reg),
-            income_charts[1],
-            components.generateInKindKPICard(view, ins, uoa, reg),
-            phd_charts[1],
-            ranking_col_style,
-            ranking_col_style)
+PANELS = [updateGPACards, updateRankings, updateIncomePanel, updatePhdPanel, updateQualityPanel, updateKPIs]
 
+def updatePanels(update, view, ins, reg, uoa, gpa_profile, weighted=False):
+    """
+    Computes every panel for a selection, as the panel callbacks do on "Update
+    Dashboard" (e.g. to warm the caches), running them as set by
+    FIGURE_CONCURRENCY (see utils/tasks.py).
 
+    Returns:
+    dict: Panel callback name -> its outputs.
+    """
+    outputs = tasks.run(
+        [Task(panel.__name__, panel, update, view, ins, reg, uoa, gpa_profile, weighted) for panel in PANELS],
+        name='multi_level_view.updatePanels',
+    )
+    return {panel.__name__: output for panel, output in zip(PANELS, outputs)}
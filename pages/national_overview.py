@@ -1,18 +1,14 @@
 import dash
-from dash import callback, html, dcc, Input, Output, State
+from dash import callback, clientside_callback, html, dcc, Input, Output, State
 import dash_bootstrap_components as dbc
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import utils.dashboard_components as components
+from utils import geometry, leaderboards
 import json
-
-# read in datasets
-results_df = pd.read_csv('data/results_cleaned.csv')
-income_df = pd.read_csv('data/income_cleaned.csv')
-incomeiK_df = pd.read_csv('data/incomeiK_cleaned.csv')
-phd_df = pd.read_csv('data/phd_awarded_cleaned.csv')
+from utils.data_store import results_df, income_df, incomeiK_df, phd_df
 
 dash.register_page(
     module= __name__,
@@ -20,6 +16,54 @@ dash.register_page(
     path = '/national_overview'
 )
 
+# heading of the leaderboard's value column, for the metrics that are not GPAs
+LEADERBOARD_COLUMNS = {
+    'Income': 'Income',
+    'Income In-Kind': 'Income In-Kind',
+    'PhDs Awarded': 'Total',
+    'Staff FTE': 'FTE staff',
+}
+
+# the map's level of detail (see utils/geometry.py)
+MAP_LEVEL = geometry.DEFAULT_LEVEL
+
+MAP_METRICS = ['Overall GPA', 'Outputs GPA', 'Environment GPA', 'Impact GPA',
+               'Income', 'Income In-Kind', 'PhDs Awarded', 'Staff FTE']
+
+def mapKey(filter, weighted):
+    return f"{filter}|{'fte' if weighted else 'mean'}"
+
+def generateMapVariants():
+    """
+    Prebuilds the regional map for every metric, mean and FTE-weighted.
+
+    The choropleth is built once, with its geometry referenced by URL so the
+    browser fetches (and caches) the static GeoJSON asset instead of receiving
+    it inside every figure. Each metric is then reduced to the values that
+    differ between the maps - regions, z values, colour bar and title - which
+    the clientside callback below swaps into the base figure, so switching
+    the map's metric makes no request to the server.
+
+    Returns:
+    dict: {'figure': base figure, 'variants': mapKey -> the variant's values}.
+    """
+    variants = {}
+    for filter in MAP_METRICS:
+        for weighted in [False, True]:
+            df = components.generateDataFrameForMap(filter, 'All', weighted)
+            color, label = components.mapColour(filter, weighted)
+            variants[mapKey(filter, weighted)] = {
+                'locations': df['Region'].astype(str).tolist(),
+                'z': df[color].tolist(),
+                'colorbar': color,
+                'hovertemplate': f"Region=%{{location}}<br>{color}=%{{z}}<extra></extra>",
+                'title': f"Regional Comparison of {label}",
+            }
+
+    df = components.generateDataFrameForMap(MAP_METRICS[0], 'All')
+    fig = components.generateMap(df, MAP_METRICS[0], geojson=dash.get_asset_url(geometry.asset_name(MAP_LEVEL)))
+    return {'figure': fig.to_plotly_json(), 'variants': variants}
+
 layout = dbc.Container(
     [
         html.Div(
@@ -118,7 +162,7 @@ layout = dbc.Container(
                             dbc.Col([
                                 dbc.Row([       
                                     html.Div([
-                                        html.Div(           # selection
+                                        html.Div([          # selection
                                             dcc.Dropdown(
                                                 options=[
                                                     {'label':'Overall GPA', 'value':'Overall GPA'},
@@ -134,7 +178,9 @@ layout = dbc.Container(
                                                 style={'width':'60%'},
                                                 id = 'leaderboard-dropdown',
                                             ),
-                                            className='filter-card',
+                                            components.create_gpa_mode_switch('leaderboard-gpa-weighted'),
+                                            ],
+                                            className='filter-card d-flex align-items-center justify-content-between',
                                             style={'margin-bottom':'0', 
                                                 'border-bottom-right-radius':'0', 
                                                 'border-bottom-left-radius':'0', }
@@ -152,7 +198,7 @@ layout = dbc.Container(
                     dbc.Col([       # selection & map
                         dbc.Row([  
                             html.Div([
-                                html.Div(       # selection
+                                html.Div([      # selection
                                     dcc.Dropdown(
                                         options=[
                                             {'label':'Overall GPA', 'value':'Overall GPA'},
@@ -168,11 +214,14 @@ layout = dbc.Container(
                                         style={'width':'60%'},
                                         id = 'map-dropdown',
                                     ),
-                                    className='filter-card',
+                                    components.create_gpa_mode_switch('map-gpa-weighted'),
+                                    ],
+                                    className='filter-card d-flex align-items-center justify-content-between',
                                     style={'margin-bottom':'0', 
                                            'border-bottom-right-radius':'0', 
                                            'border-bottom-left-radius':'0', }
                                 ),
+                                dcc.Store(id='map-variants', data=generateMapVariants()),
                                 dcc.Loading(
                                     dcc.Graph(          # map
                                         id="region-map",
@@ -197,63 +246,48 @@ layout = dbc.Container(
 @callback(
     Output("leaderboard", "children"),
     Input("leaderboard-dropdown", "value"),
+    Input("leaderboard-gpa-weighted", "value"),
 )
-def generateLeaderboard(filter):
-    if filter == 'Overall GPA':
-        df = results_df[results_df['Profile'] == 'Overall']
-        df = df.groupby('Institution name').agg({'GPA':'mean'}).reset_index()
-        df = df.sort_values(by='GPA', ascending=False)
-        col_label = 'GPA'
-    elif filter == 'Outputs GPA':
-        df = results_df[results_df['Profile'] == 'Outputs']
-        df = df.groupby('Institution name').agg({'GPA':'mean'}).reset_index()
-        df = df.sort_values(by='GPA', ascending=False)
-        col_label = 'GPA'
-    elif filter == 'Impact GPA':
-        df = results_df[results_df['Profile'] == 'Impact']
-        df = df.groupby('Institution name').agg({'GPA':'mean'}).reset_index()
-        df = df.sort_values(by='GPA', ascending=False)
-        col_label = 'GPA'
-    elif filter == 'Environment GPA':
-        df = results_df[results_df['Profile'] == 'Environment']
-        df = df.groupby('Institution name').agg({'GPA':'mean'}).reset_index()
-        df = df.sort_values(by='GPA', ascending=False)
-        col_label = 'GPA'
-    elif filter == 'Income':
-        df = income_df[income_df['Income source'] != 'Total income']
-        df = df.groupby('Institution name').agg({'2013-2020 (total)':'sum'}).reset_index()
-        df = df.sort_values(by='2013-2020 (total)', ascending=False)
-        col_label = 'Income'
-    elif filter == 'Income In-Kind':
-        df = incomeiK_df[incomeiK_df['Income source'] != 'Total income']
-        df = df.groupby('Institution name').agg({'2013-2020 (total)':'sum'}).reset_index()
-        df = df.sort_values(by='2013-2020 (total)', ascending=False)
-        col_label = 'Income In-Kind'
-    elif filter == 'PhDs Awarded':
-        df = phd_df.groupby('Institution name').agg({'Total':'sum'}).reset_index()
-        df = df.sort_values(by='Total', ascending=False)
-        col_label = 'Total'
-    elif filter == 'Staff FTE':
-        df = results_df[results_df['Profile'] == 'Overall']
-        df = df.groupby('Institution name').agg({'FTE staff':'sum'}).reset_index()
-        col_label = 'FTE staff'
+def generateLeaderboard(filter, weighted=False):
+    # top institutions, precomputed for every metric (see utils/leaderboards.py)
+    board = leaderboards.get(filter, weighted)
+    col_label = LEADERBOARD_COLUMNS.get(filter, 'GPA')
+
+    title = f"Top 10 Institutions for {filter}"
+    if weighted and col_label == 'GPA':
+        title += " (FTE-weighted)"
 
-    leaderboard = components.create_leaderboard(
-        f"Top 10 Institutions for {filter}",
-        df,      
+    leaderboard = components.create_leaderboard_table(
+        title,
         col_label,
+        board.names,
+        board.values,
     )
 
     return leaderboard
 
-@callback(
-    Output('region-map', 'figure', allow_duplicate=True),
+# the map's metric is switched in the browser, from the prebuilt variants
+clientside_callback(
+    """
+    function(filter, weighted, maps) {
+        const variant = maps.variants[filter + '|' + (weighted ? 'fte' : 'mean')];
+        const base = maps.figure;
+        const trace = Object.assign({}, base.data[0], {
+            locations: variant.locations,
+            z: variant.z,
+            hovertemplate: variant.hovertemplate,
+        });
+        const layout = Object.assign({}, base.layout, {
+            title: Object.assign({}, base.layout.title, {text: variant.title}),
+            coloraxis: Object.assign({}, base.layout.coloraxis, {
+                colorbar: {title: {text: variant.colorbar}},
+            }),
+        });
+        return {data: [trace], layout: layout};
+    }
+    """,
+    Output('region-map', 'figure'),
     Input('map-dropdown', 'value'),
-    prevent_initial_call='initial_duplicate'
+    Input('map-gpa-weighted', 'value'),
+    State('map-variants', 'data'),
 )
-def generateRegionMap(filter):
-    df = components.generateDataFrameForMap(filter, 'All')
-
-    fig = components.generateMap(df, filter)
-
-    return fig
\ No newline at end of file
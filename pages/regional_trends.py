@@ -1,30 +1,28 @@
 import dash
-from dash import callback, html, dcc, Input, Output, State, ctx
+from dash import callback, clientside_callback, html, dcc, Input, Output, State, ctx
 import dash_bootstrap_components as dbc
 import pandas as pd
 import numpy as np
 import io
 import plotly.express as px
 import plotly.graph_objects as go
-import plotly.figure_factory as ff
 import utils.dashboard_components as components
+from utils import figures, tasks
+from utils.tasks import Task
   
 
-# read in datasets
-results_df = pd.read_csv('data/results_cleaned.csv')
-income_df = pd.read_csv('data/income_cleaned.csv')
-incomeiK_df = pd.read_csv('data/incomeiK_cleaned.csv')
-phd_df = pd.read_csv('data/phd_awarded_cleaned.csv')
-regions_df = pd.read_csv('data/regions.csv')
-
 dash.register_page(
     module= __name__,
     external_stylesheets = [dbc.themes.BOOTSTRAP, 'assets/style.css'],
     path = '/regional_trends'
 )
 
+# sources below this share of the selected regions' income are shown as one "Other sources" node
+SANKEY_OTHER_SHARE = 0.02
+
 layout = dbc.Container(
     [
+        dcc.Store(id='reg-trends-shown'),   # the selection the figures show, for partial updates
         html.Div(
             [
                 dbc.Col([               # master col
@@ -208,7 +206,21 @@ layout = dbc.Container(
     fluid=True,
 )
 
-@callback(
+# the UI-state callbacks only look at the dropdowns, so they run in the browser
+clientside_callback(
+    """
+    function(n_clicks, region, uoa) {
+        const noRegion = region == null || region.length === 0;
+        if (noRegion && uoa == null) {
+            return [true, 'Please select at least ONE(1) Region and a Unit of Assessment.', true, false, true];
+        } else if (noRegion) {
+            return [true, 'Please select at least ONE(1) Region', true, false, true];
+        } else if (uoa == null) {
+            return [true, 'Please select a Unit of Assessment', true, false, true];
+        }
+        return [false, '', false, true, false];  // Hide alert & disabled update dashboard btn when valid
+    }
+    """,
     Output("content-col", 'hidden'),
     Output("reg-ov-alert-msg", "children"), 
     Output("reg-ov-alert-msg", "is_open"),
@@ -219,25 +231,44 @@ layout = dbc.Container(
     State('uoa-dropdown', 'value'),
     prevent_initial_call = True
 )
-def showCardsAndDisableUpdateButton(n_clicks, region, uoa):
-    if (region == None or region == []) and (uoa is None):
-        return True, "Please select at least ONE(1) Region and a Unit of Assessment.", True, False, True
-    elif (region == None or region == []):
-        return True, 'Please select at least ONE(1) Region', True, False, True
-    elif (uoa is None):
-        return True, 'Please select a Unit of Assessment', True, False, True
-    else:
-        return False, "", False, True, False  # Hide alert & disabled update dashboard btn when valid
-    
-@callback(
+
+# Re-enable button when dropdown changes
+clientside_callback(
+    """
+    function() {
+        return false;
+    }
+    """,
     Output("reg-update-dashboard-btn", "disabled", allow_duplicate=True),
     Input("region-dropdown", "value"),
     Input("uoa-dropdown", 'value'),
     Input('gpa-profile-dropdown', 'value'),
     prevent_initial_call=True
 )
-def enableUpdateButton(region, uoa, gpa_profile):
-    return False  # Re-enable button when dropdown changes
+
+def generateFigures(region, uoa, gpa_profile):
+    """
+    Builds the page's seven figures for a selection.
+
+    Parameters:
+    region (list): The selected regions, sorted.
+    uoa (str): The selected UOA, or 'All'.
+    gpa_profile (str): The selected GPA profile.
+
+    Returns:
+    list: The phd & income line charts, GPA distribution, the three scatter plots and the income Sankey.
+    """
+    # independent figures, run as set by FIGURE_CONCURRENCY (see utils/tasks.py);
+    # the distribution and the Sankey are the heaviest
+    return tasks.run([
+        Task('line chart: phd', components.generateRegionLineCharts, 'phd', region, uoa),
+        Task('line chart: income', components.generateRegionLineCharts, 'income', region, uoa),
+        Task('gpa distribution', components.generateRegionGPADist, region, uoa, gpa_profile, cpu_bound=True),
+        Task('scatter: phd', components.generateRegionScatterPlots, 'phd', region, uoa, gpa_profile),
+        Task('scatter: income', components.generateRegionScatterPlots, 'income', region, uoa, gpa_profile),
+        Task('scatter: in-kind', components.generateRegionScatterPlots, 'incomeik', region, uoa, gpa_profile),
+        Task('sankey', components.generateRegionIncomeSankey, region, uoa, SANKEY_OTHER_SHARE, cpu_bound=True),
+    ], name='regional_trends.generateFigures')
 
 @callback(
     Output("phd-trend-graph", "figure"),
@@ -248,22 +279,24 @@ def enableUpdateButton(region, uoa, gpa_profile):
     Output('gpa-inc-ik-scatter-graph', 'figure'),
     Output("inc-sankey-chart", "figure"),
     Output('content-col', 'hidden', allow_duplicate=True),
+    Output('reg-trends-shown', 'data'),
     Input("reg-update-dashboard-btn", "n_clicks"),
     State('region-dropdown', 'value'),
     State('uoa-dropdown', 'value'),
     State('gpa-profile-dropdown', 'value'),
+    State('reg-trends-shown', 'data'),
     prevent_initial_call = True
 )
-def updatePage(n_clicks, region, uoa, gpa_profile):
+def updatePage(n_clicks, region, uoa, gpa_profile, shown=None):
     if region == None or region == [] or uoa is None:
         raise dash.exceptions.PreventUpdate
-    return(
-        components.generateRegionLineCharts('phd', region, uoa),
-        components.generateRegionLineCharts('income', region, uoa),
-        components.generateRegionGPADist(region, uoa, gpa_profile),
-        components.generateRegionScatterPlots('phd', region, uoa, gpa_profile),
-        components.generateRegionScatterPlots('income', region, uoa, gpa_profile),
-        components.generateRegionScatterPlots('incomeik', region, uoa, gpa_profile),
-        components.generateRegionIncomeSankey(region, uoa),
-        False
-    )
\ No newline at end of file
+    # in one order, so that the figures only depend on the set of regions
+    selection = {'region': sorted(region), 'uoa': uoa, 'profile': gpa_profile}
+    new = generateFigures(selection['region'], uoa, gpa_profile)
+
+    if shown is None or (shown['uoa'], shown['profile']) != (uoa, gpa_profile):
+        return (*new, False, selection)
+
+    # only the regions changed: the browser patches the figures it shows
+    old = generateFigures(shown['region'], uoa, gpa_profile)
+    return (*[figures.diff(figures.plain(o), figures.plain(n)) for o, n in zip(old, new)], False, selection)
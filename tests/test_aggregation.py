@@ -0,0 +1,111 @@
+# tests/test_aggregation.py
+import pytest
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils.aggregation import aggregate, group_codes, group_sum, group_mean, group_rank
+from utils.data_store import results_df, income_df
+
+@pytest.fixture
+def sample_df():
+    return pd.DataFrame({
+        'Region': ['B', 'A', 'B', None, 'A', 'C'],
+        'UOA name': ['X', 'Y', 'X', 'X', 'X', 'Y'],
+        'GPA': [3.0, 2.0, np.nan, 1.0, 4.0, np.nan],
+        'Total': [1, 2, 3, 4, 5, 6],
+    })
+
+def assert_matches_pandas(df, by, agg):
+    pd.testing.assert_frame_equal(
+        aggregate(df, by, agg),
+        df.groupby(by, observed=True).agg(agg).reset_index(),
+    )
+
+def test_aggregate_matches_pandas(sample_df):
+    assert_matches_pandas(sample_df, 'Region', {'GPA': 'mean', 'Total': 'sum'})
+    assert_matches_pandas(sample_df, ['UOA name', 'Region'], {'GPA': 'sum', 'Total': 'mean'})
+    assert_matches_pandas(sample_df, 'Region', {'GPA': 'count'})
+
+def test_aggregate_categorical_keys(sample_df):
+    df = sample_df.astype({'Region': pd.CategoricalDtype(['C', 'B', 'A', 'D'])})
+
+    result = aggregate(df, 'Region', {'Total': 'sum'})
+
+    # category order, observed categories only, categorical dtype kept
+    assert list(result['Region']) == ['C', 'B', 'A']
+    assert result['Region'].dtype == df['Region'].dtype
+    assert_matches_pandas(df, 'Region', {'Total': 'sum'})
+
+def test_group_codes_skip_missing_keys(sample_df):
+    codes, groups = group_codes(sample_df, 'Region')
+
+    assert list(codes) == [1, 0, 1, -1, 0, 2]
+    assert list(groups['Region']) == ['A', 'B', 'C']
+
+def test_empty_and_all_missing_groups():
+    codes = np.array([0, 0, 1])
+    values = np.array([np.nan, np.nan, 2.0])
+
+    assert list(group_sum(codes, values, 3)) == [0.0, 2.0, 0.0]
+    assert np.isnan(group_mean(codes, values, 3)[[0, 2]]).all()
+
+def test_aggregate_no_keys(sample_df):
+    result = aggregate(sample_df, [], {'Total': 'sum', 'GPA': 'mean'})
+
+    assert len(result) == 1
+    assert result['Total'].iloc[0] == 21
+    assert result['GPA'].iloc[0] == pytest.approx(2.5)
+
+@pytest.mark.parametrize('df, by, agg', [
+    (results_df, 'Institution name', {'GPA': 'mean', 'FTE staff': 'sum'}),
+    (results_df, ['Region', 'UOA name', 'Profile'], {'GPA': 'mean'}),
+    (income_df, ['UOA name', 'Income source'], {'2013-2020 (total)': 'sum'}),
+], ids=['institution', 'region-uoa-profile', 'uoa-source'])
+def test_aggregate_store_frames(df, by, agg):
+    pd.testing.assert_frame_equal(
+        aggregate(df, by, agg),
+        df.groupby(by, observed=True).agg(agg).reset_index(),
+        check_exact=False,
+    )
+
+@pytest.mark.parametrize('method', ['min', 'max'])
+def test_group_rank_matches_pandas(method):
+    df = pd.DataFrame({
+        'Region': ['A', 'A', 'B', 'A', 'B', 'A', None],
+        'GPA': [3.0, 2.0, 1.0, 3.0, np.nan, np.nan, 4.0],
+    })
+    codes, groups = group_codes(df, 'Region')
+
+    ranks = group_rank(codes, df['GPA'].to_numpy(), len(groups), method=method)
+    expected = df.groupby('Region').rank(method=method, ascending=False, na_option='bottom')['GPA']
+
+    assert ranks.tolist() == expected.fillna(0).astype(int).tolist()
+
+def test_weighted_mean():
+    df = pd.DataFrame({
+        'Region': ['A', 'A', 'B', 'B'],
+        'GPA': [3.0, 2.0, 4.0, np.nan],
+        'FTE staff': [10.0, 30.0, 5.0, 50.0],
+    })
+
+    result = aggregate(df, 'Region', {'GPA': 'mean'}, weights='FTE staff')
+
+    # sum(FTE * GPA) / sum(FTE), ignoring rows without a GPA
+    assert list(result['GPA']) == pytest.approx([(30.0 + 60.0) / 40.0, 4.0])
+
+def test_weighted_gpa_is_gpa_of_weighted_profile():
+    overall = results_df[results_df['Profile'] == 'Overall']
+    weighted = aggregate(overall, 'Region', {'GPA': 'mean'}, weights='FTE staff')
+
+    # the GPA of the FTE-weighted star profile of each region
+    stars = overall[['4*', '3*', '2*', '1*']].mul(overall['FTE staff'], axis=0)
+    stars = stars.groupby(overall['Region'], observed=True).sum()
+    fte = overall.groupby('Region', observed=True)['FTE staff'].sum()
+    profile_gpa = (4 * stars['4*'] + 3 * stars['3*'] + 2 * stars['2*'] + stars['1*']) / (100 * fte)
+
+    assert list(weighted['GPA']) == pytest.approx(list(profile_gpa))
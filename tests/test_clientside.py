@@ -0,0 +1,125 @@
+# tests/test_clientside.py
+import pytest
+import base64
+import json
+import numpy as np
+import os
+import shutil
+import subprocess
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import app          # registers the pages' callbacks
+from plotly.io.json import to_json_plotly
+import utils.dashboard_components as components
+from dash._callback import GLOBAL_CALLBACK_LIST, GLOBAL_INLINE_SCRIPTS
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason='needs Node.js to run the callbacks')
+
+UNI = 'University of Oxford'
+
+# the first app to serve a request takes the registered callbacks & their scripts
+# (other tests create apps of their own), so they are kept as collected
+CALLBACKS = GLOBAL_CALLBACK_LIST + app.app._callback_list
+SCRIPTS = GLOBAL_INLINE_SCRIPTS + app.app._inline_scripts
+
+def run_clientside(output, calls, duplicate=False):
+    """
+    Runs the clientside callback of an output (e.g. 'sidebar-container.style';
+    with duplicate, the callback setting it with allow_duplicate) in Node, as
+    the browser would, once per argument list in calls.
+    """
+    def outputs(callback):
+        # 'id.prop', '..id.prop...id.prop..', and 'id.prop@hash' when allow_duplicate
+        return [o.split('@')[0] for o in callback['output'].strip('.').split('...') if ('@' in o) == duplicate]
+
+    callback = next(c for c in CALLBACKS if output in outputs(c) and c.get('clientside_function'))
+    function = callback['clientside_function']
+    script = '\n'.join([
+        'var window = {};',
+        *SCRIPTS,
+        f"const f = window.dash_clientside[{json.dumps(function['namespace'])}][{json.dumps(function['function_name'])}];",
+        f"console.log(JSON.stringify({json.dumps(calls)}.map(args => f(...args))));",
+    ])
+    result = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True)
+    return [tuple(r) if isinstance(r, list) else r for r in json.loads(result.stdout)]
+
+def test_sidebar_is_hidden_on_home_only():
+    assert run_clientside('sidebar-container.style', [['/'], ['/multi_level_view'], [None]]) == [
+        {'display': 'none'}, {'display': 'block'}, {'display': 'block'},
+    ]
+
+def test_dropdowns_by_view():
+    shown, hidden = {'display': 'block'}, {'display': 'none'}
+
+    assert run_clientside('institution-col.style', [[None], ['ins'], ['reg'], ['nat']]) == [
+        (hidden, hidden, hidden), (shown, hidden, shown), (hidden, shown, shown), (hidden, hidden, shown),
+    ]
+
+@pytest.mark.parametrize('output, args', [
+    ('update-dashboard-btn.disabled', ['ins', 'All', UNI, None, False]),
+    ('reg-update-dashboard-btn.disabled', [['London'], 'All', 'Overall']),
+])
+def test_changed_selection_enables_update(output, args):
+    assert run_clientside(output, [args], duplicate=True) == [False]
+
+def test_multi_level_view_selection_alerts():
+    calls = [
+        [1, None, None, None, None],
+        [1, 'ins', None, None, None],
+        [1, 'ins', None, UNI, None],
+        [1, 'ins', 'All', None, None],
+        [1, 'reg', None, None, None],
+        [1, 'reg', 'All', None, None],
+        [1, 'reg', None, None, 'London'],
+        [1, 'nat', None, None, None],
+        [1, 'ins', 'All', UNI, None],
+        [1, 'nat', 'All', None, None],
+    ]
+    messages = [
+        'Please select a View',
+        'Please make a selection for Institution and Unit of Assessment.',
+        'Please select a Unit of Assessment.',
+        'Please select an Institution.',
+        'Please make a selection for Region and Unit of Assessment.',
+        'Please select a Region.',
+        'Please select a Unit of Assessment.',
+        'Please select a Unit of Assessment.',
+    ]
+
+    assert run_clientside('left-col.hidden', calls) == [
+        *[(True, True, message, True, True, True) for message in messages],
+        (False, False, '', False, False, False),
+        (False, False, '', False, False, False),
+    ]
+
+def test_regional_trends_selection_alerts():
+    calls = [[1, None, None], [1, [], 'All'], [1, ['London'], None], [1, ['London'], 'All']]
+
+    assert run_clientside('content-col.hidden', calls) == [
+        (True, 'Please select at least ONE(1) Region and a Unit of Assessment.', True, False, True),
+        (True, 'Please select at least ONE(1) Region', True, False, True),
+        (True, 'Please select a Unit of Assessment', True, False, True),
+        (False, '', False, True, False),
+    ]
+
+def decoded(values):
+    # plotly's typed arrays ({'dtype', 'bdata'}) as plain lists
+    if isinstance(values, dict):
+        return np.frombuffer(base64.b64decode(values['bdata']), dtype=values['dtype']).tolist()
+    return list(values)
+
+@pytest.mark.parametrize('profile', ['Outputs', 'Impact', 'Environment'])
+def test_quality_pie_switches_profile(profile):
+    uoa = 'Clinical Medicine'
+    drawn = json.loads(to_json_plotly(components.generateQualityPieChart(UNI, uoa, 'Overall')))
+    expected = json.loads(to_json_plotly(components.generateQualityPieChart(UNI, uoa, profile)))
+
+    [switched] = run_clientside('submissions-quality.figure', [[profile, components.generateQualityProfiles(UNI, uoa), drawn]],
+                                duplicate=True)
+
+    for fig in [switched, expected]:
+        fig['data'][0]['values'] = decoded(fig['data'][0]['values'])
+    assert switched == expected
@@ -169,50 +169,50 @@ def test_generateIncomeChart_by_institution(mock_income_df):
         # call with different params
         chart = generateIncomeChart(type='ins', ins='Institution A', uoa='All', reg='')
 
-        # chart type is plotly.go.Figure
-        assert isinstance(chart, go.Figure)
+        # chart is a plain figure dict
+        assert isinstance(chart, dict)
 
         # chart title
-        assert chart.layout.title.text == "Research Income"
+        assert chart['layout']['title']['text'] == "Research Income"
         
         # x-axis title 
-        assert chart.layout.xaxis.title.text == "Year"
+        assert chart['layout']['xaxis']['title']['text'] == "Year"
         
         # y-axis title 
-        assert chart.layout.yaxis.title.text == "Amount (£)"
+        assert chart['layout']['yaxis']['title']['text'] == "Amount (£)"
 
         # line data matches expected mock data
-        assert chart.data[0]['type'] == 'scatter'
-        assert chart.data[0]['mode'] == 'lines+markers'
-        assert chart.data[0]['hovertemplate'] == "<b>%{x}</b><br>Value: £%{y:,}<extra></extra>"
+        assert chart['data'][0]['type'] == 'scatter'
+        assert chart['data'][0]['mode'] == 'lines+markers'
+        assert chart['data'][0]['hovertemplate'] == "<b>%{x}</b><br>Value: £%{y:,}<extra></extra>"
 
 def test_generateIncomeChart_by_region(mock_income_df):
     with patch('utils.dashboard_components.income_df', mock_income_df):
         chart = generateIncomeChart(type='reg', ins='', uoa='UOA 1', reg='Region 1')
 
-        # chart type is plotly.go.Figure
-        assert isinstance(chart, go.Figure)
+        # chart is a plain figure dict
+        assert isinstance(chart, dict)
         
         # x,y axis titles
-        assert chart.layout.xaxis.title.text == "Year"
-        assert chart.layout.yaxis.title.text == "Amount (£)"
+        assert chart['layout']['xaxis']['title']['text'] == "Year"
+        assert chart['layout']['yaxis']['title']['text'] == "Amount (£)"
         
         # check data plotted
-        assert len(chart.data) > 0  # make sure chart has data
+        assert len(chart['data']) > 0  # make sure chart has data
 
 def test_generateIncomeChart_by_type(mock_income_df):
     with patch('utils.dashboard_components.income_df', mock_income_df):
         chart = generateIncomeChart(type='other', ins='', uoa='UOA 1', reg='Region 1')
 
-        # chart type is plotly.go.Figure
-        assert isinstance(chart, go.Figure)
+        # chart is a plain figure dict
+        assert isinstance(chart, dict)
         
         # x,y axis titles
-        assert chart.layout.xaxis.title.text == "Year"
-        assert chart.layout.yaxis.title.text == "Amount (£)"
+        assert chart['layout']['xaxis']['title']['text'] == "Year"
+        assert chart['layout']['yaxis']['title']['text'] == "Amount (£)"
         
         # check data plotted
-        assert len(chart.data) > 0  # make sure chart has data
+        assert len(chart['data']) > 0  # make sure chart has data
 
 # mock phd_df
 @pytest.fixture
@@ -237,30 +237,30 @@ def test_generatePhdChartAndKPICard_by_institution(mock_phd_df):
         # call function with different params
         chart, kpi_card = generatePhdChartAndKPICard(type='ins', ins='Institution A', uoa='All', reg='')
 
-        assert isinstance(chart, go.Figure)
+        assert isinstance(chart, dict)
 
         # chart layout
-        assert chart.layout.title.text == "PhDs Awarded"
-        assert chart.layout.xaxis.title.text == "Year"
-        assert chart.layout.yaxis.title.text == "PhDs awarded"
+        assert chart['layout']['title']['text'] == "PhDs Awarded"
+        assert chart['layout']['xaxis']['title']['text'] == "Year"
+        assert chart['layout']['yaxis']['title']['text'] == "PhDs awarded"
         
         # chart data 
-        assert len(chart.data) > 0  # make sure chart contains data
+        assert len(chart['data']) > 0  # make sure chart contains data
 
 def test_generatePhdChartAndKPICard_by_region(mock_phd_df):
     with patch('utils.dashboard_components.phd_df', mock_phd_df):
         # call function with different params
         chart, kpi_card = generatePhdChartAndKPICard(type='reg', ins='', uoa='UOA 1', reg='Region 1')
 
-        assert isinstance(chart, go.Figure)
+        assert isinstance(chart, dict)
 
         # chart layout
-        assert chart.layout.title.text == "PhDs Awarded"
-        assert chart.layout.xaxis.title.text == "Year"
-        assert chart.layout.yaxis.title.text == "PhDs awarded"
+        assert chart['layout']['title']['text'] == "PhDs Awarded"
+        assert chart['layout']['xaxis']['title']['text'] == "Year"
+        assert chart['layout']['yaxis']['title']['text'] == "PhDs awarded"
         
         # chart data 
-        assert len(chart.data) > 0  # make sure chart contains data
+        assert len(chart['data']) > 0  # make sure chart contains data
 
 def test_generateKPICard():
     # sample input
@@ -280,3 +280,40 @@ def test_generateKPICard():
     assert len(h1_elements) == 2  # 2 H1 tags
     assert h1_elements[0].children == title  # 1) title
     assert h1_elements[1].children == value  # 2) value
+
+def sankey_of(regions, other_share=None):
+    return generateRegionIncomeSankey.__wrapped__(regions, 'All', other_share).data[0]
+
+def test_sankey_is_independent_of_region_order():
+    sankey = sankey_of(['Wales', 'London', 'Scotland'])
+
+    assert sankey.to_json() == sankey_of(['Scotland', 'Wales', 'London']).to_json()
+    # regions come last, by name, after the sources and categories
+    assert list(sankey.node.label[-3:]) == ['London', 'Scotland', 'Wales']
+
+def test_sankey_flows_add_up():
+    regions = ['Wales', 'London']
+    sankey = sankey_of(regions)
+    sources = data_partition.source_rows(income_df)
+    total = sources[sources['Region'].isin(regions)]['2013-2020 (total)'].sum()
+    source, target, value = (np.asarray(a) for a in (sankey.link.source, sankey.link.target, sankey.link.value))
+    into_regions = np.isin(np.asarray(sankey.node.label)[target], regions)
+
+    # every pound flows from a source to a category, then from the category to a region
+    assert value[~into_regions].sum() == pytest.approx(total)
+    assert value[into_regions].sum() == pytest.approx(total)
+    assert len(set(zip(source, target))) == len(source)
+
+def test_sankey_collapses_small_sources():
+    full = sankey_of(['Wales'])
+    shares = {}
+    for s, t, v in zip(full.link.source, full.link.target, full.link.value):
+        if full.node.label[t] in INCOME_CATEGORIES:
+            shares[s] = v
+    cut = sorted(shares.values())[3] / sum(shares.values())
+
+    sankey = sankey_of(['Wales'], other_share=cut)
+
+    assert OTHER_SOURCES in sankey.node.label
+    assert len(sankey.node.label) == len(full.node.label) - 3 + 1
+    assert sum(sankey.link.value) == pytest.approx(sum(full.link.value))
@@ -0,0 +1,68 @@
+# tests/test_data_cache.py
+import pytest
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import data_cache
+
+@pytest.fixture
+def csv_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_cache, 'CACHE_DIR', str(tmp_path / 'compiled'))
+    path = tmp_path / 'sample.csv'
+    pd.DataFrame({
+        'Institution name': ['Uni A', 'Uni B', None],
+        'UOA number': [1, 2, 3],
+        'GPA': [3.5, np.nan, 2.1],
+    }).to_csv(path, index=False)
+    return str(path)
+
+def test_bundle_round_trip(csv_file):
+    expected = pd.read_csv(csv_file)
+
+    first = data_cache.read_csv_cached(csv_file)          # builds the bundle
+    bundle = data_cache.bundle_path(csv_file, data_cache.source_hash(csv_file))
+    assert os.path.isdir(bundle)
+
+    second = data_cache.read_csv_cached(csv_file)         # loads the bundle
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+    pd.testing.assert_frame_equal(data_cache.read_bundle(bundle), expected)
+
+def test_bundle_invalidated_when_csv_changes(csv_file):
+    data_cache.read_csv_cached(csv_file)
+    old_bundle = data_cache.bundle_path(csv_file, data_cache.source_hash(csv_file))
+
+    with open(csv_file, 'a') as f:
+        f.write('Uni D,4,3.9\n')
+
+    df = data_cache.read_csv_cached(csv_file)
+    new_bundle = data_cache.bundle_path(csv_file, data_cache.source_hash(csv_file))
+
+    assert len(df) == 4
+    assert new_bundle != old_bundle
+    assert os.path.isdir(new_bundle)
+    assert not os.path.exists(old_bundle)           # stale bundle removed
+
+def test_corrupt_bundle_falls_back_to_csv(csv_file):
+    data_cache.read_csv_cached(csv_file)
+    bundle = data_cache.bundle_path(csv_file, data_cache.source_hash(csv_file))
+    os.remove(os.path.join(bundle, '0.npy'))
+
+    pd.testing.assert_frame_equal(data_cache.read_csv_cached(csv_file), pd.read_csv(csv_file))
+    # the bundle is rebuilt
+    pd.testing.assert_frame_equal(data_cache.read_bundle(bundle), pd.read_csv(csv_file))
+
+def test_read_bundle_as_categorical(csv_file):
+    data_cache.read_csv_cached(csv_file)
+    bundle = data_cache.bundle_path(csv_file, data_cache.source_hash(csv_file))
+
+    df = data_cache.read_bundle(bundle, categorical=['Institution name'])
+
+    assert isinstance(df['Institution name'].dtype, pd.CategoricalDtype)
+    assert df['Institution name'].tolist()[:2] == ['Uni A', 'Uni B']
+    assert pd.isna(df['Institution name'].iloc[2])
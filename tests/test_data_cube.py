@@ -0,0 +1,110 @@
+# tests/test_data_cube.py
+import pytest
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import data_cube
+from utils.data_store import results_df, income_df, phd_df
+
+UNI = 'University of Oxford'
+UOA = 'Clinical Medicine'
+
+@pytest.fixture
+def mock_phd_df():
+    return pd.DataFrame({
+        'Institution name': ['Institution A', 'Institution A', 'Institution B'],
+        'UOA name': ['UOA 1', 'UOA 2', 'UOA 1'],
+        'Region': ['Region 1', 'Region 1', 'Region 2'],
+        **{year: [1, 2, 4] for year in ['2013', '2014', '2015', '2016', '2017', '2018', '2019']},
+        'Total': [7, 14, 28],
+    })
+
+def test_scope_of():
+    assert data_cube.scope_of('ins', UNI, 'London') == ('ins', UNI)
+    assert data_cube.scope_of('reg', UNI, 'London') == ('reg', 'London')
+    assert data_cube.scope_of('other', UNI, 'London') == ('nat', None)
+
+def test_lookup_mock_frame(mock_phd_df):
+    assert data_cube.lookup(mock_phd_df, 'phd', 'ins', 'Institution A', 'All')['Total'] == 21
+    assert data_cube.lookup(mock_phd_df, 'phd', 'ins', 'Institution A', 'UOA 2')['Total'] == 14
+    assert data_cube.lookup(mock_phd_df, 'phd', 'reg', 'Region 1', 'UOA 1')['Total'] == 7
+    assert data_cube.lookup(mock_phd_df, 'phd', 'nat', None, 'UOA 1')['Total'] == 35
+    assert data_cube.lookup(mock_phd_df, 'phd', 'nat', None, 'All')['Total'] == 49
+
+    # a scope with no rows sums to zero
+    assert data_cube.lookup(mock_phd_df, 'phd', 'ins', 'Institution B', 'UOA 2')['Total'] == 0
+
+def test_cube_follows_frame(mock_phd_df):
+    cube = data_cube.cube_for(mock_phd_df, 'phd')
+    assert data_cube.cube_for(mock_phd_df, 'phd') is cube
+
+    changed = mock_phd_df.assign(Total=[0, 0, 0])
+    assert data_cube.lookup(changed, 'phd', 'nat', None, 'All')['Total'] == 0
+
+def test_gpa_matches_raw_rows():
+    for view, scope, rows in [
+        ('ins', UNI, results_df[(results_df['Institution name'] == UNI) & (results_df['UOA name'] == UOA)]),
+        ('reg', 'London', results_df[(results_df['Region'] == 'London') & (results_df['UOA name'] == UOA)]),
+        ('nat', None, results_df[results_df['UOA name'] == UOA]),
+    ]:
+        gpa = data_cube.lookup(results_df, 'gpa', view, scope, UOA)['GPA']
+        for profile in ['Overall', 'Outputs', 'Impact', 'Environment']:
+            assert gpa[profile] == pytest.approx(rows.loc[rows['Profile'] == profile, 'GPA'].mean())
+
+def test_sums_match_raw_rows():
+    rows = income_df[(income_df['Region'] == 'Scotland') & (income_df['Income source'] == 'Total income')]
+    income = data_cube.lookup(income_df, 'income', 'reg', 'Scotland', 'All')
+    assert income['2013-14'] == pytest.approx(rows['2013-14'].sum())
+
+    rows = phd_df[phd_df['Institution name'] == UNI]
+    assert data_cube.lookup(phd_df, 'phd', 'ins', UNI, 'All')['Total'] == rows['Total'].sum()
+
+def test_income_by_source_excludes_total():
+    sources = data_cube.lookup(income_df, 'income_by_source', 'ins', UNI, 'All')
+
+    assert 'Total income' not in sources.index
+    assert sources.index.name == 'Income source'
+
+def test_rankings_match_sorted_means():
+    overall = results_df[(results_df['Profile'] == 'Overall') & (results_df['UOA name'] == UOA)]
+    means = overall.groupby('Institution name', observed=True)['GPA'].mean().sort_values(ascending=False)
+    national, regional = data_cube.rankings_for(results_df).get(UNI, UOA)
+
+    assert national == list(means.index).index(UNI) + 1
+    assert 1 <= regional <= national
+    assert np.isfinite(means[UNI])
+
+def test_fte_weighted_gpa_and_rankings():
+    rows = results_df[(results_df['Region'] == 'London') & (results_df['UOA name'] == UOA)]
+    gpa = data_cube.lookup(results_df, 'gpa_fte', 'reg', 'London', UOA)['GPA']
+    for profile in ['Overall', 'Outputs', 'Impact', 'Environment']:
+        profile_rows = rows[rows['Profile'] == profile]
+        assert gpa[profile] == pytest.approx(np.average(profile_rows['GPA'], weights=profile_rows['FTE staff']))
+
+    overall = results_df[(results_df['Profile'] == 'Overall') & (results_df['UOA name'] == UOA)]
+    means = overall.groupby('Institution name', observed=True).apply(
+        lambda g: np.average(g['GPA'], weights=g['FTE staff']), include_groups=False
+    ).sort_values(ascending=False)
+    national, _ = data_cube.rankings_for(results_df, weighted=True).get(UNI, UOA)
+    assert national == list(means.index).index(UNI) + 1
+
+@pytest.mark.parametrize('uoa, profile', [('All', 'Overall'), (UOA, 'Overall'), (UOA, 'Impact')])
+def test_ranks_count_better_institutions(uoa, profile):
+    rows = results_df[results_df['Profile'] == profile]
+    if uoa != 'All':
+        rows = rows[rows['UOA name'] == uoa]
+    means = rows.groupby('Institution name', observed=True)['GPA'].mean()
+    region_of = rows.groupby('Institution name', observed=True)['Region'].first()
+    rankings = data_cube.rankings_for(results_df)
+
+    for uni, gpa in means.items():
+        national, regional = rankings.get(uni, uoa, profile)
+        same_region = means[region_of == region_of[uni]]
+        # tied institutions share the best rank of their tie
+        assert national == (means > gpa + 1e-12).sum() + 1
+        assert regional == (same_region > gpa + 1e-12).sum() + 1
@@ -0,0 +1,65 @@
+# tests/test_data_index.py
+import pytest
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import data_index
+from utils.data_index import select
+from utils.data_store import results_df, income_df, phd_df
+
+@pytest.fixture
+def unsorted_df():
+    return pd.DataFrame({
+        'Institution name': ['B', 'A', 'B', 'A', np.nan, 'A'],
+        'UOA name': ['X', 'Y', 'X', 'X', 'X', 'Y'],
+        'Profile': ['Overall', 'Overall', 'Outputs', 'Overall', 'Overall', 'Outputs'],
+        'GPA': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    })
+
+def test_select_unsorted_frame(unsorted_df):
+    assert sorted(select(unsorted_df, 'A')['GPA']) == [2.0, 4.0, 6.0]
+    assert sorted(select(unsorted_df, 'A', 'Y')['GPA']) == [2.0, 6.0]
+    assert list(select(unsorted_df, 'A', 'Y', 'Overall')['GPA']) == [2.0]
+    assert list(select(unsorted_df, 'B', 'All')['GPA']) == [3.0, 1.0]
+
+def test_select_missing_values(unsorted_df):
+    assert select(unsorted_df, 'C').empty
+    assert select(unsorted_df, 'A', 'Z').empty
+    assert select(unsorted_df, None).empty
+
+    with pytest.raises(ValueError):
+        select(unsorted_df, 'All', 'X')
+
+def test_sort_frame_places_missing_last(unsorted_df):
+    df = data_index.sort_frame(unsorted_df)
+
+    assert list(df['Institution name'].iloc[:-1]) == ['A', 'A', 'A', 'B', 'B']
+    assert pd.isna(df['Institution name'].iloc[-1])
+
+def test_select_matches_masks_on_store_frames():
+    uni = results_df['Institution name'].iloc[len(results_df) // 2]
+    uoa = results_df.loc[results_df['Institution name'] == uni, 'UOA name'].iloc[0]
+
+    expected = results_df[
+        (results_df['Institution name'] == uni) &
+        (results_df['UOA name'] == uoa) &
+        (results_df['Profile'] == 'Overall')
+    ]
+    pd.testing.assert_frame_equal(select(results_df, uni, uoa, 'Overall'), expected)
+
+    expected = income_df[(income_df['Institution name'] == uni) & (income_df['UOA name'] == uoa)]
+    pd.testing.assert_frame_equal(select(income_df, uni, uoa), expected)
+
+    expected = phd_df[phd_df['Institution name'] == uni]
+    pd.testing.assert_frame_equal(select(phd_df, uni, 'All'), expected)
+
+def test_store_frames_are_indexed_without_copy():
+    index = data_index.index_for(results_df)
+
+    assert index.frame is results_df
+    assert index is data_index.index_for(results_df)
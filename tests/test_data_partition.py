@@ -0,0 +1,52 @@
+# tests/test_data_partition.py
+import pytest
+import pandas as pd
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import data_partition
+from utils.data_store import income_df, incomeiK_df
+
+@pytest.fixture
+def mock_income_df():
+    return pd.DataFrame({
+        'Institution name': ['Institution A', 'Institution A', 'Institution A', 'Institution B', 'Institution B'],
+        'UOA name': ['UOA 1', 'UOA 1', 'UOA 1', 'UOA 1', 'UOA 1'],
+        'Income source': ['UK Sources', 'Total income', 'EU Sources', 'Total income', 'UK Sources'],
+        'UKPRN': [1, 1, 1, 2, 2],
+        '2013-14': [100.0, 300.0, 200.0, 50.0, 50.0],
+    })
+
+def test_split_keeps_row_order(mock_income_df):
+    parts = data_partition.split(mock_income_df)
+
+    assert list(parts.total.index) == [1, 3]
+    assert list(parts.sources.index) == [0, 2, 4]
+    assert data_partition.split(mock_income_df) is parts
+
+def test_check_finds_mismatches(mock_income_df):
+    assert data_partition.check(mock_income_df).empty
+
+    broken = mock_income_df.assign(**{'2013-14': [100.0, 300.0, 200.0, 60.0, 50.0]})
+    mismatches = data_partition.check(broken)
+
+    assert list(mismatches.index) == [('Institution B', 'UOA 1')]
+    assert mismatches.loc[('Institution B', 'UOA 1'), '2013-14'] == 10.0
+    # identifiers are not amounts
+    assert 'UKPRN' not in mismatches.columns
+
+@pytest.mark.parametrize('df', [income_df, incomeiK_df], ids=['income', 'incomeiK'])
+def test_store_partitions(df):
+    total = data_partition.total_rows(df)
+    sources = data_partition.source_rows(df)
+
+    pd.testing.assert_frame_equal(total, df[df['Income source'] == 'Total income'])
+    pd.testing.assert_frame_equal(sources, df[df['Income source'] != 'Total income'])
+    assert data_partition.check(df).empty
+
+    # partitions are shared like the frames they come from
+    with pytest.raises(ValueError):
+        sources.loc[sources.index[0], '2013-2020 (total)'] = 0.0
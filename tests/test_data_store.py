@@ -0,0 +1,66 @@
+# tests/test_data_store.py
+import pytest
+import pandas as pd
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import utils.data_store as data_store
+import utils.dashboard_components as components
+
+def test_components_share_store_frames():
+    # components must use the store's frames, not their own copies
+    assert components.results_df is data_store.results_df
+    assert components.income_df is data_store.income_df
+    assert components.incomeiK_df is data_store.incomeiK_df
+    assert components.phd_df is data_store.phd_df
+    assert components.regions_mapping is data_store.regions_mapping
+
+def test_store_frames_are_read_only():
+    with pytest.raises(ValueError):
+        data_store.results_df.loc[0, 'GPA'] = 0.0
+
+    # derived frames are still writeable
+    df = data_store.results_df[data_store.results_df['Profile'] == 'Overall'].copy()
+    df.loc[df.index[0], 'GPA'] = 0.0
+    assert df.loc[df.index[0], 'GPA'] == 0.0
+
+def test_freeze_keeps_values():
+    df = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+    frozen = data_store.freeze(df)
+
+    pd.testing.assert_frame_equal(frozen, df)
+    assert not frozen['a'].to_numpy().flags.writeable
+
+def test_report():
+    stats = data_store.report()
+
+    assert set(stats['datasets']) == set(data_store.DATASETS)
+    for s in stats['datasets'].values():
+        assert s['rows'] > 0
+        assert s['load_seconds'] >= 0
+        assert s['memory_bytes'] > 0
+    assert stats['total_memory_bytes'] == sum(s['memory_bytes'] for s in stats['datasets'].values())
+
+def test_dimensions_share_one_vocabulary():
+    frames = [data_store.results_df, data_store.income_df, data_store.incomeiK_df, data_store.phd_df, data_store.regions_mapping]
+
+    for col in ['Institution name', 'UOA name', 'Region']:
+        dtypes = [df[col].dtype for df in frames if col in df.columns]
+        assert all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes)
+        # same categories in the same order, so codes are comparable across datasets
+        assert all(list(dtype.categories) == list(dtypes[0].categories) for dtype in dtypes)
+        assert list(dtypes[0].categories) == sorted(dtypes[0].categories)
+
+def test_encode_dimensions_recodes_to_shared_order():
+    dtypes = {'Region': pd.CategoricalDtype(['London', 'Scotland', 'Wales'])}
+    # categories in order of appearance, as loaded from a compiled bundle
+    df = pd.DataFrame({'Region': pd.Categorical(['Wales', 'London'], categories=['Wales', 'London'])})
+
+    encoded = data_store.encode_dimensions(df, dtypes)
+
+    assert list(encoded['Region'].cat.categories) == ['London', 'Scotland', 'Wales']
+    assert list(encoded['Region'].cat.codes) == [2, 0]
+    assert list(encoded['Region']) == ['Wales', 'London']
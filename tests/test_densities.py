@@ -0,0 +1,45 @@
+# tests/test_densities.py
+import pytest
+import numpy as np
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import densities
+from utils.data_store import results_df
+from utils.aggregation import aggregate
+
+REGIONS = ['London', 'Scotland', 'Wales']
+
+@pytest.mark.parametrize('profile', ['Overall', 'Impact'])
+def test_curves_match_create_distplot(profile):
+    ff = pytest.importorskip('plotly.figure_factory')
+    pytest.importorskip('scipy')
+    df = results_df[results_df['Profile'] == profile]
+    data = [aggregate(df[df['Region'] == r], 'UOA name', {'GPA': 'mean'})['GPA'] for r in REGIONS]
+    expected = ff.create_distplot(data, REGIONS, bin_size=.1, curve_type='normal', show_hist=False, show_rug=False)
+
+    traces = densities.densities_for(results_df).traces(REGIONS, profile)
+
+    assert len(traces) == len(expected.data)
+    for trace, old in zip(traces, expected.data):
+        assert trace['name'] == old.name and trace['marker']['color'] == old.marker.color
+        np.testing.assert_allclose(trace['x'], old.x, rtol=1e-12)
+        np.testing.assert_allclose(trace['y'], old.y, rtol=1e-12)
+
+def test_curves_are_precomputed():
+    store = densities.densities_for(results_df)
+
+    assert store is densities.densities_for(results_df)
+    assert len(store.curves) == 4 * results_df['Region'].nunique()
+    # a frame other than the store's gets its own curves
+    assert densities.densities_for(results_df[results_df['Region'] == 'Wales']) is not store
+
+def test_scipy_is_not_imported_at_startup():
+    import subprocess
+    code = "import sys, app; print('scipy' in sys.modules, 'plotly.figure_factory' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=project_root, capture_output=True, text=True, check=True)
+
+    assert out.stdout.split() == ['False', 'False']
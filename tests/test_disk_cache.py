@@ -0,0 +1,87 @@
+# tests/test_disk_cache.py
+import pytest
+import os
+import sys
+import time
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import disk_cache, memo
+from utils.disk_cache import DiskCache
+
+KEY = ('v1', 'generateRegionIncomeSankey', (('London', 'Wales'), 'All'))
+
+def test_shared_between_instances(tmp_path):
+    worker_a = DiskCache(str(tmp_path))
+    worker_b = DiskCache(str(tmp_path))
+    value = (memo.FigureJSON(b'{"data":[]}'), 'card')
+
+    worker_a.put(KEY, value)
+    stored = worker_b.get(KEY)
+
+    assert stored[0].json == value[0].json and stored[1] == 'card'
+    assert worker_b.get(('v2',) + KEY[1:]) is None
+    # written atomically - no temporary files left behind
+    assert [name.endswith(disk_cache.SUFFIX) for name in os.listdir(tmp_path)] == [True]
+
+def test_ttl(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=60)
+    cache.put(KEY, 1)
+    (path,) = [os.path.join(tmp_path, name) for name in os.listdir(tmp_path)]
+
+    old = time.time() - 120
+    os.utime(path, (old, old))
+
+    assert cache.get(KEY, 'missing') == 'missing'
+    assert not os.path.exists(path)
+
+def test_size_eviction_removes_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=2900)
+    for i in range(3):
+        cache.put(('key', i), b'x' * 1000)
+        path = cache._file(('key', i))
+        os.utime(path, (time.time() - 100 + i, time.time()))
+    cache.get(('key', 0))                   # now the most recently used
+
+    cache.evict()
+
+    assert cache.get(('key', 1)) is None
+    assert cache.get(('key', 0)) is not None and cache.get(('key', 2)) is not None
+    assert cache.evictions == 1
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    with open(cache._file(KEY), 'wb') as f:
+        f.write(b'not a pickle')
+
+    assert cache.get(KEY) is None
+    assert not os.path.exists(cache._file(KEY))
+
+def test_memoize_reads_other_workers_results(tmp_path):
+    calls = []
+
+    @memo.memoize(lambda: 'v1')
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    with patch.object(memo, 'disk', DiskCache(str(tmp_path))):
+        assert square(3) == 9
+        memo.cache.clear()                  # as seen from another worker
+        assert square(3) == 9
+
+    assert calls == [3]
+    assert memo.counters['test_memoize_reads_other_workers_results.<locals>.square']['disk_hits'] == 1
+
+def test_from_environment(tmp_path):
+    with patch.dict(os.environ, {}, clear=True):
+        assert disk_cache.from_environment() is None
+
+    env = {'FIGURE_CACHE_DIR': str(tmp_path / 'figures'), 'FIGURE_CACHE_TTL': '30', 'FIGURE_CACHE_MAX_MB': '1'}
+    with patch.dict(os.environ, env):
+        cache = disk_cache.from_environment()
+
+    assert os.path.isdir(cache.path)
+    assert cache.ttl == 30 and cache.max_bytes == 1 << 20
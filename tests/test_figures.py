@@ -0,0 +1,142 @@
+# tests/test_figures.py
+import pytest
+import dash
+import json
+import numpy as np
+import pandas as pd
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import plotly.express as px
+from plotly.io.json import to_json_plotly
+from utils import figures
+from utils.aggregation import aggregate
+from utils.data_store import results_df, income_df, regions_mapping
+
+REGIONS = ['Wales', 'London', 'Scotland']
+
+def rendered(fig):
+    # what dcc.Graph receives
+    return json.loads(to_json_plotly(fig))
+
+def test_series_line_matches_px():
+    series = pd.Series([1.5, 2.0, 2.5], index=["13'-14'", "14'-15'", "15'-20' (avg)"])
+
+    assert rendered(figures.line(series.index, series.to_numpy())) == rendered(px.line(series, markers=True))
+
+def test_grouped_line_matches_px():
+    df = pd.DataFrame({
+        'Year': np.tile([2013, 2014, 2015], 3),
+        'Value': np.arange(9, dtype=np.float64),
+        'Region': np.repeat(REGIONS, 3),
+    })
+    fig = figures.line(df['Year'], df['Value'], color=df['Region'], labels={'x': 'Year', 'y': 'Value', 'color': 'Region'})
+
+    assert rendered(fig) == rendered(px.line(df, x='Year', y='Value', color='Region', markers=True))
+
+def test_scatter_matches_px():
+    gpa = aggregate(results_df[results_df['Region'].isin(REGIONS) & (results_df['Profile'] == 'Overall')],
+                    'Institution name', {'GPA': 'mean'})
+    income = aggregate(income_df[income_df['Region'].isin(REGIONS)], 'Institution name', {'2013-2020 (total)': 'sum'})
+    df = gpa.merge(income, on='Institution name').merge(regions_mapping, on='Institution name')
+    expected = px.scatter(df, x='2013-2020 (total)', y='GPA', hover_name='Institution name', color='Region', log_x=True)
+
+    fig = figures.scatter(df['2013-2020 (total)'], df['GPA'], color=df['Region'], hover_name=df['Institution name'],
+                          labels={'x': '2013-2020 (total)', 'y': 'GPA', 'color': 'Region'}, log_x=True)
+
+    assert rendered(fig) == rendered(expected)
+    # groups keep the order regions first appear in
+    assert [trace['name'] for trace in fig['data']] == list(df['Region'].astype(str).unique())
+
+def test_bar_matches_px():
+    df = aggregate(results_df[results_df['Region'].isin(REGIONS)], 'Region', {'GPA': 'mean'})
+    df['GPA'] = np.round(df['GPA'], 2)
+    expected = px.bar(df, x='Region', y='GPA', text='GPA', color='Region')
+
+    fig = figures.bar(df['Region'].to_numpy(dtype=object), df['GPA'].to_numpy(), labels={'x': 'Region', 'y': 'GPA'})
+
+    assert rendered(fig) == rendered(expected)
+
+def test_update_matches_update_layout():
+    layout = dict(
+        title=dict(text='Chart', font=dict(color='#9b58b6', size=18)),
+        xaxis=dict(title=dict(font=dict(size=14)), color='#9b58b6'),
+        legend=dict(x=0.65, font=dict(size=10)),
+        showlegend=False,
+    )
+    expected = px.line(pd.Series([1.0, 2.0]), markers=True).update_layout(layout)
+
+    fig = figures.line([0, 1], np.array([1.0, 2.0]))
+    figures.update(fig['layout'], layout)
+
+    assert rendered(fig) == rendered(expected)
+    # nested properties are merged, not replaced
+    assert fig['layout']['xaxis']['title']['text'] == 'index'
+
+def applied(fig, patch):
+    # applies a Patch's operations as dash-renderer does
+    fig = json.loads(json.dumps(fig))
+    for op in patch.to_plotly_json()['operations']:
+        *path, last = op['location']
+        target = fig
+        for key in path:
+            target = target[key]
+        if op['operation'] == 'Assign':
+            target[last] = op['params']['value']
+        elif op['operation'] == 'Delete':
+            del target[last]
+        elif op['operation'] == 'Insert':
+            target[last].insert(op['params']['index'], op['params']['value'])
+        else:
+            raise AssertionError(op['operation'])
+    return fig
+
+def grouped_line(regions):
+    df = pd.DataFrame({
+        'Year': np.tile([2013, 2014, 2015], len(regions)),
+        'Value': np.arange(3 * len(regions), dtype=np.float64),
+        'Region': np.repeat(regions, 3),
+    })
+    return rendered(figures.line(df['Year'], df['Value'], color=df['Region'], labels={'x': 'Year', 'y': 'Value', 'color': 'Region'}))
+
+@pytest.mark.parametrize('old, new', [
+    (['London'], ['London', 'Wales']),
+    (['London', 'Wales'], ['Wales']),
+    (['London', 'Scotland'], ['London', 'Wales']),
+    (['London', 'Scotland', 'Wales'], ['Scotland']),
+    (['London', 'Wales'], ['Wales', 'London']),
+])
+def test_diff_turns_old_into_new(old, new):
+    old_fig, new_fig = grouped_line(old), grouped_line(new)
+
+    patch = figures.diff(old_fig, new_fig)
+
+    assert applied(old_fig, patch) == new_fig
+    # kept traces are patched, not resent
+    assert len(json.dumps(patch.to_plotly_json())) < len(json.dumps(new_fig))
+
+def test_diff_of_same_figure():
+    assert figures.diff(grouped_line(REGIONS), grouped_line(REGIONS)) is dash.no_update
+
+def test_regional_trends_patches_region_changes():
+    import app  # noqa: F401 - registers the pages
+    from pages import regional_trends
+
+    full = regional_trends.updatePage(1, ['London'], 'All', 'Overall')
+    for regions in [['Wales', 'London'], ['Wales', 'Scotland', 'London'], ['Scotland']]:
+        shown = full[-1]
+        patched = regional_trends.updatePage(1, regions, 'All', 'Overall', shown)
+        full = regional_trends.updatePage(1, regions, 'All', 'Overall')
+        assert patched[-1] == full[-1] == {'region': sorted(regions), 'uoa': 'All', 'profile': 'Overall'}
+
+        old = regional_trends.generateFigures(shown['region'], 'All', 'Overall')
+        for old_fig, patch, new_fig in zip(old, patched[:7], full[:7]):
+            assert isinstance(patch, dash.Patch)
+            assert applied(rendered(old_fig), patch) == rendered(new_fig)
+
+    # another profile rebuilds every figure
+    rebuilt = regional_trends.updatePage(1, ['Scotland'], 'All', 'Impact', full[-1])
+    assert all(isinstance(fig, dict) for fig in rebuilt[:7])
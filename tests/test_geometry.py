@@ -0,0 +1,42 @@
+# tests/test_geometry.py
+import pytest
+import copy
+import json
+import numpy as np
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import geometry
+from utils.data_store import results_df
+
+@pytest.fixture(scope='module')
+def source():
+    with open(geometry.SOURCE_PATH) as f:
+        return json.load(f)
+
+def test_simplify_line_drops_points_within_tolerance():
+    points = np.array([[0.0, 0.0], [1.0, 0.001], [2.0, 0.0], [3.0, 1.0]])
+
+    assert geometry.simplify_line(points, 0.01).tolist() == [[0.0, 0.0], [2.0, 0.0], [3.0, 1.0]]
+    assert len(geometry.simplify_line(points, 0.0001)) == 4
+
+@pytest.mark.parametrize('level', [level for level in geometry.LEVELS if level != 'full'])
+def test_levels_are_built_and_valid(source, level):
+    variant = geometry.load(level)
+
+    # the asset is what the pipeline builds from the current source
+    assert variant == json.loads(geometry.dumps(geometry.simplify(source, level)))
+    geometry.validate(source, variant)
+    # every region the dashboard maps is there, once
+    assert sorted(f['properties'][geometry.KEY] for f in variant['features']) == sorted(results_df['Region'].unique())
+    assert geometry.vertex_count(variant) < geometry.vertex_count(source) / 2
+
+def test_validate_rejects_missing_regions(source):
+    variant = copy.deepcopy(geometry.load('low'))
+    variant['features'][0]['properties'][geometry.KEY] = 'Atlantis'
+
+    with pytest.raises(ValueError):
+        geometry.validate(source, variant)
@@ -0,0 +1,45 @@
+# tests/test_leaderboards.py
+import pytest
+import numpy as np
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import leaderboards
+from utils.data_store import results_df, income_df, phd_df
+from utils.dashboard_components import create_leaderboard_table
+
+@pytest.mark.parametrize('metric, df, column', [
+    ('Overall GPA', results_df[results_df['Profile'] == 'Overall'], 'GPA'),
+    ('Impact GPA', results_df[results_df['Profile'] == 'Impact'], 'GPA'),
+    ('Income', income_df[income_df['Income source'] != 'Total income'], '2013-2020 (total)'),
+    ('PhDs Awarded', phd_df, 'Total'),
+    ('Staff FTE', results_df[results_df['Profile'] == 'Overall'], 'FTE staff'),
+])
+def test_leaderboards_match_raw_rows(metric, df, column):
+    board = leaderboards.get(metric)
+    agg = 'mean' if column == 'GPA' else 'sum'
+    expected = df.groupby('Institution name', observed=True)[column].agg(agg).sort_values(ascending=False)
+
+    assert len(board.names) == leaderboards.TOP_N
+    assert board.values == pytest.approx(expected.head(leaderboards.TOP_N).to_numpy())
+    for name, value in zip(board.names, board.values):
+        assert expected[name] == pytest.approx(value)
+
+def test_weighted_gpa_leaderboard():
+    board = leaderboards.get('Overall GPA', weighted=True)
+    overall = results_df[results_df['Profile'] == 'Overall']
+    rows = overall[overall['Institution name'] == board.names[0]]
+
+    assert board is not leaderboards.get('Overall GPA')
+    assert board.values[0] == pytest.approx(np.average(rows['GPA'], weights=rows['FTE staff']))
+    # sums have no weighted variant
+    assert leaderboards.get('Income', weighted=True) is leaderboards.get('Income')
+
+def test_leaderboard_table_rows():
+    card = create_leaderboard_table('Top', 'Income', ['Uni A', 'Uni B'], np.array([2_500_000.0, 999.0]))
+    rows = card.children.children.children[1].children[1].children
+
+    assert [[cell.children for cell in row.children] for row in rows] == [[1, 'Uni A', '2.5M'], [2, 'Uni B', 999.0]]
@@ -0,0 +1,108 @@
+# tests/test_memo.py
+import pytest
+import base64
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+from utils import memo
+import utils.dashboard_components as components
+
+REGIONS = ['London', 'Scotland', 'Wales']
+
+def test_lru_evicts_least_recently_used():
+    cache = memo.LRUCache(max_entries=2, max_bytes=100)
+    cache.put('a', 1, size=10)
+    cache.put('b', 2, size=10)
+    assert cache.get('a') == 1          # 'b' is now the least recently used
+    cache.put('c', 3, size=10)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.get('b') is None
+    assert cache.stats()['hits'] == 3
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['evictions'] == 1
+
+def test_lru_byte_cap():
+    cache = memo.LRUCache(max_entries=10, max_bytes=100)
+    cache.put('a', 1, size=60)
+    cache.put('b', 2, size=60)
+
+    assert 'a' not in cache and cache.bytes == 60
+
+    cache.put('huge', 3, size=101)      # larger than the whole cache
+    assert 'huge' not in cache and 'b' in cache
+
+def test_memoize_keys_and_namespace():
+    calls = []
+    version = ['v1']
+
+    @memo.memoize(lambda: version[0], key=lambda region, uoa: (memo.unordered(region), uoa))
+    def count_regions(region, uoa):
+        calls.append((region, uoa))
+        return len(region)
+
+    assert count_regions(['B', 'A'], 'All') == 2
+    assert count_regions(['A', 'B'], 'All') == 2        # same selection, another order
+    assert len(calls) == 1
+
+    version[0] = 'v2'                                   # new data - nothing is reused
+    count_regions(['A', 'B'], 'All')
+    assert len(calls) == 2
+
+    version[0] = None                                   # caching off
+    count_regions(['A', 'B'], 'All')
+    count_regions(['A', 'B'], 'All')
+    assert len(calls) == 4
+
+def test_memoised_components_share_results():
+    first = components.generateRegionIncomeSankey(REGIONS, 'All')
+    hits = memo.counters['generateRegionIncomeSankey']['hits']
+
+    assert components.generateRegionIncomeSankey(REGIONS[::-1], 'All') == first
+    assert memo.counters['generateRegionIncomeSankey']['hits'] == hits + 1
+
+    # the regional view's figures ignore the institution dropdown
+    chart = components.generateIncomeChart('reg', 'University of Oxford', 'All', 'London')
+    assert components.generateIncomeChart('reg', None, 'All', 'London') == chart
+
+def test_figures_are_served_pre_serialised():
+    built = components.generateRegionLineCharts.__wrapped__('phd', REGIONS, 'All')
+    cached = components.generateRegionLineCharts('phd', REGIONS, 'All')
+
+    # plain dicts, serialised exactly like the figure (a go.Figure or a figure dict)
+    sankey = components.generateRegionIncomeSankey.__wrapped__(REGIONS, 'All')
+    assert isinstance(sankey, go.Figure) and isinstance(components.generateRegionIncomeSankey(REGIONS, 'All'), dict)
+    assert to_json_plotly(components.generateRegionIncomeSankey(REGIONS, 'All')) == to_json_plotly(sankey)
+    assert isinstance(built, dict) and isinstance(cached, dict) and cached is not built
+    assert to_json_plotly(cached) == to_json_plotly(built)
+    # each caller gets its own copy
+    cached['layout']['title'] = 'changed'
+    assert components.generateRegionLineCharts('phd', REGIONS, 'All') != cached
+
+def test_patched_frames_are_not_cached():
+    mock_phd_df = pd.DataFrame({
+        'Institution name': ['Uni A'], 'UOA name': ['UOA 1'], 'Region': ['London'],
+        '2013': [1], '2014': [1], '2015': [1], '2016': [1], '2017': [1], '2018': [1], '2019': [1], 'Total': [7],
+    })
+    real = components.generatePhdChartAndKPICard('ins', 'Uni A', 'All', None)
+
+    with patch('utils.dashboard_components.phd_df', mock_phd_df):
+        assert components.data_version() is None
+        chart, _ = components.generatePhdChartAndKPICard('ins', 'Uni A', 'All', None)
+        assert chart != real[0]
+        y = chart['data'][0]['y']
+        assert np.frombuffer(base64.b64decode(y['bdata']), dtype=y['dtype']).tolist() == [1] * 7
+
+def test_sizeof():
+    fig = memo.FigureJSON(b'{"data": []}')
+    assert memo.sizeof(fig) == 12
+    assert memo.sizeof((fig, [fig])) > 12
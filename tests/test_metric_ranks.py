@@ -0,0 +1,70 @@
+# tests/test_metric_ranks.py
+import pytest
+import numpy as np
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import metric_ranks
+from utils.data_store import results_df, income_df, phd_df
+from utils.dashboard_components import generateMetricRankCard
+
+UNI = 'University of Oxford'
+UOA = 'Clinical Medicine'
+
+def count_above(values, uni):
+    # competition rank: one more than the number of strictly better institutions
+    return int((values > values[uni] + 1e-9 * abs(values[uni])).sum()) + 1
+
+@pytest.mark.parametrize('metric, df, column, agg', [
+    ('Overall GPA', results_df[results_df['Profile'] == 'Overall'], 'GPA', 'mean'),
+    ('Outputs GPA', results_df[results_df['Profile'] == 'Outputs'], 'GPA', 'mean'),
+    ('Income', income_df[income_df['Income source'] != 'Total income'], '2013-2020 (total)', 'sum'),
+    ('PhDs Awarded', phd_df, 'Total', 'sum'),
+    ('Staff FTE', results_df[results_df['Profile'] == 'Overall'], 'FTE staff', 'sum'),
+])
+@pytest.mark.parametrize('uoa', ['All', UOA])
+def test_ranks_match_raw_rows(metric, df, column, agg, uoa):
+    rows = df if uoa == 'All' else df[df['UOA name'] == uoa]
+    values = rows.groupby('Institution name', observed=True)[column].agg(agg)
+    region_of = rows.groupby('Institution name', observed=True)['Region'].first()
+    ranks = metric_ranks.get(UNI, uoa)[metric]
+
+    assert ranks['National'][:2] == (count_above(values, UNI), len(values))
+    same_region = values[region_of == region_of[UNI]]
+    assert ranks['Region'][:2] == (count_above(same_region, UNI), len(same_region))
+
+    panel = results_df.loc[results_df['UOA name'] == UOA, 'Main panel'].iloc[0]
+    if uoa == 'All':
+        assert ranks['Main panel'] is None
+    else:
+        in_panel = df[df['Main panel'] == panel].groupby('Institution name', observed=True)[column].agg(agg)
+        assert ranks['Main panel'][:2] == (count_above(in_panel, UNI), len(in_panel))
+
+def test_percentiles():
+    # below + half of the tied values (including itself), as a share of the group
+    assert metric_ranks.percentile(np.array([1, 2, 2, 4]), np.array([1, 3, 3, 4]), 4).tolist() == [87.5, 50.0, 50.0, 12.5]
+
+    for scopes in metric_ranks.get(UNI, UOA).values():
+        for rank, size, pct in filter(None, scopes.values()):
+            assert 1 <= rank <= size and 0 < pct < 100
+
+def test_weighted_gpa_ranks():
+    overall = results_df[(results_df['Profile'] == 'Overall') & (results_df['UOA name'] == UOA)]
+    weighted = overall.groupby('Institution name', observed=True).apply(
+        lambda g: np.average(g['GPA'], weights=g['FTE staff']), include_groups=False
+    )
+    ranks = metric_ranks.get(UNI, UOA, weighted=True)
+
+    assert ranks['Overall GPA']['National'][0] == count_above(weighted, UNI)
+    # sums are the same either way
+    assert ranks['Income'] == metric_ranks.get(UNI, UOA)['Income']
+
+def test_metric_rank_card():
+    card = generateMetricRankCard('ins', UNI, UOA)
+    rows = card.children[1].children[1].children
+
+    assert [row.children[0].children for row in rows] == list(metric_ranks.METRICS)
+    assert generateMetricRankCard('reg', UNI, UOA) == ''
@@ -0,0 +1,63 @@
+# tests/test_multi_level_view.py
+import pytest
+import dash
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import app          # the pages can only be imported once the app is created
+from dash._utils import to_json
+from pages import multi_level_view
+import utils.dashboard_components as components
+
+UNI = 'University of Oxford'
+UOA = 'Clinical Medicine'
+
+SELECTIONS = [
+    ('ins', UNI, None, UOA),
+    ('ins', UNI, None, 'All'),
+    ('reg', None, 'London', 'All'),
+    ('nat', None, None, UOA),
+]
+
+@pytest.mark.parametrize('view, ins, reg, uoa', SELECTIONS)
+def test_panels_match_components(view, ins, reg, uoa):
+    panels = multi_level_view.updatePanels(1, view, ins, reg, uoa, 'Overall', False)
+
+    assert list(panels) == [panel.__name__ for panel in multi_level_view.PANELS]
+    income_chart, income_kpi = components.generateIncomeCategoryChartAndKPICard(view, ins, uoa, reg)
+    phd_chart, phd_kpi = components.generatePhdChartAndKPICard(view, ins, uoa, reg)
+    assert panels['updateIncomePanel'][1] == income_chart
+    assert panels['updatePhdPanel'][0] == phd_chart
+    # the kpi row holds the same cards the charts' functions build
+    assert to_json(panels['updateKPIs']) == to_json([
+        components.generateStaffFTEKPICard(view, ins, uoa, reg),
+        income_kpi,
+        components.generateInKindKPICard(view, ins, uoa, reg),
+        phd_kpi,
+    ])
+    shown = view == 'ins' and uoa != 'All'
+    assert panels['updateQualityPanel'][1] is not shown
+    assert panels['updateIncomePanel'][2] == panels['updatePhdPanel'][1] == ('col-12 col-xl-4' if shown else 'col-12 col-xl-6')
+    if shown:
+        # every profile is sent with the update, for the pie to be switched clientside
+        assert panels['updateQualityPanel'][3] == components.generateQualityProfiles(ins, uoa)
+        assert list(panels['updateQualityPanel'][3]) == ['Environment', 'Impact', 'Outputs', 'Overall']
+    else:
+        assert panels['updateQualityPanel'][0] is dash.no_update
+        assert panels['updateQualityPanel'][3] is None
+
+def test_gpa_cards_are_shared_across_institutions_of_a_view():
+    regional = components.generateGPACards('reg', None, 'All', 'London')
+
+    assert components.generateGPACards('reg', UNI, 'All', 'London') is regional
+    assert components.generateGPACards('reg', None, 'All', 'London', True) is not regional
+    assert components.generateRankingCards('nat', UNI, UOA) is components.generateRankingCards('reg', None, 'All')
+
+@pytest.mark.parametrize('view, ins, reg, uoa', [(None, None, None, None), ('ins', UNI, None, None), ('reg', None, None, 'All')])
+@pytest.mark.parametrize('panel', multi_level_view.PANELS)
+def test_incomplete_selection_is_not_updated(panel, view, ins, reg, uoa):
+    with pytest.raises(dash.exceptions.PreventUpdate):
+        panel(1, view, ins, reg, uoa, 'Overall')
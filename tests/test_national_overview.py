@@ -0,0 +1,33 @@
+# tests/test_national_overview.py
+import pytest
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import app          # the pages can only be imported once the app is created
+from dash._utils import to_json
+from pages import national_overview
+import utils.dashboard_components as components
+
+@pytest.fixture(scope='module')
+def maps():
+    return national_overview.generateMapVariants()
+
+def test_map_geometry_is_not_embedded(maps):
+    assert maps['figure']['data'][0]['geojson'] == '/assets/regions-medium.geojson'
+    # every variant ships with the page, in a fraction of the GeoJSON's size
+    assert len(to_json(maps)) < os.path.getsize(os.path.join(project_root, 'assets/regions.geojson')) / 20
+
+@pytest.mark.parametrize('filter', national_overview.MAP_METRICS)
+@pytest.mark.parametrize('weighted', [False, True])
+def test_map_variants_match_server_maps(maps, filter, weighted):
+    df = components.generateDataFrameForMap(filter, 'All', weighted)
+    trace = components.generateMap(df, filter, weighted).data[0]
+    variant = maps['variants'][national_overview.mapKey(filter, weighted)]
+
+    assert variant['locations'] == list(trace.locations)
+    assert variant['z'] == pytest.approx(list(trace.z))
+    assert variant['hovertemplate'] == trace.hovertemplate
+    assert variant['title'].endswith(components.mapColour(filter, weighted)[1])
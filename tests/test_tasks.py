@@ -0,0 +1,46 @@
+# tests/test_tasks.py
+import pytest
+import operator
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import tasks
+from utils.tasks import Task
+
+@pytest.mark.parametrize('mode', tasks.MODES)
+def test_results_keep_the_tasks_order(mode):
+    work = [
+        Task('add', operator.add, 1, 2),
+        Task('mul', operator.mul, 3, 4, cpu_bound=True),
+        Task('neg', operator.neg, 5),
+    ]
+
+    assert tasks.run(work, name=f'test {mode}', mode=mode) == [3, 12, -5]
+    stats = tasks.stats()
+    assert stats['runs'][f'test {mode}']['calls'] == 1
+    assert all(stats['tasks'][label]['calls'] >= 1 for label in ['add', 'mul', 'neg'])
+
+@pytest.mark.parametrize('mode', ['serial', 'threads'])
+def test_failed_task_raises(mode):
+    work = [Task('ok', operator.add, 1, 2), Task('fails', operator.truediv, 1, 0)]
+
+    with pytest.raises(ZeroDivisionError):
+        tasks.run(work, mode=mode)
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        tasks.run([Task('add', operator.add, 1, 2)], mode='fibres')
+
+def test_regional_trends_same_in_every_mode():
+    import app  # noqa: F401 - registers the pages
+    from pages import regional_trends
+    from unittest.mock import patch
+
+    args = (1, ['London', 'Wales'], 'All', 'Overall')
+    serial = regional_trends.updatePage(*args)
+    with patch.object(tasks, 'MODE', 'threads'):
+        assert regional_trends.updatePage(*args) == serial
+    assert tasks.stats()['runs']['regional_trends.generateFigures']['calls'] >= 2
@@ -0,0 +1,61 @@
+# tests/test_warmup.py
+import pytest
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from utils import warmup
+
+def test_run_reports_progress():
+    seen = []
+
+    def fail():
+        raise ValueError
+
+    warmup.run([
+        ('a', lambda: seen.append(dict(warmup.state))),
+        ('b', fail),
+        ('c', lambda: seen.append(dict(warmup.state))),
+    ])
+
+    assert [(s['ready'], s['done'], s['current']) for s in seen] == [(False, 0, 'a'), (False, 2, 'c')]
+    assert warmup.state['ready'] and warmup.state['done'] == 3 and warmup.state['failed'] == 1
+
+def test_waits_for_live_requests():
+    ran = threading.Event()
+    warmup.request_started()
+    thread = threading.Thread(target=warmup.run, args=([('task', ran.set)],))
+    thread.start()
+
+    time.sleep(5 * warmup.IDLE_SECONDS)
+    assert not ran.is_set()             # a request is being served
+
+    warmup.request_finished()
+    thread.join(timeout=5)
+    assert ran.is_set()
+
+def test_selections_cover_the_common_views():
+    import app          # the pages can only be imported once the app is created
+    labels = [label for label, _ in warmup.selections()]
+
+    # the national map is prebuilt and switched in the browser
+    assert labels[0] == 'leaderboard: Overall GPA'
+    assert 'multi-level view: national, all UOAs' in labels
+    assert sum(label.startswith('regional trends:') for label in labels) == 12
+
+def test_disabled_by_environment():
+    with patch.dict(os.environ, {'FIGURE_CACHE_WARMUP': '0'}):
+        assert not warmup.start()
+
+def test_ready_endpoint():
+    import app
+    with app.server.test_client() as client:
+        response = client.get('/ready')
+
+    assert response.status_code == 200
+    assert set(response.get_json()) >= {'ready', 'done', 'total'}
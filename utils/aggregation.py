@@ -0,0 +1,217 @@
+## Integer-coded group-by engine for the dashboard's sum / mean rollups.
+## Rows are mapped to dense integer group codes (straight from the shared
+## categorical codes where possible) and each value column is reduced with
+## np.bincount, or np.add.reduceat when the rows are already grouped
+## contiguously, avoiding pandas' per-call groupby overhead on small frames.
+## Means can be weighted by another column (e.g. FTE-weighted GPA), at the
+## cost of one more bincount.
+
+import numpy as np
+import pandas as pd
+
+# largest number of key combinations to find observed groups with a bincount
+# (beyond it, np.unique is used)
+MAX_DENSE_GROUPS = 1 << 22
+
+def _key_codes(values):
+    """
+    Returns (codes, labels) for one key column, with codes -1 for missing values
+    and labels in sorted order (category order, for categoricals).
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype(np.int64), values.cat.categories
+    codes, labels = pd.factorize(values, sort=True)
+    return codes.astype(np.int64), labels
+
+def _key_labels(values, labels, codes):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return pd.Categorical.from_codes(codes, dtype=values.dtype)
+    return np.asarray(labels)[codes]
+
+def group_codes(df, by):
+    """
+    Maps each row of a frame to its group.
+
+    Groups are the observed combinations of the key columns, numbered in
+    sorted key order; rows with a missing key belong to no group, as with
+    `df.groupby(by, observed=True)`.
+
+    Parameters:
+    df (pd.DataFrame): The frame to group.
+    by (str or list): The key column(s); an empty list puts every row in one group.
+
+    Returns:
+    tuple: (codes, groups) - an int64 array of each row's group number (-1 for
+        none), and a DataFrame with the key values of each group.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    if not by:
+        return np.zeros(len(df), dtype=np.int64), pd.DataFrame(index=range(1 if len(df) else 0))
+
+    combined = np.zeros(len(df), dtype=np.int64)
+    valid = np.ones(len(df), dtype=bool)
+    keys = []
+    size = 1
+    for col in by:
+        codes, labels = _key_codes(df[col])
+        valid &= codes >= 0
+        combined = combined * len(labels) + codes
+        size *= len(labels)
+        keys.append((col, labels))
+
+    combined = combined[valid]
+    if size <= MAX_DENSE_GROUPS:
+        present = np.bincount(combined, minlength=size) > 0
+        observed = np.flatnonzero(present)
+        dense = np.cumsum(present) - 1
+        row_groups = dense[combined]
+    else:
+        observed, row_groups = np.unique(combined, return_inverse=True)
+
+    codes = np.full(len(df), -1, dtype=np.int64)
+    codes[valid] = row_groups
+
+    # unpack each group's combined code into its key values
+    groups = {}
+    remainder = observed
+    for col, labels in reversed(keys):
+        groups[col] = _key_labels(df[col], labels, remainder % len(labels))
+        remainder = remainder // len(labels)
+    return codes, pd.DataFrame({col: groups[col] for col in by})
+
+def _is_contiguous(codes):
+    return len(codes) > 0 and bool(np.all(codes[1:] >= codes[:-1]))
+
+def group_sum(codes, values, size):
+    """
+    Sums values per group, skipping missing values (an empty group sums to 0).
+
+    Parameters:
+    codes (np.ndarray): Group number of each value (-1 to skip it).
+    values (np.ndarray): The values to sum.
+    size (int): Number of groups.
+
+    Returns:
+    np.ndarray: One sum per group (int64 for integer values, float64 otherwise).
+    """
+    keep = codes >= 0
+    if values.dtype.kind == 'f':
+        keep &= ~np.isnan(values)
+    codes, values = codes[keep], values[keep]
+
+    if _is_contiguous(codes):
+        # rows already grouped together (e.g. sorted frames): add up each run
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        sums = np.zeros(size, dtype=np.int64 if values.dtype.kind in 'biu' else np.float64)
+        sums[codes[starts]] = np.add.reduceat(values, starts)
+        return sums
+
+    sums = np.bincount(codes, weights=values, minlength=size)
+    if values.dtype.kind in 'biu':
+        return np.rint(sums).astype(np.int64)
+    return sums
+
+def group_count(codes, values, size):
+    """
+    Counts the non-missing values per group.
+    """
+    keep = codes >= 0
+    if values.dtype.kind == 'f':
+        keep &= ~np.isnan(values)
+    return np.bincount(codes[keep], minlength=size)
+
+def group_mean(codes, values, size, weights=None):
+    """
+    Averages the non-missing values per group (NaN for a group with none).
+
+    With weights, returns sum(weight * value) / sum(weight) per group, over
+    the rows where both are present.
+    """
+    if weights is None:
+        counts = group_count(codes, values, size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return group_sum(codes, values, size) / counts
+
+    weights = weights.astype(np.float64)
+    codes = np.where(np.isnan(weights) | np.isnan(values.astype(np.float64)), -1, codes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return group_sum(codes, weights * values, size) / group_sum(codes, weights, size)
+
+def group_rank(codes, values, size, ascending=False, method='min'):
+    """
+    Ranks values within their groups, highest first (or lowest, if ascending).
+
+    Ties share the best rank of the tied values (competition ranking: 1, 2, 2, 4),
+    or with method='max' the worst (1, 3, 3, 4), and missing values are ranked
+    after all others, tied with each other; the same as
+    `groupby(...).rank(method=method, na_option='bottom')`.
+
+    Parameters:
+    codes (np.ndarray): Group number of each value (-1 to leave it unranked).
+    values (np.ndarray): The values to rank.
+    size (int): Number of groups.
+    ascending (bool): Rank the lowest value first.
+    method (str): 'min' or 'max', the rank given to tied values.
+
+    Returns:
+    np.ndarray: The int64 rank (from 1) of each value within its group, 0 where unranked.
+    """
+    values = values.astype(np.float64)
+    keys = values if ascending else -values
+    keys = np.where(np.isnan(keys), np.inf, keys)
+
+    order = np.lexsort((keys, codes))
+    sorted_codes, sorted_keys = codes[order], keys[order]
+    positions = np.arange(len(order))
+
+    # first position of each group, and of each run of tied values
+    group_start = np.ones(len(order), dtype=bool)
+    group_start[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    tie_start = group_start.copy()
+    tie_start[1:] |= sorted_keys[1:] != sorted_keys[:-1]
+    first_of_group = np.maximum.accumulate(np.where(group_start, positions, 0))
+    if method == 'max':
+        # last position of each run of tied values
+        tie_end = np.ones(len(order), dtype=bool)
+        tie_end[:-1] = tie_start[1:]
+        of_tie = np.minimum.accumulate(np.where(tie_end, positions, len(order))[::-1])[::-1]
+    else:
+        of_tie = np.maximum.accumulate(np.where(tie_start, positions, 0))
+
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = of_tie - first_of_group + 1
+    ranks[codes < 0] = 0
+    return ranks
+
+AGGREGATIONS = {
+    'sum': group_sum,
+    'count': group_count,
+    'mean': group_mean,
+}
+
+def aggregate(df, by, agg, weights=None):
+    """
+    Groups a frame and aggregates its value columns.
+
+    Returns the same frame as `df.groupby(by, observed=True).agg(agg).reset_index()`
+    for the 'sum', 'count' and 'mean' aggregations.
+
+    Parameters:
+    df (pd.DataFrame): The frame to aggregate.
+    by (str or list): The key column(s).
+    agg (dict): Value column -> 'sum', 'count' or 'mean'.
+    weights (str): Optional column to weight the means by (e.g. 'FTE staff').
+
+    Returns:
+    pd.DataFrame: One row per group, with the key columns then the aggregated columns.
+
+    Example:
+    >>> aggregate(results_df, 'Institution name', {'GPA': 'mean'})
+    """
+    codes, groups = group_codes(df, by)
+    for col, func in agg.items():
+        if func == 'mean' and weights is not None:
+            groups[col] = group_mean(codes, df[col].to_numpy(), len(groups), df[weights].to_numpy())
+        else:
+            groups[col] = AGGREGATIONS[func](codes, df[col].to_numpy(), len(groups))
+    return groups
@@ -8,18 +8,34 @@ import dash_bootstrap_components as dbc
 import textwrap
 import plotly.express as px
 import plotly.graph_objects as go
-import plotly.figure_factory as ff
-import json
+from utils import data_cube, data_partition, data_store, densities, figures, geometry, memo, metric_ranks
+from utils.aggregation import aggregate
+from utils.data_store import (
+    results_df,
+    income_df,
+    incomeiK_df,
+    phd_df,
+    regions_mapping,
+)
 
-# read in datasets
-results_df = pd.read_csv('data/results_cleaned.csv')
-income_df = pd.read_csv('data/income_cleaned.csv')
-incomeiK_df = pd.read_csv('data/incomeiK_cleaned.csv')
-phd_df = pd.read_csv('data/phd_awarded_cleaned.csv')
-regions_mapping = pd.read_csv("data/regions.csv")
+# the datasets read by the memoised figure functions below
+STORE_FRAMES = ['results_df', 'income_df', 'incomeiK_df', 'phd_df', 'regions_mapping']
 
-with open("assets/regions.geojson") as f:
-    regions_geojson = json.load(f)
+def data_version():
+    """
+    Namespace of the memoised figure functions (see utils/memo.py): the store's
+    data version, or None (no caching) when a dataset has been swapped out,
+    e.g. patched with a mock frame in the tests.
+    """
+    module = globals()
+    if all(module[name] is getattr(data_store, name) for name in STORE_FRAMES):
+        return data_store.data_version
+    return None
+
+def scoped_key(type, ins, uoa, reg):
+    # the multi-level view's figures depend only on the selected scope & uoa
+    # (e.g. not on the institution dropdown in the regional view)
+    return (*data_cube.scope_of(type, ins, reg), uoa)
 
 def format_value(value):
     """
@@ -112,15 +128,58 @@ def create_gpa_kpi_card(title, card_id, icon_class):
         className="card",
     )
 
-def create_leaderboard(title, df, col):
-    th = 'Institution name'
-    td_data_col = 'Institution name'
+def create_gpa_mode_switch(switch_id):
+    """
+    Creates a switch to choose between mean and FTE-weighted GPA.
+
+    When on, GPAs are averaged weighted by each submission's staff FTE, so that
+    larger submissions count for more; when off, every submission counts equally.
+
+    Parameters:
+    switch_id (str): The id of the switch; its value is True for FTE-weighted GPA.
+    """
+    return html.Div([
+        dbc.Switch(
+            id=switch_id,
+            label="FTE-weighted GPA",
+            value=False,
+            className="subtitle-small",
+            style={"margin-bottom": "0"},
+        ),
+        dbc.Tooltip(
+            'Weights each submission\'s GPA by its staff FTE, instead of counting every submission equally.',
+            target=switch_id,
+            placement="bottom",
+        ),
+    ])
 
+def create_leaderboard(title, df, col):
     if (col == 'Income') or (col == 'Income In-Kind'):
         col_name = '2013-2020 (total)'
     else:
         col_name = col
 
+    top = df.sort_values(col_name, ascending=False).head(10)
+
+    return create_leaderboard_table(title, col, top['Institution name'].tolist(), top[col_name].to_numpy())
+
+def create_leaderboard_table(title, col, names, values):
+    """
+    Creates the leaderboard card from its ranked rows.
+
+    Parameters:
+    title (str): The card's title.
+    col (str): The heading of the value column ('GPA', 'Income', ...).
+    names (list): Institution names, highest ranked first.
+    values (np.ndarray): Their values.
+    """
+    th = 'Institution name'
+
+    if col == "GPA" or col == "FTE staff":
+        cells = np.round(values, 2).tolist()
+    else:
+        cells = [format_value(value) for value in values.tolist()]
+
     return dbc.Card(
     dcc.Loading(  
         dbc.CardBody(  
@@ -151,11 +210,11 @@ def create_leaderboard(title, df, col):
                                 html.Tr(
                                     [
                                         html.Td(i + 1),
-                                        html.Td(row[td_data_col]),
-                                        html.Td(np.round(row[col_name], 2) if col_name == "GPA" or col_name == "FTE staff" else format_value(row[col_name])),
+                                        html.Td(name),
+                                        html.Td(cell),
                                     ]
                                 )
-                                for i, row in df.sort_values(col_name, ascending=False).head(10).reset_index(drop=True).iterrows()
+                                for i, (name, cell) in enumerate(zip(names, cells))
                             ]
                         ),
                     ],
@@ -264,34 +323,16 @@ def returnUoAOptions():
     return options
 
 ## Visualisation Generation for Institution Overview page
+@memo.memoize(data_version, key=scoped_key, figures=True)
 def generateIncomeChart(type, ins, uoa, reg):
-    df = income_df
-    # agg functions
-    agg_func_dict = {
-        '2013-14': 'sum',
-        '2014-15': 'sum',
-        '2015-2020 (avg)': 'sum',
-    }
-
-    if type == 'ins':
-        if (uoa == "All"):
-            df_filtered = income_df.loc[(income_df["Institution name"] == ins) 
-                                & (income_df['Income source'] == "Total income")
-                                ].agg(agg_func_dict)
-        else:
-            df_filtered = income_df.loc[(income_df["Institution name"] == ins) 
-                                & (income_df['Income source'] == "Total income")
-                                & (income_df["UOA name"] == uoa)].agg(agg_func_dict)
-    elif type == 'reg':
-        df = income_df[(income_df['Region'] == reg) &(income_df['Income source'] == 'Total income')]
-        if uoa != 'All':
-            df = df[df['UOA name'] == uoa]
-        df_filtered = df.agg(agg_func_dict)
+    # yearly income sums, precomputed per view & uoa (see utils/data_cube.py)
+    view, scope = data_cube.scope_of(type, ins, reg)
+    if view == 'nat':
+        # national totals are summed over the per-source rows (all rows for a single uoa)
+        measure = 'income_sources' if uoa == 'All' else 'income_all_rows'
     else:
-        df = income_df[income_df['Income source'] != 'Total income']
-        if uoa != 'All':
-            df = income_df[income_df['UOA name'] == uoa]
-        df_filtered = df.agg(agg_func_dict)
+        measure = 'income'
+    df_filtered = data_cube.lookup(income_df, measure, view, scope, uoa)
     
     df_filtered = df_filtered.rename({
         '2013-14':"13'-14'",
@@ -299,17 +340,17 @@ def generateIncomeChart(type, ins, uoa, reg):
         '2015-2020 (avg)':"15'-20' (avg)",
     })
         
-    chart = px.line(df_filtered,
-                    markers=True,)
+    chart = figures.line(df_filtered.index, df_filtered.to_numpy())
 
-    chart.update_traces(
-        marker_color="#800080",
-        hoverlabel=dict(bgcolor="rgba(255, 255, 255, 0.1)", font_size=12),
-        hovertemplate="<b>%{x}</b><br>Value: £%{y:,}<extra></extra>",
-    )
-    
-    chart.update_layout(
-        title=dict(text="Research Income", font=dict(color="#9b58b6")),
+    for trace in chart['data']:
+        figures.update(trace, dict(
+            marker=dict(color="#800080"),
+            hoverlabel=dict(bgcolor="rgba(255, 255, 255, 0.1)", font=dict(size=12)),
+            hovertemplate="<b>%{x}</b><br>Value: £%{y:,}<extra></extra>",
+        ))
+
+    figures.update(chart['layout'], dict(
+        title=dict(text="Research Income", font=dict(color="#9b58b6", size=18)),
         xaxis=dict(
             title=dict(text="Year", font=dict(size=14)), 
             color="#9b58b6",
@@ -322,41 +363,17 @@ def generateIncomeChart(type, ins, uoa, reg):
             ),
         showlegend=False,
         plot_bgcolor="rgba(0, 0, 0, 0)",
-        title_font_size=18,
-        font_family="Inter, sans-serif",
+        font=dict(family="Inter, sans-serif"),
         margin = dict(t=50, l=35, r=35, b=10),
-    )
+    ))
 
     return chart
 
+@memo.memoize(data_version, key=scoped_key, figures=True)
 def generatePhdChartAndKPICard(type, ins, uoa, reg):
-    agg_func_dict = {
-            '2013': 'sum',
-            '2014': 'sum',
-            '2015': 'sum',
-            '2016': 'sum',
-            '2017': 'sum',
-            '2018': 'sum',
-            '2019': 'sum',
-            'Total':'sum'
-        }
-    
-    if type == 'ins':
-        if (uoa == "All"):
-            df_agg = phd_df.loc[(phd_df["Institution name"] == ins)].agg(agg_func_dict)
-        else:
-            df_agg = phd_df.loc[(phd_df["Institution name"] == ins) &
-                                    (phd_df["UOA name"] == uoa)].agg(agg_func_dict)
-    elif type == 'reg':
-        df = phd_df[phd_df['Region'] == reg]
-        if (uoa != 'All'):
-            df = df[df['UOA name'] == uoa]
-        df_agg = df.agg(agg_func_dict)
-    else:
-        df = phd_df
-        if uoa != 'All':
-            df = phd_df[phd_df['UOA name'] == uoa]
-        df_agg = df.agg(agg_func_dict)
+    # yearly phd sums, precomputed per view & uoa
+    view, scope = data_cube.scope_of(type, ins, reg)
+    df_agg = data_cube.lookup(phd_df, 'phd', view, scope, uoa)
     
     total_phds = df_agg['Total']
 
@@ -372,17 +389,17 @@ def generatePhdChartAndKPICard(type, ins, uoa, reg):
         '2019':"19'",
     })
 
-    phd_awarded_chart = px.line(df_agg,
-                                markers=True)
+    phd_awarded_chart = figures.line(df_agg.index, df_agg.to_numpy())
 
-    phd_awarded_chart.update_traces(
-        marker_color="#800080",
-        hoverlabel=dict(bgcolor="rgba(255, 255, 255, 0.1)", font_size=12),
-        hovertemplate="<b>%{x}</b><br>PhDs Awarded: %{y}<extra></extra>",
-    )
+    for trace in phd_awarded_chart['data']:
+        figures.update(trace, dict(
+            marker=dict(color="#800080"),
+            hoverlabel=dict(bgcolor="rgba(255, 255, 255, 0.1)", font=dict(size=12)),
+            hovertemplate="<b>%{x}</b><br>PhDs Awarded: %{y}<extra></extra>",
+        ))
 
-    phd_awarded_chart.update_layout(
-        title=dict(text="PhDs Awarded", font=dict(color="#9b58b6")),
+    figures.update(phd_awarded_chart['layout'], dict(
+        title=dict(text="PhDs Awarded", font=dict(color="#9b58b6", size=18)),
         xaxis=dict(
             title=dict(text="Year", font=dict(size=14)),
             color="#9b58b6",
@@ -395,12 +412,14 @@ def generatePhdChartAndKPICard(type, ins, uoa, reg):
             ),
         showlegend = False,
         plot_bgcolor="rgba(0, 0, 0, 0)",
-        title_font_size=18,
-        font_family="Inter, sans-serif",
+        font=dict(family="Inter, sans-serif"),
         margin = dict(t=50, l=35, r=35, b=20),
-    )
+    ))
 
-    phd_kpi_card = generateKPICard(
+    return phd_awarded_chart, phdKPICard(total_phds)
+
+def phdKPICard(total_phds):
+    return generateKPICard(
         "PhDs Awarded",
         format_value(total_phds),
         "2013-2019 (Total)",
@@ -408,46 +427,36 @@ def generatePhdChartAndKPICard(type, ins, uoa, reg):
         "Number of research doctoral degrees awarded by the institution for academic years 2013-14 to 2018-19"
     ) 
 
-    return phd_awarded_chart, phd_kpi_card
+def generatePhdKPICard(type, ins, uoa, reg):
+    # total phds, precomputed per view & uoa
+    view, scope = data_cube.scope_of(type, ins, reg)
+    return phdKPICard(data_cube.lookup(phd_df, 'phd', view, scope, uoa)['Total'])
+
+def incomeBySource(type, uni, uoa, reg):
+    # per-source income totals (excluding total income), precomputed per view & uoa
+    view, scope = data_cube.scope_of(type, uni, reg)
+    income_filter_agg = data_cube.lookup(income_df, 'income_by_source', view, scope, uoa).reset_index()
+    if view != 'nat':
+        income_filter_agg = income_filter_agg.sort_values(by="2013-2020 (total)", ascending=False)
+    return income_filter_agg
+
+def incomeKPICard(total_income):
+    return generateKPICard(
+        "Research Income",
+        f'£{format_value(int(total_income))}',
+        "2013-2020 (Total)",
+        'income',
+        "Research income (non-in-kind) received for the selected UoA from 2013-2020."
+    )  
+
+def generateIncomeKPICard(type, uni, uoa, reg):
+    return incomeKPICard(incomeBySource(type, uni, uoa, reg)['2013-2020 (total)'].sum())
 
+@memo.memoize(data_version, key=scoped_key, figures=True)
 def generateIncomeCategoryChartAndKPICard(type, uni, uoa, reg):
-    if type == 'ins':
-        if (uoa == 'All'):
-            df = income_df.loc[
-                (income_df["Institution name"] == uni) &
-                (income_df["Income source"] != "Total income")
-            ]
-        else:
-            df = income_df.loc[
-                (income_df["Institution name"] == uni) &
-                (income_df["Income source"] != "Total income") &
-                (income_df["UOA name"] == uoa)
-            ]
-        # copy of income df to filter
-        income_filter_agg = df.groupby('Income source')\
-                                    .agg({'2013-2020 (total)':'sum'})\
-                                    .reset_index()\
-                                    .sort_values(by="2013-2020 (total)",ascending=False)
-    elif type == 'reg':
-        # filtering df by region and to exclude total income 
-        df = income_df.loc[
-            (income_df['Income source'] != 'Total income') &
-            (income_df['Region'] == reg)
-        ]
-        if (uoa != 'All'):
-            # filter by uoa
-            df = df[df['UOA name'] == uoa]
-        income_filter_agg = df.groupby(['Region', 'Income source'])\
-                                    .agg({'2013-2020 (total)':'sum'})\
-                                    .reset_index()\
-                                    .sort_values(by='2013-2020 (total)', ascending=False)
-    else:
-        df = income_df[income_df['Income source'] != 'Total income']
-        if uoa != 'All':
-            df = df[df['UOA name'] == uoa]
-        income_filter_agg = df.groupby('Income source').agg({'2013-2020 (total)':'sum'}).reset_index()
+    income_filter_agg = incomeBySource(type, uni, uoa, reg)
 
-    income_filter_agg.loc[:,'Income source'] = income_filter_agg['Income source'].apply(customwrap)
+    income_filter_agg['Income source'] = income_filter_agg['Income source'].apply(customwrap)
     
     total_income = income_filter_agg['2013-2020 (total)'].sum()
 
@@ -474,15 +483,7 @@ def generateIncomeCategoryChartAndKPICard(type, uni, uoa, reg):
         texttemplate="%{label}<br><br>£%{value}",
     )
 
-    inc_kpi_card = generateKPICard(
-        "Research Income",
-        f'£{format_value(int(total_income))}',
-        "2013-2020 (Total)",
-        'income',
-        "Research income (non-in-kind) received for the selected UoA from 2013-2020."
-    )  
-
-    return income_cat_chart, inc_kpi_card
+    return income_cat_chart, incomeKPICard(total_income)
 
 def generateKPICard(title, value, subtitle, icon_id, tooltip):
     return html.Div([
@@ -503,34 +504,9 @@ def generateKPICard(title, value, subtitle, icon_id, tooltip):
     ])
 
 def generateStaffFTEKPICard(type, uni, uoa, reg):
-    if type == 'ins':
-        if (uoa == 'All'):
-            df = results_df.loc[
-                (results_df["Institution name"] == uni) & 
-                 (results_df['Profile'] == 'Overall')
-            ]
-        else:
-            df = results_df.loc[
-                (results_df["Institution name"] == uni) &
-                (results_df["UOA name"] == uoa) &
-                (results_df['Profile'] == 'Overall')
-            ]
-    elif type == 'reg':
-        df = results_df[(results_df['Region'] == reg) &
-                        (results_df['Profile'] == 'Overall')]
-        if uoa != 'All':
-            df = df[df['UOA name'] == uoa]
-    else:
-        if uoa != 'All':
-            df = results_df[(results_df['UOA name'] == uoa)&
-                            (results_df['Profile'] == 'Overall')]
-        else:
-            df = results_df[results_df["Profile"] == "Overall"]
-    
-    # check if any multiple submissions
-    df = df.groupby('UOA name').agg({'FTE staff':'sum'})
-    
-    total = df['FTE staff'].sum()
+    # sum of the overall profile's FTE, precomputed per view & uoa
+    view, scope = data_cube.scope_of(type, uni, reg)
+    total = data_cube.lookup(results_df, 'fte', view, scope, uoa)['FTE staff']
 
     fte_kpi_card = generateKPICard(
         "Staff FTE",
@@ -543,27 +519,9 @@ def generateStaffFTEKPICard(type, uni, uoa, reg):
     return fte_kpi_card
 
 def generateInKindKPICard(type, uni, uoa, reg):
-    df = incomeiK_df[incomeiK_df['Income source'] != 'Total income']
-
-    if type == 'ins':
-        if (uoa == 'All'):
-            df = df.loc[
-                (df["Institution name"] == uni)
-            ]
-        else:
-            df = df.loc[
-                (df["Institution name"] == uni) &
-                (df["UOA name"] == uoa)
-            ]
-    elif type == 'reg':
-        df = df[df['Region'] == reg]
-        if uoa != 'All':
-            df = df[df['UOA name'] == uoa]
-    else:
-        if uoa != 'All':
-            df = df[df["UOA name"] == uoa]
-    
-    total = df['2013-2020 (total)'].sum()
+    # in-kind total (excluding total income rows), precomputed per view & uoa
+    view, scope = data_cube.scope_of(type, uni, reg)
+    total = data_cube.lookup(incomeiK_df, 'in_kind', view, scope, uoa)['2013-2020 (total)']
 
     ik_kpi_card = generateKPICard(
         "Income In-Kind",
@@ -575,38 +533,58 @@ def generateInKindKPICard(type, uni, uoa, reg):
 
     return ik_kpi_card
 
-def generateQualityPieChart(uni, uoa, profile):
-    # filtering profile & uni
-    df = results_df[
-        (results_df["Profile"] == profile) &
-        (results_df["Institution name"] == uni)
-        ].reset_index()
+@memo.memoize(data_version, key=scoped_key)
+def generateKPICards(type, uni, uoa, reg):
+    """
+    Builds the Multi-level View's row of KPI cards for a selection.
 
-    # filter uoa
-    if uoa != "All":
-        df = df[df["UOA name"] == uoa].reset_index()
+    Returns:
+    tuple: The staff FTE, research income, income in-kind and PhDs awarded cards.
+    """
+    return (
+        generateStaffFTEKPICard(type, uni, uoa, reg),
+        generateIncomeKPICard(type, uni, uoa, reg),
+        generateInKindKPICard(type, uni, uoa, reg),
+        generatePhdKPICard(type, uni, uoa, reg),
+    )
 
+@memo.memoize(data_version)
+def generateQualityProfiles(uni, uoa):
+    """
+    Returns the quality pie's slices for every profile of an institution & uoa,
+    sent to the browser once so the pie's profile is switched clientside.
 
-    df = df.groupby(["Institution name"]).agg(
-        {
-            '4*':'mean',
-            '3*':'mean',
-            '2*':'mean',
-            '1*':'mean',
-            "0*":"mean"
-            }).reset_index()
+    Returns:
+    dict: Profile -> {'labels': ratings, 'values': percentages}, largest first.
+    """
+    # mean quality profile of uni & uoa, precomputed per profile
+    stars = data_cube.lookup(results_df, 'quality', 'ins', uni, uoa)
+    profiles = {}
+    for profile in stars.index:
+        df = stars[stars.index == profile].reset_index(drop=True)
+        df.insert(0, "Institution name", uni)
+
+        df_melted = df.melt(
+            id_vars=["Institution name"],  # Columns to keep
+            var_name="Rating",  # Name for new column that holds '4*', '3*', etc.
+            value_name="Percentage"  # Name for new column that holds the values
+        ).sort_values(by="Percentage", ascending=False)
+
+        profiles[profile] = {
+            'labels': df_melted['Rating'].tolist(),
+            'values': df_melted['Percentage'].tolist(),
+        }
+    return profiles
 
-    df_melted = df.melt(
-        id_vars=["Institution name"],  # Columns to keep
-        var_name="Rating",  # Name for new column that holds '4*', '3*', etc.
-        value_name="Percentage"  # Name for new column that holds the values
-    ).sort_values(by="Percentage", ascending=False)
+@memo.memoize(data_version, figures=True)
+def generateQualityPieChart(uni, uoa, profile):
+    slices = generateQualityProfiles(uni, uoa).get(profile, {'labels': [], 'values': []})
 
     chart = go.Figure(
         data=[
             go.Pie(
-                labels=df_melted['Rating'],
-                values=df_melted['Percentage'],
+                labels=slices['labels'],
+                values=slices['values'],
             )
         ]
     )
@@ -642,52 +620,93 @@ def generateQualityPieChart(uni, uoa, profile):
 
     return chart
 
-def generateRankingCards(type, uni, uoa):
-    if (type == 'reg') or (type == 'nat'):
-        return ['', '']
-    
-    results_overall = results_df[results_df["Profile"] == "Overall"]
-
-    if uoa != "All":
-        results_overall = results_overall[results_overall["UOA name"] == uoa]
-
-    region = results_df.loc[
-        results_df["Institution name"] == uni,
-        "Region"
-        ].values[0]
-
-    national_overall = results_overall.groupby(
-        "Institution name"
-    ).agg({
-        "GPA":"mean"
-    }).sort_values(by='GPA', ascending=False).reset_index()
+@memo.memoize(
+    data_version,
+    key=lambda type, uni, uoa, reg, weighted=False: (*data_cube.scope_of(type, uni, reg), uoa, bool(weighted)),
+)
+def generateGPACards(type, uni, uoa, reg, weighted=False):
+    """
+    Returns the values of the Multi-level View's four GPA cards for a selection.
 
-    overall_reg_df = results_overall[results_overall["Region"] == region]
+    Returns:
+    tuple: The Overall, Outputs, Impact and Environment GPAs, rounded to 2 decimals (NaN where missing).
+    """
+    # mean (or FTE-weighted) GPA per profile, precomputed per view & uoa
+    measure = 'gpa_fte' if weighted else 'gpa'
+    gpa = data_cube.lookup(results_df, measure, *data_cube.scope_of(type, uni, reg), uoa)['GPA']
+    return tuple(np.round(gpa.get(profile, np.nan), 2) for profile in ['Overall', 'Outputs', 'Impact', 'Environment'])
 
-    regional_overall = overall_reg_df.groupby(
-        "Institution name",
-    ).agg({
-        "GPA":"mean"
-    }).sort_values(by='GPA', ascending=False).reset_index()
+def ranking_key(type, uni, uoa, weighted=False):
+    # institutions only: the regional and national views show no rankings
+    if (type == 'reg') or (type == 'nat'):
+        return (None,)
+    return (uni, uoa, bool(weighted))
 
-    nat_ranking = int(national_overall.index[national_overall["Institution name"] == uni][0])
-    reg_ranking = int(regional_overall.index[regional_overall["Institution name"] == uni][0])
+@memo.memoize(data_version, key=ranking_key)
+def generateRankingCards(type, uni, uoa, weighted=False):
+    if (type == 'reg') or (type == 'nat'):
+        return ['', '']
+    
+    # overall gpa (or fte-weighted gpa) positions, precomputed per uoa
+    nat_ranking, reg_ranking = data_cube.rankings_for(results_df, weighted).get(uni, uoa)
 
     fig_nat = html.Div([
         html.H1("National Ranking", className='subtitle-medium-18-color'),
-        html.H1(nat_ranking+1, className="ranking-title-color"),
+        html.H1(nat_ranking, className="ranking-title-color"),
         html.H3("Overall Research Quality", className='subtitle-small-color'),
     ])
 
     fig_reg = html.Div([
         html.H1("Regional Ranking", className='subtitle-medium-18-color'),
-        html.H1(reg_ranking+1, className="ranking-title-color"),
+        html.H1(reg_ranking, className="ranking-title-color"),
         html.H3("Overall Research Quality", className='subtitle-small-color'),
     ])
 
     return [fig_nat, fig_reg]
 
+def format_rank(entry):
+    """
+    Formats a (rank, group size, percentile) entry of metric_ranks as a table
+    cell, e.g. (6, 31, 80.6) as "6 / 31" over "81st pct"; '–' when unranked.
+    """
+    if entry is None:
+        return '–'
+    rank, size, pct = entry
+    pct = int(round(pct))
+    suffix = 'th' if 10 <= pct % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(pct % 10, 'th')
+    return [f'{rank} / {size}', html.Br(), html.Small(f'{pct}{suffix} pct', className='text-muted')]
+
+@memo.memoize(data_version, key=ranking_key)
+def generateMetricRankCard(type, uni, uoa, weighted=False):
+    if (type == 'reg') or (type == 'nat'):
+        return ''
+
+    # every metric's national, regional & main panel rank, precomputed at load
+    ranks = metric_ranks.get(uni, uoa, weighted)
+    panel = metric_ranks.panel_label(metric_ranks.get_panel(uoa)) if uoa != 'All' else 'Main panel'
+
+    return html.Div([
+        html.H1("Rank & Percentile by Metric", className='subtitle-medium-18-color'),
+        dbc.Table(
+            [
+                html.Thead(html.Tr([html.Th("Metric"), html.Th("National"), html.Th("Region"), html.Th(panel)])),
+                html.Tbody([
+                    html.Tr([html.Td(metric)] + [html.Td(format_rank(scopes[scope])) for scope in metric_ranks.SCOPES])
+                    for metric, scopes in ranks.items()
+                ]),
+            ],
+            hover=True,
+            responsive=True,
+            size='sm',
+        ),
+    ])
+
 ## Visualisation Generation for Regional Overview page
+@memo.memoize(
+    data_version,
+    key=lambda chart_type, region, uoa, gpa_profile: (chart_type, memo.unordered(region), uoa, gpa_profile),
+    figures=True,
+)
 def generateRegionScatterPlots(chart_type, region, uoa, gpa_profile):
     if chart_type == 'phd':
         df = phd_df
@@ -716,31 +735,31 @@ def generateRegionScatterPlots(chart_type, region, uoa, gpa_profile):
                          (results_df['Profile'] == gpa_profile)]
         metric = df[df['Region'].isin(region)]
 
-    gpa_means = gpa.groupby(['Institution name']).agg({'GPA':'mean'}).reset_index()
-    metric_totals = metric.groupby(['Institution name']).agg({x_value:'sum'}).reset_index()
+    gpa_means = aggregate(gpa, 'Institution name', {'GPA':'mean'})
+    metric_totals = aggregate(metric, 'Institution name', {x_value:'sum'})
 
     gpa_metric = gpa_means.merge(metric_totals, on='Institution name')
     gpa_metric = gpa_metric.merge(regions_mapping, on='Institution name')
 
-    fig = px.scatter(
-        gpa_metric,
-        x=x_value,
-        y='GPA',
-        hover_name='Institution name',
-        color='Region',
+    fig = figures.scatter(
+        gpa_metric[x_value].to_numpy(),
+        gpa_metric['GPA'].to_numpy(),
+        color=gpa_metric['Region'].to_numpy(dtype=object),
+        hover_name=gpa_metric['Institution name'].to_numpy(dtype=object),
+        labels={'x': x_value, 'y': 'GPA', 'color': 'Region'},
         log_x=True
     )
 
-    fig.update_layout(
-        title=dict(text=title, font=dict(color="#9b58b6")),
+    figures.update(fig['layout'], dict(
+        title=dict(text=title, font=dict(color="#9b58b6", size=18)),
         xaxis=dict(
-            title=x_label,
+            title=dict(text=x_label),
             color="#9b58b6",
             tickfont=dict(color="#9b58b6"),
             gridcolor='lightgrey'
             ),
         yaxis=dict(
-            title=f"{gpa_profile} GPA",
+            title=dict(text=f"{gpa_profile} GPA"),
             color="#9b58b6",
             tickfont=dict(color="#9b58b6"),
             gridcolor='lightgrey',
@@ -748,8 +767,7 @@ def generateRegionScatterPlots(chart_type, region, uoa, gpa_profile):
             ),
         plot_bgcolor="rgba(0, 0, 0, 0)",
         showlegend=True,
-        title_font_size=18,
-        font_family="Inter, sans-serif",
+        font=dict(family="Inter, sans-serif"),
         margin = dict(t=50, l=35, r=35, b=10),
 
         legend=dict(
@@ -763,10 +781,15 @@ def generateRegionScatterPlots(chart_type, region, uoa, gpa_profile):
                 color="#9b58b6",  # Font color (can be any valid CSS color)
             )
         )
-    )
+    ))
 
     return fig
 
+@memo.memoize(
+    data_version,
+    key=lambda chart_type, region, uoa: (chart_type, memo.unordered(region), uoa),
+    figures=True,
+)
 def generateRegionLineCharts(chart_type, region, uoa):
     if chart_type == 'phd':
         df = phd_df
@@ -782,7 +805,7 @@ def generateRegionLineCharts(chart_type, region, uoa):
         title = "PhDs Awarded by Region"
         x_axis_label = "PhDs Awarded"
     if chart_type == 'income':
-        df = income_df[income_df['Income source'] != 'Total income']
+        df = data_partition.source_rows(income_df)
         aggfunc = {
             '2013-14': 'sum',
             '2014-15': 'sum',
@@ -796,31 +819,27 @@ def generateRegionLineCharts(chart_type, region, uoa):
     if uoa != 'All':
         df = df[df['UOA name'] == uoa]
 
-    grouped_df = df.groupby(["Region"]).agg(aggfunc).reset_index()
+    grouped_df = aggregate(df, "Region", aggfunc)
 
-    df_melted = grouped_df.melt(id_vars=["Region"], 
-                     var_name="Year", 
-                     value_name="Value")
-    
-    if chart_type == 'phd':
-        df_melted["Year"] = df_melted["Year"].astype(int)
+    # one line per region through its yearly sums, years in aggfunc's order
+    years = [int(year) for year in aggfunc] if chart_type == 'phd' else list(aggfunc)
+    values = grouped_df[list(aggfunc)].to_numpy()
+    regions = grouped_df["Region"].to_numpy(dtype=object)
 
-    fig = px.line(df_melted, 
-                x="Year", 
-                y="Value", 
-                color="Region",  # different lines for each region
-                markers=True,  # show markers at each year
-                )
+    fig = figures.line(
+        np.tile(np.array(years), len(regions)),
+        values.ravel(),
+        color=np.repeat(regions, len(years)),
+        labels={'x': 'Year', 'y': 'Value', 'color': 'Region'},
+    )
 
     annotations = []
 
-    colors = {trace.name: trace.line.color for trace in fig.data}
+    colors = {trace['name']: trace['line']['color'] for trace in fig['data']}
 
-    for region in df_melted["Region"].unique():
-        region_data = df_melted[df_melted["Region"] == region]
-        
-        # get the last point (end of the line)
-        x_end, y_end = region_data["Year"].iloc[-1], region_data["Value"].iloc[-1]
+    for region, y_end in zip(regions, values[:, -1]):
+        # the last point (end of the line)
+        x_end = years[-1]
 
         line_color = colors.get(region, "black")  # Default to black if not found
 
@@ -835,10 +854,10 @@ def generateRegionLineCharts(chart_type, region, uoa):
             font=dict(size=12, color=line_color)
         ))
     
-    fig.update_layout(
-        title=dict(text=title, font=dict(color="#9b58b6")),
+    figures.update(fig['layout'], dict(
+        title=dict(text=title, font=dict(color="#9b58b6", size=18)),
         xaxis=dict(
-            title="Year",
+            title=dict(text="Year"),
             color="#9b58b6",
             tickfont=dict(color="#9b58b6"),
             gridcolor='lightgrey'
@@ -851,107 +870,142 @@ def generateRegionLineCharts(chart_type, region, uoa):
             ),
         plot_bgcolor="rgba(0, 0, 0, 0)",
         showlegend=False,
-        title_font_size=18,
-        font_family="Inter, sans-serif",
+        font=dict(family="Inter, sans-serif"),
         margin = dict(t=50, l=35, r=35, b=10),
         annotations = annotations
-    )
+    ))
 
     return fig
 
-def generateRegionIncomeSankey(region, uoa):
-    income_cat = {
-        "UK Sources":[
-            'BEIS Research Councils, The Royal Society, British Academy and The Royal Society of Edinburgh',
-            'UK-based charities (open competitive process)',
-            'UK-based charities (other)',
-            'UK central government bodies/local authorities, health and hospital authorities',
-            'Health research funding bodies',
-            'UK central government tax credits for research and development expenditure',
-            'UK industry, commerce and public corporations',
-            'UK other sources'
-        ],
-        "EU Sources":[
-            'EU government bodies',
-            'EU-based charities (open competitive process)',
-            'EU industry, commerce and public corporations',
-            'EU (excluding UK) other',
-        ],
-        "Non-EU Sources":[
-            'Non-EU-based charities (open competitive process)',
-            'Non-EU industry commerce and public corporations', 
-            'Non-EU other',
-        ]
-    }
-
-    category_colors = {
-        "UK Sources": "rgba(166, 206, 227, 0.6)",        
-        "EU Sources": "rgba(178, 223, 138, 0.6)",        
-        "Non-EU Sources": "rgba(255, 164, 140, 0.6)",    
-    }
-
-    #darker shades of category_colors for the nodes
-    node_colors = {
-        "UK Sources": "#7198ac",        
-        "EU Sources": "#7ca857",        
-        "Non-EU Sources": "#c08c00",    
-    }
-
-    df = income_df
-    df = df[~df["Income source"].isin(["Total income"])]
+# income source -> category of the income Sankey; sources are listed in node order
+INCOME_CATEGORIES = {
+    "UK Sources":[
+        'BEIS Research Councils, The Royal Society, British Academy and The Royal Society of Edinburgh',
+        'UK-based charities (open competitive process)',
+        'UK-based charities (other)',
+        'UK central government bodies/local authorities, health and hospital authorities',
+        'Health research funding bodies',
+        'UK central government tax credits for research and development expenditure',
+        'UK industry, commerce and public corporations',
+        'UK other sources'
+    ],
+    "EU Sources":[
+        'EU government bodies',
+        'EU-based charities (open competitive process)',
+        'EU industry, commerce and public corporations',
+        'EU (excluding UK) other',
+    ],
+    "Non-EU Sources":[
+        'Non-EU-based charities (open competitive process)',
+        'Non-EU industry commerce and public corporations',
+        'Non-EU other',
+    ]
+}
+SOURCE_CATEGORY = {src: cat for cat, sources in INCOME_CATEGORIES.items() for src in sources}
+
+# node collapsing the sources below the Sankey's other_share
+OTHER_SOURCES = "Other sources"
+
+# flow colour of each category
+CATEGORY_COLORS = {
+    "UK Sources": "rgba(166, 206, 227, 0.6)",
+    "EU Sources": "rgba(178, 223, 138, 0.6)",
+    "Non-EU Sources": "rgba(255, 164, 140, 0.6)",
+}
+
+# darker shades of CATEGORY_COLORS for the nodes
+CATEGORY_NODE_COLORS = {
+    "UK Sources": "#7198ac",
+    "EU Sources": "#7ca857",
+    "Non-EU Sources": "#c08c00",
+}
+
+def sankeyLinks(source, target, values, size):
+    """
+    Sums parallel flows into one link per (source, target) node pair.
+
+    Parameters:
+    source (np.ndarray): Source node index of each flow.
+    target (np.ndarray): Target node index of each flow.
+    values (np.ndarray): The flows.
+    size (int): Number of nodes.
+
+    Returns:
+    tuple: (source, target, values) arrays of the links, in node order.
+    """
+    pairs, inverse = np.unique(source * size + target, return_inverse=True)
+    return pairs // size, pairs % size, np.bincount(inverse, weights=values, minlength=len(pairs))
+
+@memo.memoize(
+    data_version,
+    key=lambda region, uoa, other_share=None: (memo.unordered(region), uoa, other_share),
+    figures=True,
+)
+def generateRegionIncomeSankey(region, uoa, other_share=None):
+    """
+    Builds the Sankey of the regions' income, from each source through its category to each region.
+
+    Nodes are listed in a fixed order - sources, categories, then regions by name -
+    so the figure (and its colours) does not depend on the order the regions were
+    selected in, and the same selection always gives the same figure.
+
+    Parameters:
+    region (list): Region names.
+    uoa (str): UOA name, or 'All'.
+    other_share (float): Optionally, collapse the sources below this share of the
+        total income into one "Other sources" node.
+    """
+    df = data_partition.source_rows(income_df)
     df = df[df["Region"].isin(region)]
 
     if uoa != 'All':
         df = df[df['UOA name'] == uoa]
 
-    df = df.groupby(['Region', 'Income source']).agg({'2013-2020 (total)':'sum'}).reset_index()
-
-    df["Category"] = df["Income source"].map(
-        {src: cat for cat, sources in income_cat.items() for src in sources}
-    )
-
-    all_nodes = list(set(df["Income source"]) | set(df["Category"]) | set(df["Region"]))
-
-    # map labels to indices
-    source_indices = [all_nodes.index(src) for src in df["Income source"]]
-    category_indices = [all_nodes.index(cat) for cat in df["Category"]]
-
-    # create source and target lists
-    source = source_indices  
-    target = category_indices  
-    values = list(df["2013-2020 (total)"]) 
-
-    flow_colors_individual = [category_colors[df["Category"].iloc[i]] for i in range(len(source_indices))]
-
-    aggregated_flows = df.groupby(['Category', 'Region'])['2013-2020 (total)'].sum().reset_index()
-
-    # map the indices for aggregated flows (Category → Region)
-    agg_source_indices = [all_nodes.index(cat) for cat in aggregated_flows['Category']]
-    agg_target_indices = [all_nodes.index(reg) for reg in aggregated_flows['Region']]
-    agg_values = list(aggregated_flows['2013-2020 (total)'])
-
-    flow_colors_aggregated = [category_colors[cat] for cat in aggregated_flows["Category"]]
-
-    # update the source, target, and values to reflect the aggregated flows
-    source += agg_source_indices
-    target += agg_target_indices
-    values += agg_values
-    flow_colors = flow_colors_individual + flow_colors_aggregated
-
-    node_color_list = []
-    for node in all_nodes:
-        if node in income_cat["UK Sources"] or node == "UK Sources":
-            node_color_list.append(node_colors["UK Sources"])  # Darker shade for nodes
-        elif node in income_cat["EU Sources"] or node == "EU Sources":
-            node_color_list.append(node_colors["EU Sources"])  # Darker shade for nodes
-        elif node in income_cat["Non-EU Sources"] or node == "Non-EU Sources":
-            node_color_list.append(node_colors["Non-EU Sources"])  # Darker shade for nodes
-        elif node in region:
-            node_color_list.append('#e59b59')
-        else:
-            node_color_list.append("gray")
-    
-    wrapped_labels = [customwrap(label, width=40) for label in all_nodes]
+    df = aggregate(df, ['Region', 'Income source'], {'2013-2020 (total)':'sum'})
+    df = df[df["Income source"].isin(list(SOURCE_CATEGORY))]
+    sources = df["Income source"].astype(str).to_numpy(dtype=object)
+    regions = df["Region"].astype(str).to_numpy(dtype=object)
+    categories = np.array([SOURCE_CATEGORY[src] for src in sources], dtype=object)
+    values = df["2013-2020 (total)"].to_numpy(dtype=np.float64)
+
+    if other_share:
+        names, inverse = np.unique(sources, return_inverse=True)
+        totals = np.bincount(inverse, weights=values, minlength=len(names))
+        small = totals < other_share * values.sum()
+        if small.sum() > 1:
+            sources = np.where(small[inverse], OTHER_SOURCES, sources)
+
+    # fixed node order; only the nodes with flows are shown
+    present = set(sources) | set(categories) | set(regions)
+    order = list(SOURCE_CATEGORY) + [OTHER_SOURCES] + list(INCOME_CATEGORIES) + sorted(set(regions))
+    nodes = [node for node in order if node in present]
+    index = {node: i for i, node in enumerate(nodes)}
+    source_index = np.array([index[node] for node in sources], dtype=np.int64)
+    category_index = np.array([index[node] for node in categories], dtype=np.int64)
+    region_index = np.array([index[node] for node in regions], dtype=np.int64)
+
+    # source -> category flows summed over the regions, then category -> region flows
+    links = [
+        sankeyLinks(source_index, category_index, values, len(nodes)),
+        sankeyLinks(category_index, region_index, values, len(nodes)),
+    ]
+    source = np.concatenate([link[0] for link in links])
+    target = np.concatenate([link[1] for link in links])
+    link_values = np.concatenate([link[2] for link in links])
+
+    # colour flows by their category: the target of a source's flow, the source of a region's
+    node_category = [SOURCE_CATEGORY.get(node, node) for node in nodes]
+    flow_category = [node_category[i] for i in links[0][1]] + [node_category[i] for i in links[1][0]]
+    flow_colors = [CATEGORY_COLORS[cat] for cat in flow_category]
+
+    node_color_list = [
+        CATEGORY_NODE_COLORS[node_category[i]] if node_category[i] in CATEGORY_NODE_COLORS
+        else '#e59b59' if node in region
+        else "gray"
+        for i, node in enumerate(nodes)
+    ]
+
+    wrapped_labels = [customwrap(label, width=40) for label in nodes]
 
     fig = go.Figure(go.Sankey(
         node=dict(
@@ -965,7 +1019,7 @@ def generateRegionIncomeSankey(region, uoa):
         link=dict(
             source=source,
             target=target,
-            value=values,
+            value=link_values,
             color=flow_colors,
             hovertemplate="Flow from %{source.label} → %{target.label}: £%{value:,.2f}<extra></extra>"
         )
@@ -982,55 +1036,51 @@ def generateRegionIncomeSankey(region, uoa):
 
     return fig
 
+# regions keep their order here: it sets the order (and colours) of the curves
+@memo.memoize(data_version, figures=True)
 def generateRegionGPADist(region, uoa, gpa_profile):
-    df = results_df[(results_df["Profile"] == gpa_profile) &
-                    (results_df["Region"].isin(region))]
-    data = []
-
     if uoa != 'All':
-        df = df.groupby('Region').agg({'GPA':'mean'}).reset_index()
+        df = results_df[(results_df["Profile"] == gpa_profile) &
+                        (results_df["Region"].isin(region))]
+        df = aggregate(df, 'Region', {'GPA':'mean'})
         df['GPA'] = np.round(df['GPA'],2)
-        fig = px.bar(
-            df,
-            x='Region',
-            y='GPA',
-            text='GPA',
-            color='Region',
+        fig = figures.bar(
+            df['Region'].to_numpy(dtype=object),
+            df['GPA'].to_numpy(),
+            labels={'x': 'Region', 'y': 'GPA'},
         )
 
-        fig.update_layout(
-            title=dict(text=f"{gpa_profile} GPA Comparison", font=dict(color="#9b58b6")),
+        figures.update(fig['layout'], dict(
+            title=dict(text=f"{gpa_profile} GPA Comparison", font=dict(color="#9b58b6", size=18)),
             xaxis=dict(
-                title="Region",
+                title=dict(text="Region"),
                 color="#9b58b6",
                 tickfont=dict(color="#9b58b6"),
                 ),
             yaxis=dict(
-                title=f"{gpa_profile} GPA",
+                title=dict(text=f"{gpa_profile} GPA"),
                 color="#9b58b6",
                 tickfont=dict(color="#9b58b6"),
                 range=[0,4],
                 ),
             plot_bgcolor="rgba(0, 0, 0, 0)",
             showlegend=False,
-            title_font_size=18,
-            font_family="Inter, sans-serif",
+            font=dict(family="Inter, sans-serif"),
             margin = dict(t=50, l=35, r=35, b=10),
-        )
+        ))
 
     else:
-        for r in region:
-            df1 = df[df['Region'] == r]
-            df1 = df1.groupby(['UOA name']).agg({'GPA':'mean'}).reset_index()
-            data.append(df1['GPA'])
-        fig = ff.create_distplot(
-                data, 
-                region,
-                bin_size=.1,
-                curve_type='normal',
-                show_hist=False,
-                show_rug=False
-            )
+        # normal curves of each region's per-UOA mean GPAs, precomputed at load
+        fig = go.Figure(
+            data=densities.densities_for(results_df).traces(region, gpa_profile),
+            layout=dict(
+                barmode="overlay",
+                hovermode="closest",
+                legend=dict(traceorder="reversed"),
+                xaxis1=dict(domain=[0.0, 1.0], anchor="y2", zeroline=False),
+                yaxis1=dict(domain=[0.0, 1], anchor="free", position=0.0),
+            ),
+        )
     
         fig.update_layout(
             title=dict(text=f"{gpa_profile} GPA Distribution by Region", font=dict(color="#9b58b6")),
@@ -1068,20 +1118,37 @@ def generateRegionGPADist(region, uoa, gpa_profile):
 
     return fig
 
-## TBC
-def generateMap(df, data):
+def mapColour(data, weighted=False):
+    """
+    Returns the value column a map metric is coloured by, and the metric's label.
+
+    Parameters:
+    data (str): The map metric ('Overall GPA', 'Income', ...).
+    weighted (bool): Whether GPAs are FTE-weighted.
 
+    Returns:
+    tuple: (value column, label), e.g. ('GPA', 'Overall GPA (FTE-weighted)').
+    """
     if data == "Staff FTE":
         color = "FTE staff"
     if data in ["Overall GPA", 'Outputs GPA', 'Environment GPA', 'Impact GPA']:
         color = "GPA"
+        if weighted:
+            data = f"{data} (FTE-weighted)"
     if data == 'PhDs Awarded':
         color = 'Total'
     if data in ['Income', 'Income In-Kind']:
         color = '2013-2020 (total)'
+    return color, data
+
+## TBC
+def generateMap(df, data, weighted=False, level=geometry.DEFAULT_LEVEL, geojson=None):
+    # level: the regions' geometry's level of detail (see utils/geometry.py), embedded
+    # in the figure unless geojson gives the URL the browser fetches it from instead
+    color, data = mapColour(data, weighted)
 
     map_graph = px.choropleth(df,
-                        geojson=regions_geojson,  
+                        geojson=geometry.load(level) if geojson is None else geojson,  
                         locations="Region",
                         featureidkey="properties.RGN24NM",  # Match with GeoJSON key
                         color=color,
@@ -1111,7 +1178,7 @@ def generateMap(df, data):
     
     return map_graph
 
-def generateDataFrameForMap(data, uoa):
+def generateDataFrameForMap(data, uoa, weighted=False):
     if (data == "Overall GPA"):
         df = results_df[results_df["Profile"] == "Overall"]
         agg_func_dict = {
@@ -1145,13 +1212,13 @@ def generateDataFrameForMap(data, uoa):
         }
         
     if data == "Income":
-        df = income_df[income_df['Income source'] != 'Total income']
+        df = data_partition.source_rows(income_df)
         agg_func_dict = {
             '2013-2020 (total)':'sum'
         }
         
     if data == "Income In-Kind":
-        df = incomeiK_df[incomeiK_df['Income source'] != 'Total income']
+        df = data_partition.source_rows(incomeiK_df)
         agg_func_dict = {
             '2013-2020 (total)':'sum'
         }
@@ -1159,7 +1226,8 @@ def generateDataFrameForMap(data, uoa):
     if uoa != "All":
         df = df[df['UOA name'] == uoa]
     
-    df = df.groupby("Region").agg(agg_func_dict).reset_index()
+    # gpa means can be weighted by staff fte (no effect on the sums)
+    df = aggregate(df, "Region", agg_func_dict, weights='FTE staff' if weighted else None)
 
     return df
 
@@ -0,0 +1,181 @@
+## Compiled columnar cache for the cleaned CSV datasets.
+## Each CSV is compiled into a bundle of NumPy `.npy` column files keyed by a
+## content hash of the source file, so a fresh bundle can be loaded without
+## parsing any CSV, and an edited CSV automatically invalidates its bundle.
+##
+## Build all bundles ahead of time with: python -m utils.data_cache
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = 'data/compiled'
+
+# bump whenever the bundle layout changes, so old bundles are never reused
+FORMAT_VERSION = 1
+
+def source_hash(csv_path):
+    """
+    Returns the content hash that keys a CSV's compiled bundle.
+
+    Parameters:
+    csv_path (str): Path to the source CSV.
+
+    Returns:
+    str: Hex digest of the file contents and the bundle format version.
+    """
+    digest = hashlib.sha256(f"v{FORMAT_VERSION}".encode())
+    with open(csv_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def bundle_path(csv_path, digest):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(CACHE_DIR, f"{name}-{digest[:16]}")
+
+def _encode_column(values):
+    """
+    Splits a column into the arrays stored in the bundle.
+
+    Numeric columns are stored as-is. String columns are stored as integer
+    codes into a vocabulary kept in the manifest (-1 marks a missing value),
+    which keeps the bundle free of pickled objects.
+    """
+    if values.dtype.kind in 'biuf':
+        return {'kind': 'numeric'}, values
+    if values.dtype.kind == 'O':
+        codes, vocab = pd.factorize(values, use_na_sentinel=True)
+        if not all(isinstance(v, str) for v in vocab):
+            raise TypeError("only string object columns can be compiled")
+        return {'kind': 'string', 'vocab': list(vocab)}, codes.astype(np.int32)
+    raise TypeError(f"unsupported column dtype {values.dtype}")
+
+def _decode_column(meta, values, categorical=False):
+    if meta['kind'] == 'numeric':
+        return values
+    if categorical:
+        # codes and vocabulary map straight onto a Categorical
+        return pd.Categorical.from_codes(values, categories=meta['vocab'])
+    # the trailing NaN is picked up by the -1 missing-value code
+    vocab = np.array(meta['vocab'] + [np.nan], dtype=object)
+    return vocab[values]
+
+def write_bundle(df, csv_path, digest=None):
+    """
+    Compiles a DataFrame into the bundle for its source CSV.
+
+    The bundle is written to a temporary directory and renamed into place,
+    so readers never see a partially written bundle. Stale bundles for the
+    same CSV are removed.
+
+    Parameters:
+    df (pd.DataFrame): The parsed contents of csv_path.
+    csv_path (str): Path to the source CSV.
+    digest (str): The source hash, if already computed.
+
+    Returns:
+    str: Path to the bundle directory.
+    """
+    digest = digest or source_hash(csv_path)
+    target = bundle_path(csv_path, digest)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=CACHE_DIR, prefix='.build-')
+
+    try:
+        manifest = {'source_hash': digest, 'rows': len(df), 'columns': []}
+        for i, col in enumerate(df.columns):
+            meta, values = _encode_column(df[col].to_numpy())
+            np.save(os.path.join(tmp, f"{i}.npy"), values, allow_pickle=False)
+            manifest['columns'].append({'name': col, **meta})
+
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            # another worker has already published this bundle
+            shutil.rmtree(tmp, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    # drop bundles compiled from older versions of the same CSV
+    prefix = os.path.basename(target).rsplit('-', 1)[0] + '-'
+    for entry in os.listdir(CACHE_DIR):
+        if entry.startswith(prefix) and entry != os.path.basename(target):
+            shutil.rmtree(os.path.join(CACHE_DIR, entry), ignore_errors=True)
+
+    return target
+
+def read_bundle(path, categorical=()):
+    """
+    Loads a compiled bundle back into a DataFrame.
+
+    Parameters:
+    path (str): Path to the bundle directory.
+    categorical (iterable): String columns to return as pandas Categoricals
+        built directly from the stored codes, rather than as object columns.
+
+    Returns:
+    pd.DataFrame: The dataset, with the same columns and dtypes as the CSV
+        (apart from the requested categorical columns).
+    """
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+
+    return pd.DataFrame({
+        meta['name']: _decode_column(
+            meta,
+            np.load(os.path.join(path, f"{i}.npy"), allow_pickle=False),
+            meta['name'] in categorical
+        )
+        for i, meta in enumerate(manifest['columns'])
+    })
+
+def read_csv_cached(csv_path, categorical=()):
+    """
+    Reads a CSV through its compiled bundle.
+
+    Loads the bundle when it matches the CSV's current content hash.
+    Otherwise parses the CSV and rebuilds the bundle for next time; a
+    failure to write the bundle (e.g. a read-only disk) is not an error.
+
+    Parameters:
+    csv_path (str): Path to the source CSV.
+    categorical (iterable): Columns to return as Categoricals when loading
+        from the bundle (see read_bundle). Columns parsed from the CSV are
+        returned as-is.
+
+    Returns:
+    pd.DataFrame: The dataset.
+    """
+    digest = source_hash(csv_path)
+    path = bundle_path(csv_path, digest)
+
+    if os.path.isdir(path):
+        try:
+            return read_bundle(path, categorical)
+        except (OSError, ValueError, KeyError):
+            # corrupt bundle - remove it so it is rebuilt below
+            shutil.rmtree(path, ignore_errors=True)
+
+    df = pd.read_csv(csv_path)
+    try:
+        write_bundle(df, csv_path, digest)
+    except (OSError, TypeError):
+        pass
+    return df
+
+
+if __name__ == '__main__':
+    from utils.data_store import DATA_DIR, DATASETS
+
+    for name, file_name in DATASETS.items():
+        csv_path = f"{DATA_DIR}/{file_name}"
+        print(f"{name:<10} -> {write_bundle(pd.read_csv(csv_path), csv_path)}")
@@ -0,0 +1,268 @@
+## Pre-materialised aggregation cube for the Multi-level View.
+## Every aggregate the view shows (GPA means, FTE, income, in-kind and PhD
+## sums, quality profiles, rankings) is computed once per dataset for every
+## institution / region / national scope x UOA (or "All"), so a dashboard
+## update is a dictionary lookup instead of a filter + groupby over raw rows.
+
+import numpy as np
+import pandas as pd
+from utils import data_partition
+from utils.aggregation import aggregate, group_codes, group_rank
+
+# view -> column holding the view's scope (the national view has one scope)
+VIEWS = {'ins': 'Institution name', 'reg': 'Region', 'nat': None}
+
+STAR_COLUMNS = ['4*', '3*', '2*', '1*', '0*']
+
+# measure name -> how to build it:
+#   dataset - the data_store frame it is built from
+#   agg     - aggregation applied to the selected rows
+#   by      - optional extra column to break the aggregate down by
+#   weights - optional column to weight the means by
+#   rows    - optional income partition to use: 'total' or 'sources' (see utils/data_partition.py)
+#   where   - optional {column: value} row filter
+#   views   - the views it is needed for (default: all)
+MEASURES = {
+    'gpa': {
+        'dataset': 'results',
+        'agg': {'GPA': 'mean'},
+        'by': 'Profile',
+    },
+    'gpa_fte': {
+        'dataset': 'results',
+        'agg': {'GPA': 'mean'},
+        'by': 'Profile',
+        'weights': 'FTE staff',
+    },
+    'fte': {
+        'dataset': 'results',
+        'agg': {'FTE staff': 'sum'},
+        'where': {'Profile': 'Overall'},
+    },
+    'quality': {
+        'dataset': 'results',
+        'agg': {col: 'mean' for col in STAR_COLUMNS},
+        'by': 'Profile',
+        'views': ['ins'],
+    },
+    'income': {
+        'dataset': 'income',
+        'agg': {'2013-14': 'sum', '2014-15': 'sum', '2015-2020 (avg)': 'sum'},
+        'rows': 'total',
+    },
+    'income_sources': {
+        'dataset': 'income',
+        'agg': {'2013-14': 'sum', '2014-15': 'sum', '2015-2020 (avg)': 'sum'},
+        'rows': 'sources',
+        'views': ['nat'],
+    },
+    'income_all_rows': {
+        'dataset': 'income',
+        'agg': {'2013-14': 'sum', '2014-15': 'sum', '2015-2020 (avg)': 'sum'},
+        'views': ['nat'],
+    },
+    'income_by_source': {
+        'dataset': 'income',
+        'agg': {'2013-2020 (total)': 'sum'},
+        'by': 'Income source',
+        'rows': 'sources',
+    },
+    'in_kind': {
+        'dataset': 'incomeiK',
+        'agg': {'2013-2020 (total)': 'sum'},
+        'rows': 'sources',
+    },
+    'phd': {
+        'dataset': 'phd',
+        'agg': {col: 'sum' for col in ['2013', '2014', '2015', '2016', '2017', '2018', '2019', 'Total']},
+    },
+}
+
+def scope_of(view, ins, reg):
+    """
+    Returns the cube key for a view: its name and the institution / region it is scoped to.
+
+    Any view other than 'ins' and 'reg' is treated as the national view, as the
+    component functions do.
+    """
+    if view == 'ins':
+        return 'ins', ins
+    if view == 'reg':
+        return 'reg', reg
+    return 'nat', None
+
+def _select_rows(df, rows=None, where=None):
+    if rows == 'total':
+        df = data_partition.total_rows(df)
+    elif rows == 'sources':
+        df = data_partition.source_rows(df)
+    for col, value in (where or {}).items():
+        df = df[df[col] == value]
+    return df
+
+class Cube:
+    """
+    One measure, aggregated over every view scope x UOA.
+
+    Aggregates are held as NumPy rows; `get` wraps the requested cell in a
+    Series (or a DataFrame indexed by `by`) only when it is asked for.
+    """
+
+    def __init__(self, df, agg, by=None, weights=None, rows=None, where=None, views=None):
+        self.source = df
+        self.agg = agg
+        self.by = by
+        self.weights = weights
+        self.columns = list(agg)
+        self.cells = {}
+
+        df = _select_rows(df, rows, where)
+        for view in views or VIEWS:
+            for per_uoa in (False, True):
+                self._add_level(df, view, per_uoa)
+
+    def _add_level(self, df, view, per_uoa):
+        keys = [col for col in [VIEWS[view], 'UOA name' if per_uoa else None] if col]
+        grouped = aggregate(df, keys + ([self.by] if self.by else []), self.agg, self.weights)
+        values = grouped[self.columns].to_numpy()
+        labels = grouped[self.by].to_numpy() if self.by else None
+
+        # groups come out sorted, so each scope x UOA cell is a run of rows
+        change = np.zeros(len(grouped), dtype=bool)
+        change[:1] = True
+        leads = [grouped[col].to_numpy() for col in keys]
+        for lead in leads:
+            change[1:] |= lead[1:] != lead[:-1]
+        starts = np.flatnonzero(change)
+        stops = np.append(starts[1:], len(grouped))
+
+        for start, stop in zip(starts, stops):
+            scope = leads[0][start] if VIEWS[view] else None
+            uoa = leads[-1][start] if per_uoa else 'All'
+            self.cells[(view, scope, uoa)] = (values[start:stop], None if labels is None else labels[start:stop])
+
+    def get(self, view, scope, uoa):
+        """
+        Returns the aggregate for one view scope and UOA.
+
+        Parameters:
+        view (str): 'ins', 'reg' or 'nat'.
+        scope (str): The institution or region (None for 'nat').
+        uoa (str): The UOA name, or "All".
+
+        Returns:
+        pd.Series: The aggregated columns, or, if the measure has a `by`
+            column, a pd.DataFrame with one row per value of it. A scope
+            with no rows gives the aggregate of an empty selection.
+        """
+        cell = self.cells.get((view, scope, uoa))
+        if self.by:
+            if cell is None:
+                return pd.DataFrame(columns=self.columns, index=pd.Index([], name=self.by), dtype=float)
+            values, labels = cell
+            return pd.DataFrame(values, index=pd.Index(labels, name=self.by), columns=self.columns)
+        if cell is None:
+            return pd.Series([0 if func == 'sum' else np.nan for func in self.agg.values()], index=self.columns)
+        return pd.Series(cell[0][0], index=self.columns)
+
+# GPAs equal to this many decimals are tied for a rank
+RANK_DECIMALS = 9
+
+class Rankings:
+    """
+    National and within-region ranks of every institution by mean GPA, for
+    every UOA (and "All") and GPA profile.
+
+    Ranks are computed for all (UOA, profile) groups at once and held in a
+    dictionary. Institutions with the same GPA share the best rank of their
+    group (1, 2, 2, 4), so tied institutions always get the same rank. With
+    weights='FTE staff', institutions are ranked by FTE-weighted GPA instead.
+    """
+
+    def __init__(self, df, weights=None):
+        self.source = df
+
+        region_of = df.groupby('Institution name', observed=True)['Region'].first()
+
+        totals = aggregate(df, ['Profile', 'Institution name'], {'GPA': 'mean'}, weights)
+        by_uoa = aggregate(df, ['Profile', 'UOA name', 'Institution name'], {'GPA': 'mean'}, weights)
+        table = pd.concat([totals.assign(**{'UOA name': 'All'}), by_uoa], ignore_index=True)
+        table['Region'] = table['Institution name'].map(region_of)
+
+        # equal GPAs can differ in their last bits depending on summation order
+        gpa = np.round(table['GPA'].to_numpy(), RANK_DECIMALS)
+        codes, groups = group_codes(table, ['UOA name', 'Profile'])
+        national = group_rank(codes, gpa, len(groups))
+        codes, groups = group_codes(table, ['UOA name', 'Profile', 'Region'])
+        regional = group_rank(codes, gpa, len(groups))
+
+        keys = zip(table['Institution name'].tolist(), table['UOA name'].tolist(), table['Profile'].tolist())
+        self.ranks = dict(zip(keys, zip(national.tolist(), regional.tolist())))
+
+    def get(self, uni, uoa, profile='Overall'):
+        """
+        Returns (national rank, regional rank), 1-based.
+        """
+        return self.ranks[(uni, uoa, profile)]
+
+# (id(frame), measure) -> Cube / Rankings, for the store's frames (kept for the process lifetime)
+_built = {}
+# (id(frame), measure) -> Cube / Rankings, for any other frame (oldest evicted first)
+_cubes = {}
+
+# maximum number of ad-hoc (non-store) cubes to keep
+MAX_CACHED_CUBES = 32
+
+def _cached(df, name, build):
+    key = (id(df), name)
+    cube = _built.get(key) or _cubes.get(key)
+    if cube is None or cube.source is not df:
+        cube = build()
+        _cubes[key] = cube
+        if len(_cubes) > MAX_CACHED_CUBES:
+            del _cubes[next(iter(_cubes))]
+    return cube
+
+def cube_for(df, measure):
+    """
+    Returns the cube of one of the MEASURES for a frame, building it on first use.
+
+    Parameters:
+    df (pd.DataFrame): The frame the measure is computed from.
+    measure (str): A key of MEASURES.
+
+    Returns:
+    Cube: The measure's cube.
+    """
+    spec = {key: value for key, value in MEASURES[measure].items() if key != 'dataset'}
+    return _cached(df, measure, lambda: Cube(df, **spec))
+
+def lookup(df, measure, view, scope, uoa):
+    """
+    Returns one cell of a measure's cube (see Cube.get).
+
+    Example:
+    >>> lookup(results_df, 'gpa', 'ins', 'University of Oxford', 'All').loc['Overall', 'GPA']
+    """
+    return cube_for(df, measure).get(view, scope, uoa)
+
+def rankings_for(df, weighted=False):
+    """
+    Returns the rankings for a frame, by mean or (weighted=True) FTE-weighted GPA.
+    """
+    if weighted:
+        return _cached(df, 'rankings_fte', lambda: Rankings(df, weights='FTE staff'))
+    return _cached(df, 'rankings', lambda: Rankings(df))
+
+def build(frames):
+    """
+    Builds every measure's cube, and the rankings, for the store's frames.
+
+    Parameters:
+    frames (dict): Dataset name -> DataFrame, as in data_store.DATASETS.
+    """
+    for measure, spec in MEASURES.items():
+        df = frames[spec['dataset']]
+        _built[(id(df), measure)] = cube_for(df, measure)
+    _built[(id(frames['results']), 'rankings')] = rankings_for(frames['results'])
+    _built[(id(frames['results']), 'rankings_fte')] = rankings_for(frames['results'], weighted=True)
@@ -0,0 +1,158 @@
+## Sorted composite index over the datasets.
+## Rows are held sorted by institution -> UOA -> profile / income source, so
+## the rows for one selection are a contiguous slice of the frame, found by
+## binary search over the key codes instead of a boolean scan of every row.
+
+import numpy as np
+import pandas as pd
+
+# composite key levels, outermost first; each frame uses the ones it has
+INDEX_KEYS = ['Institution name', 'UOA name', 'Profile', 'Income source']
+
+# maximum number of ad-hoc (non-store) frames to keep indexes for
+MAX_CACHED_INDEXES = 16
+
+def index_keys(df):
+    return [col for col in INDEX_KEYS if col in df.columns]
+
+def _key_codes(values):
+    """
+    Returns integer codes that sort in the same order as the key's values,
+    plus a value -> code lookup.
+
+    Missing values get the largest code, matching sort_values' default of
+    placing them last.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        codes = values.cat.codes.to_numpy()
+    else:
+        codes, categories = pd.factorize(values, sort=True)
+    codes = np.where(codes < 0, len(categories), codes)
+    return codes, {value: code for code, value in enumerate(categories)}
+
+def sort_order(df):
+    """
+    Returns the positions that sort a frame by its composite key (stable).
+    """
+    codes = [_key_codes(df[col])[0] for col in index_keys(df)]
+    return np.lexsort(codes[::-1])
+
+def sort_frame(df):
+    """
+    Sorts a frame by its composite key, so that an index over it needs no copy.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame to sort.
+
+    Returns:
+    pd.DataFrame: The sorted DataFrame, with a fresh RangeIndex.
+    """
+    return df.iloc[sort_order(df)].reset_index(drop=True)
+
+class SortedIndex:
+    """
+    Composite index over one frame.
+
+    If the frame is not already sorted by its composite key, the index holds
+    a sorted view of it in `frame`; all slices refer to that frame.
+    """
+
+    def __init__(self, df):
+        self.source = df
+        self.keys = index_keys(df)
+
+        order = sort_order(df)
+        self.frame = df if np.array_equal(order, np.arange(len(df))) else df.iloc[order]
+
+        self.codes = []
+        self.lookups = []
+        for col in self.keys:
+            codes, lookup = _key_codes(self.frame[col])
+            self.codes.append(codes)
+            self.lookups.append(lookup)
+
+    def locate(self, *values):
+        """
+        Finds the rows matching a prefix of the composite key.
+
+        Parameters:
+        *values: Key values, outermost first (e.g. institution, UOA, profile).
+
+        Returns:
+        tuple: (start, stop) positions of the matching rows in `frame`.
+        """
+        start, stop = 0, len(self.frame)
+        for codes, lookup, value in zip(self.codes, self.lookups, values):
+            code = lookup.get(value)
+            if code is None:
+                return 0, 0
+            level = codes[start:stop]
+            start, stop = (
+                start + int(np.searchsorted(level, code, side='left')),
+                start + int(np.searchsorted(level, code, side='right')),
+            )
+            if start == stop:
+                break
+        return start, stop
+
+    def rows(self, *values):
+        start, stop = self.locate(*values)
+        return self.frame.iloc[start:stop]
+
+# id(frame) -> SortedIndex, for the store's frames (kept for the process lifetime)
+_registered = {}
+# id(frame) -> SortedIndex, for any other frame (oldest evicted first)
+_indexes = {}
+
+def register(df):
+    """
+    Builds and keeps the composite index for one of the store's frames.
+
+    Parameters:
+    df (pd.DataFrame): A frame already sorted by sort_frame.
+
+    Returns:
+    SortedIndex: The frame's index.
+    """
+    _registered[id(df)] = SortedIndex(df)
+    return _registered[id(df)]
+
+def index_for(df):
+    """
+    Returns the composite index for a frame.
+
+    The store's frames are indexed once at load (see register); any other
+    frame (e.g. a test fixture) is indexed when first queried.
+    """
+    index = _registered.get(id(df)) or _indexes.get(id(df))
+    if index is None or index.source is not df:
+        index = SortedIndex(df)
+        _indexes[id(df)] = index
+        if len(_indexes) > MAX_CACHED_INDEXES:
+            del _indexes[next(iter(_indexes))]
+    return index
+
+def select(df, *values):
+    """
+    Returns the rows of a frame matching a prefix of its composite key.
+
+    Passing "All" for the trailing levels (e.g. the UOA), or stopping early,
+    selects every value of those levels.
+
+    Parameters:
+    df (pd.DataFrame): The frame to select from.
+    *values: Key values, outermost first (institution, UOA, profile/income source).
+
+    Returns:
+    pd.DataFrame: The matching rows (a contiguous slice of the sorted frame).
+
+    Example:
+    >>> select(results_df, 'University of Oxford', 'Clinical Medicine', 'Overall')
+    """
+    values = list(values)
+    while values and values[-1] == 'All':
+        values.pop()
+    if 'All' in values:
+        raise ValueError("only trailing key levels can be left unselected")
+    return index_for(df).rows(*values)
@@ -0,0 +1,100 @@
+## Income datasets split into their "Total income" rows and their per-source rows.
+## Nearly every consumer of the income / in-kind data wants exactly one of the
+## two, so each split is made once (per frame) instead of scanning the whole
+## frame for it on every callback.
+
+import numpy as np
+
+TOTAL_SOURCE = 'Total income'
+
+# numeric columns that identify a submission rather than hold an amount
+ID_COLUMNS = ['UKPRN', 'UOA number']
+
+# rows are compared per submission; multiple submissions are summed together
+SUBMISSION_KEYS = ['Institution name', 'UOA name']
+
+# maximum number of ad-hoc (non-store) frames to keep partitions for
+MAX_CACHED_PARTITIONS = 16
+
+class Partitions:
+    """
+    The "Total income" rows and the per-source rows of one frame.
+
+    Both keep the frame's row order and index, so they are interchangeable
+    with filtering the frame on 'Income source'.
+    """
+
+    def __init__(self, df, freeze=None):
+        self.source = df
+
+        is_total = (df['Income source'] == TOTAL_SOURCE).to_numpy()
+        self.total = df[is_total]
+        self.sources = df[~is_total]
+        if freeze is not None:
+            self.total = freeze(self.total)
+            self.sources = freeze(self.sources)
+
+# id(frame) -> Partitions, for the store's frames (kept for the process lifetime)
+_registered = {}
+# id(frame) -> Partitions, for any other frame (oldest evicted first)
+_partitions = {}
+
+def register(df, freeze=None):
+    """
+    Splits one of the store's frames and keeps the partitions.
+
+    Parameters:
+    df (pd.DataFrame): An income or in-kind income frame.
+    freeze (function): Applied to each partition, e.g. data_store.freeze.
+
+    Returns:
+    Partitions: The frame's partitions.
+    """
+    _registered[id(df)] = Partitions(df, freeze)
+    return _registered[id(df)]
+
+def split(df):
+    """
+    Returns the partitions of a frame, splitting it on first use.
+    """
+    parts = _registered.get(id(df)) or _partitions.get(id(df))
+    if parts is None or parts.source is not df:
+        parts = Partitions(df)
+        _partitions[id(df)] = parts
+        if len(_partitions) > MAX_CACHED_PARTITIONS:
+            del _partitions[next(iter(_partitions))]
+    return parts
+
+def total_rows(df):
+    """
+    Returns the "Total income" rows of an income frame.
+    """
+    return split(df).total
+
+def source_rows(df):
+    """
+    Returns the per-source rows (everything but "Total income") of an income frame.
+    """
+    return split(df).sources
+
+def check(df, atol=1.0):
+    """
+    Checks that each submission's per-source rows add up to its "Total income" row.
+
+    Parameters:
+    df (pd.DataFrame): An income or in-kind income frame.
+    atol (float): Allowed absolute difference per amount column (£), for rounding.
+
+    Returns:
+    pd.DataFrame: The differences (totals minus summed sources) for the
+        submissions that do not add up; empty if all of them do.
+    """
+    parts = split(df)
+    columns = [col for col in df.columns if df[col].dtype.kind in 'iuf' and col not in ID_COLUMNS]
+
+    totals = parts.total.groupby(SUBMISSION_KEYS, observed=True)[columns].sum()
+    sources = parts.sources.groupby(SUBMISSION_KEYS, observed=True)[columns].sum()
+    totals, sources = totals.align(sources, fill_value=0)
+
+    diff = totals - sources
+    return diff[(np.abs(diff.to_numpy()) > atol).any(axis=1)]
@@ -0,0 +1,235 @@
+## Shared data store for the dashboard.
+## Every page and component reads its datasets from this module, so each
+## worker parses the files once and holds a single, read-only copy of each.
+
+import hashlib
+import time
+import warnings
+import pandas as pd
+from utils.data_cache import read_csv_cached, source_hash
+from utils import data_cube, data_index, data_partition, densities, leaderboards, metric_ranks
+
+DATA_DIR = 'data'
+
+# dataset name -> csv file in DATA_DIR
+DATASETS = {
+    'results': 'results_cleaned.csv',
+    'income': 'income_cleaned.csv',
+    'incomeiK': 'incomeiK_cleaned.csv',
+    'phd': 'phd_awarded_cleaned.csv',
+    'regions': 'regions.csv',
+}
+
+# datasets with a "Total income" row per submission alongside the per-source rows
+PARTITIONED = ['income', 'incomeiK']
+
+# dimension columns, held as categoricals sharing one vocabulary across datasets
+# so that filters compare integer codes and groupbys run on codes
+DIMENSIONS = ['Institution name', 'UOA name', 'Region', 'Profile', 'Income source', 'Main panel']
+
+# per-dataset load statistics, filled in as each dataset is loaded
+load_stats = {}
+# time spent precomputing the aggregation cube, once all datasets are loaded
+build_stats = {}
+
+def freeze(df):
+    """
+    Returns a read-only version of a DataFrame.
+
+    Each column is rebuilt on top of a non-writeable NumPy array (the codes,
+    for categorical columns), so any attempt to write into the shared frame
+    (e.g. `df.loc[0, 'GPA'] = 1`) raises a ValueError instead of silently
+    changing the data for every other page and user. Filtering, grouping
+    and copying work as usual.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame to freeze.
+
+    Returns:
+    pd.DataFrame: A read-only DataFrame with the same columns and index.
+    """
+    columns = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            codes = df[col].cat.codes.to_numpy(copy=True)
+            codes.flags.writeable = False
+            columns[col] = pd.Categorical.from_codes(codes, dtype=df[col].dtype)
+        else:
+            values = df[col].to_numpy(copy=True)
+            values.flags.writeable = False
+            columns[col] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+def shared_dtypes(frames):
+    """
+    Builds one categorical dtype per dimension column from its values across all frames.
+
+    Categories are sorted, so groupbys on the encoded columns return groups
+    in the same order as they would on the original string columns.
+
+    Parameters:
+    frames (iterable): DataFrames that will be encoded with the dtypes.
+
+    Returns:
+    dict: Dimension column name -> pd.CategoricalDtype.
+    """
+    vocab = {}
+    for df in frames:
+        for col in DIMENSIONS:
+            if col in df.columns:
+                vocab.setdefault(col, set()).update(df[col].dropna().unique())
+    return {col: pd.CategoricalDtype(sorted(values)) for col, values in vocab.items()}
+
+def encode_dimensions(df, dtypes):
+    """
+    Converts a frame's dimension columns to the shared categorical dtypes.
+
+    Parameters:
+    df (pd.DataFrame): The DataFrame to encode.
+    dtypes (dict): Output of shared_dtypes.
+
+    Returns:
+    pd.DataFrame: The encoded DataFrame.
+    """
+    df = df.copy()
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            # unordered dtypes compare equal whatever their category order, so
+            # astype would be a no-op here - recode onto the shared order explicitly
+            df[col] = df[col].cat.set_categories(dtype.categories)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+def read_dataset(name):
+    """
+    Reads one of the cleaned datasets from disk.
+
+    The dataset is loaded from its compiled bundle when the bundle is fresh,
+    and from the CSV otherwise (see utils/data_cache.py).
+
+    Parameters:
+    name (str): A key of DATASETS.
+
+    Returns:
+    pd.DataFrame: The parsed dataset.
+    """
+    return read_csv_cached(f"{DATA_DIR}/{DATASETS[name]}", categorical=DIMENSIONS)
+
+def load_datasets():
+    """
+    Loads, encodes, sorts and freezes every dataset, recording load times and memory footprints.
+
+    Each frame is sorted by its composite key and indexed (see utils/data_index.py),
+    so the rows for an institution / UOA selection are a contiguous slice. The income
+    datasets are split into their total and per-source rows (see utils/data_partition.py),
+    the Multi-level View's aggregates are precomputed (see utils/data_cube.py), and so
+    are the National Overview's leaderboards (see utils/leaderboards.py), every
+    institution's rank on every metric (see utils/metric_ranks.py) and the regions'
+    GPA density curves (see utils/densities.py).
+
+    Returns:
+    tuple: (dict of dataset name -> read-only DataFrame, dict of shared dimension dtypes)
+    """
+    frames = {}
+    for name in DATASETS:
+        start = time.perf_counter()
+        frames[name] = read_dataset(name)
+        load_stats[name] = {'load_seconds': time.perf_counter() - start}
+
+    start = time.perf_counter()
+    dtypes = shared_dtypes(frames.values())
+    encode_seconds = (time.perf_counter() - start) / len(frames)
+
+    for name, df in frames.items():
+        start = time.perf_counter()
+        df = data_index.sort_frame(encode_dimensions(df, dtypes))
+        load_stats[name].update({
+            'rows': len(df),
+            'columns': len(df.columns),
+            'load_seconds': load_stats[name]['load_seconds'] + encode_seconds + time.perf_counter() - start,
+            'memory_bytes': int(df.memory_usage(deep=True).sum()),
+        })
+        frames[name] = freeze(df)
+        data_index.register(frames[name])
+
+        if name in PARTITIONED:
+            data_partition.register(frames[name], freeze)
+            mismatches = data_partition.check(frames[name])
+            if len(mismatches):
+                warnings.warn(
+                    f"{DATASETS[name]}: per-source income does not add up to total income "
+                    f"for {len(mismatches)} submissions"
+                )
+
+    start = time.perf_counter()
+    data_cube.build(frames)
+    build_stats['cube_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    leaderboards.build(frames)
+    build_stats['leaderboards_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metric_ranks.build(frames)
+    build_stats['ranks_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    densities.build(frames['results'])
+    build_stats['densities_seconds'] = time.perf_counter() - start
+
+    return frames, dtypes
+
+def dataset_version():
+    """
+    Returns a version of the loaded data, which changes whenever any dataset file does.
+
+    Results derived from the datasets (e.g. memoised figures, see utils/memo.py)
+    are keyed by this version, so they are never reused for other data.
+
+    Returns:
+    str: A short hex digest of the datasets' content hashes.
+    """
+    digest = hashlib.sha256()
+    for name in DATASETS:
+        digest.update(source_hash(f"{DATA_DIR}/{DATASETS[name]}").encode())
+    return digest.hexdigest()[:16]
+
+def report():
+    """
+    Summarises the store's load time and memory footprint.
+
+    Returns:
+    dict: Per-dataset statistics plus the totals across all datasets.
+    """
+    return {
+        'datasets': load_stats,
+        'total_load_seconds': sum(s['load_seconds'] for s in load_stats.values()),
+        'cube_seconds': build_stats['cube_seconds'],
+        'leaderboards_seconds': build_stats['leaderboards_seconds'],
+        'ranks_seconds': build_stats['ranks_seconds'],
+        'densities_seconds': build_stats['densities_seconds'],
+        'total_memory_bytes': sum(s['memory_bytes'] for s in load_stats.values()),
+    }
+
+# read in datasets (once per process)
+_frames, dimension_dtypes = load_datasets()
+results_df = _frames['results']
+income_df = _frames['income']
+incomeiK_df = _frames['incomeiK']
+phd_df = _frames['phd']
+regions_mapping = _frames['regions']
+data_version = dataset_version()
+
+
+if __name__ == '__main__':
+    stats = report()
+    for name, s in stats['datasets'].items():
+        print(f"{name:<10} {s['rows']:>6} rows  {s['load_seconds'] * 1e3:8.1f} ms  {s['memory_bytes'] / 1e6:6.2f} MB")
+    print(f"{'total':<10} {'':>11}  {stats['total_load_seconds'] * 1e3:8.1f} ms  {stats['total_memory_bytes'] / 1e6:6.2f} MB")
+    print(f"{'cube':<10} {'':>11}  {stats['cube_seconds'] * 1e3:8.1f} ms")
+    print(f"{'leaders':<10} {'':>11}  {stats['leaderboards_seconds'] * 1e3:8.1f} ms")
+    print(f"{'ranks':<10} {'':>11}  {stats['ranks_seconds'] * 1e3:8.1f} ms")
+    print(f"{'densities':<10} {'':>11}  {stats['densities_seconds'] * 1e3:8.1f} ms")
@@ -0,0 +1,110 @@
+## Precomputed GPA density curves for the Regional Trends page.
+## The "All UOAs" GPA distribution chart draws, for each selected region, a
+## normal curve fitted to the region's per-UOA mean GPAs. Those distributions
+## are fixed, so the curves of all regions and profiles are evaluated together
+## with NumPy when the data is loaded, and a request only assembles the
+## selected regions' curves into traces.
+##
+## The curves are those of plotly's create_distplot(curve_type='normal'): a
+## maximum-likelihood normal fit (population standard deviation) evaluated at
+## POINTS evenly spaced GPAs from the region's lowest per-UOA mean GPA up to
+## (not including) its highest.
+
+import numpy as np
+from utils.aggregation import aggregate, group_codes, group_count, group_mean
+
+# points per curve
+POINTS = 500
+
+# curve colours, in region order (plotly's default colour cycle)
+COLOURS = [
+    "rgb(31, 119, 180)",
+    "rgb(255, 127, 14)",
+    "rgb(44, 160, 44)",
+    "rgb(214, 39, 40)",
+    "rgb(148, 103, 189)",
+    "rgb(140, 86, 75)",
+    "rgb(227, 119, 194)",
+    "rgb(127, 127, 127)",
+    "rgb(188, 189, 34)",
+    "rgb(23, 190, 207)",
+]
+
+class Densities:
+    """
+    The normal density curve of every region's per-UOA mean GPAs, for every profile.
+    """
+
+    def __init__(self, results):
+        self.source = results
+        means = aggregate(results, ['Profile', 'Region', 'UOA name'], {'GPA': 'mean'})
+        codes, groups = group_codes(means, ['Profile', 'Region'])
+        size = len(groups)
+        gpa = means['GPA'].to_numpy(dtype=np.float64)
+        codes = np.where(np.isnan(gpa), -1, codes)
+        valid = codes >= 0
+
+        mean = group_mean(codes, gpa, size)
+        deviation = np.where(valid, gpa - mean[np.maximum(codes, 0)], np.nan)
+        sd = np.sqrt(group_mean(codes, deviation ** 2, size))
+        start = np.full(size, np.inf)
+        end = np.full(size, -np.inf)
+        np.minimum.at(start, codes[valid], gpa[valid])
+        np.maximum.at(end, codes[valid], gpa[valid])
+
+        # one row per (profile, region): x from start to end, y the fitted pdf
+        x = start[:, None] + np.arange(POINTS)[None, :] * (end - start)[:, None] / POINTS
+        z = (x - mean[:, None]) / sd[:, None]
+        y = np.exp(-z ** 2 / 2.0) / np.sqrt(2 * np.pi) / sd[:, None]
+        counts = group_count(codes, gpa, size)
+
+        keys = zip(groups['Profile'].astype(str).tolist(), groups['Region'].astype(str).tolist())
+        self.curves = {key: (x[i], y[i]) for i, key in enumerate(keys) if counts[i]}
+
+    def traces(self, regions, profile):
+        """
+        Returns the density curves of the regions, as plain scatter traces.
+
+        Parameters:
+        regions (list): Region names; their order sets the curves' order and colours.
+        profile (str): GPA profile.
+
+        Returns:
+        list: One trace dict per region with data.
+        """
+        traces = []
+        for index, region in enumerate(regions):
+            if (profile, region) not in self.curves:
+                continue
+            x, y = self.curves[(profile, region)]
+            traces.append(dict(
+                type="scatter",
+                x=x,
+                y=y,
+                xaxis="x1",
+                yaxis="y1",
+                mode="lines",
+                name=region,
+                legendgroup=region,
+                showlegend=True,
+                marker=dict(color=COLOURS[index % len(COLOURS)]),
+            ))
+        return traces
+
+# the store's Densities
+_densities = None
+
+def build(results):
+    """
+    Computes the density curves for the store's results frame.
+    """
+    global _densities
+    _densities = Densities(results)
+
+def densities_for(results):
+    """
+    Returns the density curves of a results frame: the store's, or built for any other frame.
+    """
+    if _densities is not None and _densities.source is results:
+        return _densities
+    return Densities(results)
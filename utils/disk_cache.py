@@ -0,0 +1,178 @@
+## Optional on-disk cache shared by all the workers on a machine.
+## Each gunicorn worker has its own in-memory figure cache (utils/memo.py), so
+## without this a selection is recomputed once per worker. With it, results
+## are also written to a local directory, from which any worker can read them.
+## Entries are written atomically (temporary file + rename), expire after a
+## TTL, and the least recently used are evicted once the directory outgrows
+## its size cap.
+##
+## Enable it by pointing FIGURE_CACHE_DIR at a writable directory, e.g.
+##   FIGURE_CACHE_DIR=/tmp/figure-cache gunicorn app:server --preload --workers 4
+## FIGURE_CACHE_TTL (seconds) and FIGURE_CACHE_MAX_MB override the defaults.
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_BYTES = 512 << 20
+
+# the directory is scanned for expired / excess entries every EVICT_EVERY
+# writes of a process; once over the cap, entries are evicted down to
+# EVICT_TO of it, so that a full cache does not evict on every write
+EVICT_EVERY = 32
+EVICT_TO = 0.8
+
+SUFFIX = '.pkl'
+
+class DiskCache:
+    """
+    A directory of pickled entries, shared by every process that opens it.
+
+    Keys must have a stable repr across processes (e.g. tuples of strings and
+    numbers), as entries are named by its hash.
+
+    Parameters:
+    path (str): The cache directory (created if missing).
+    ttl (float): Seconds after which an entry has expired.
+    max_bytes (int): Size of the directory above which entries are evicted.
+    """
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes = 0
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.path, digest + SUFFIX)
+
+    def get(self, key, default=None):
+        """
+        Returns the value stored under key, or default if it is missing or expired.
+        """
+        path = self._file(key)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            # unreadable entry (e.g. removed by another worker mid-read) - drop it
+            self._remove(path)
+            self.misses += 1
+            return default
+
+        # mark it recently used (its age for the TTL counts from the write)
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Stores value under key, replacing any entry atomically.
+
+        Readers see either the old entry or the new one, never a partial write.
+        A failure to write (e.g. a full or read-only disk) is not an error.
+        """
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self._file(key))
+            except BaseException:
+                self._remove(tmp)
+                raise
+        except (OSError, pickle.PicklingError):
+            return
+        if self._writes % EVICT_EVERY == 0:
+            self.evict()
+        self._writes += 1
+
+    def evict(self):
+        """
+        Removes expired entries and, over the size cap, the least recently used
+        ones until the cache is back under EVICT_TO of it.
+        """
+        now = time.time()
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    # expired entries, and temporary files left by a crashed writer
+                    if now - stat.st_mtime > self.ttl:
+                        self._remove(entry.path)
+                        continue
+                    if not entry.name.endswith(SUFFIX):
+                        continue
+                    entries.append((stat.st_atime, stat.st_size, entry.path))
+                    total += stat.st_size
+        except OSError:
+            return
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            self._remove(path)
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        for name in os.listdir(self.path):
+            if name.endswith(SUFFIX):
+                self._remove(os.path.join(self.path, name))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'ttl': self.ttl,
+            'max_bytes': self.max_bytes,
+        }
+
+def from_environment():
+    """
+    Opens the cache configured by the FIGURE_CACHE_* environment variables.
+
+    Returns:
+    DiskCache: The shared cache, or None when FIGURE_CACHE_DIR is not set.
+    """
+    path = os.environ.get('FIGURE_CACHE_DIR')
+    if not path:
+        return None
+    return DiskCache(
+        path,
+        ttl=float(os.environ.get('FIGURE_CACHE_TTL', DEFAULT_TTL)),
+        max_bytes=int(float(os.environ.get('FIGURE_CACHE_MAX_MB', DEFAULT_MAX_BYTES >> 20)) * (1 << 20)),
+    )
@@ -0,0 +1,286 @@
+## Plain-dict figures, built straight from NumPy arrays.
+## plotly.express turns every chart into a DataFrame, groups it, and validates
+## each property of each trace through graph_objects, which costs far more than
+## drawing the few traces of the dashboard's charts. The Institution and
+## Regional pages only use three of its shapes: a line with markers (one series,
+## or one line per group), a scatter per group and a bar per group. This module
+## builds those directly as the dicts px serialises to, with the same trace
+## properties, colours, hover templates, axes and template. Numeric arrays are
+## encoded as plotly.js typed arrays, as plotly does.
+##
+## The figures are plain {'data': [...], 'layout': {...}} dicts, which dcc.Graph
+## and memo.memoize(figures=True) accept in place of a go.Figure; update()
+## stands in for update_layout / update_traces. diff() turns the change from
+## one figure to another into a dash.Patch, so that only the change is sent.
+
+import dash
+import json
+import numpy as np
+import plotly.io as pio
+from _plotly_utils.utils import to_typed_array_spec
+from plotly.io.json import to_json_plotly
+
+# template name -> its serialised form, shared (read-only) by every figure
+_templates = {}
+
+def template():
+    """
+    Returns plotly's default template (pio.templates.default) as a plain dict.
+    """
+    name = pio.templates.default
+    if name not in _templates:
+        _templates[name] = pio.templates[name].to_plotly_json()
+    return _templates[name]
+
+def colours():
+    """
+    Returns the colour sequence px gives groups: the template's colorway.
+    """
+    return template()['layout']['colorway']
+
+def array(values):
+    """
+    Encodes a trace's array: numbers as a plotly.js typed array, anything else as a list.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'iuf':
+        return to_typed_array_spec(values)
+    return values.tolist()
+
+def update(target, updates):
+    """
+    Merges updates into a figure's layout or trace, as update_layout does:
+    dicts are merged into dicts, anything else replaces the value.
+
+    Parameters:
+    target (dict): The layout, or a trace.
+    updates (dict): Nested properties (no magic underscores: title=dict(font=dict(size=18))).
+
+    Returns:
+    dict: target, updated in place.
+    """
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            update(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+def groups(keys):
+    """
+    Splits rows by their key, in order of the keys' first appearance (px's group order).
+
+    Parameters:
+    keys (array-like): Group key of each row.
+
+    Returns:
+    list: (key, row indices in their original order) of each group.
+    """
+    keys = np.asarray(keys, dtype=object)
+    names, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    rows = np.split(np.argsort(inverse, kind='stable'), np.cumsum(np.bincount(inverse))[:-1])
+    return [(names[i], rows[i]) for i in np.argsort(first)]
+
+def layout(x_title, y_title, legend_title):
+    """
+    Returns the layout px gives a single-axis chart.
+    """
+    return {
+        'template': template(),
+        'xaxis': {'anchor': 'y', 'domain': [0.0, 1.0], 'title': {'text': x_title}},
+        'yaxis': {'anchor': 'x', 'domain': [0.0, 1.0], 'title': {'text': y_title}},
+        'legend': {'title': {'text': legend_title}, 'tracegroupgap': 0},
+        'margin': {'t': 60},
+    }
+
+def hover(labels, key):
+    return f"{labels['color']}={key}<br>{labels['x']}=%{{x}}<br>{labels['y']}=%{{y}}<extra></extra>"
+
+def line(x, y, color=None, labels=None):
+    """
+    Builds px.line(..., markers=True).
+
+    Parameters:
+    x (array-like): x of each point.
+    y (array-like): y of each point.
+    color (array-like): Optionally, the group of each point: one line per group, in
+        order of appearance. Without it, the points are drawn as px draws an
+        unnamed Series: one line named '0', x its index and y its values.
+    labels (dict): Names of the 'x', 'y' and 'color' columns, for the axes,
+        legend and hover text (with color).
+
+    Returns:
+    dict: The figure.
+    """
+    if color is None:
+        labels = {'x': 'index', 'y': 'value', 'color': 'variable'}
+        lines = [('0', slice(None))]
+    else:
+        lines = groups(color)
+    x, y = np.asarray(x), np.asarray(y)
+    palette = colours()
+    data = [{
+        'hovertemplate': hover(labels, key),
+        'legendgroup': key,
+        'line': {'color': palette[i % len(palette)], 'dash': 'solid'},
+        'marker': {'symbol': 'circle'},
+        'mode': 'lines+markers',
+        'name': key,
+        'orientation': 'v',
+        'showlegend': True,
+        'x': array(x[rows]),
+        'xaxis': 'x',
+        'y': array(y[rows]),
+        'yaxis': 'y',
+        'type': 'scatter',
+    } for i, (key, rows) in enumerate(lines)]
+    return {'data': data, 'layout': layout(labels['x'], labels['y'], labels['color'])}
+
+def scatter(x, y, color, hover_name, labels, log_x=False):
+    """
+    Builds px.scatter(..., color=..., hover_name=...): one trace per group, in order of appearance.
+
+    Parameters:
+    x, y (array-like): Coordinates of each point.
+    color (array-like): Group of each point.
+    hover_name (array-like): Name shown in bold over each point's hover text.
+    labels (dict): Names of the 'x', 'y' and 'color' columns.
+    log_x (bool): Log-scaled x axis.
+
+    Returns:
+    dict: The figure.
+    """
+    x, y, hover_name = np.asarray(x), np.asarray(y), np.asarray(hover_name, dtype=object)
+    palette = colours()
+    data = [{
+        'hovertemplate': '<b>%{hovertext}</b><br><br>' + hover(labels, key),
+        'hovertext': hover_name[rows].tolist(),
+        'legendgroup': key,
+        'marker': {'color': palette[i % len(palette)], 'symbol': 'circle'},
+        'mode': 'markers',
+        'name': key,
+        'orientation': 'v',
+        'showlegend': True,
+        'x': array(x[rows]),
+        'xaxis': 'x',
+        'y': array(y[rows]),
+        'yaxis': 'y',
+        'type': 'scatter',
+    } for i, (key, rows) in enumerate(groups(color))]
+    fig = {'data': data, 'layout': layout(labels['x'], labels['y'], labels['color'])}
+    if log_x:
+        fig['layout']['xaxis']['type'] = 'log'
+    return fig
+
+def bar(x, y, labels):
+    """
+    Builds px.bar(x=..., y=..., text=y, color=x): one bar per category, coloured
+    by it and labelled with its value.
+
+    Parameters:
+    x (array-like): Category of each bar (distinct).
+    y (array-like): Height of each bar.
+    labels (dict): Names of the 'x' (also the legend's) and 'y' columns.
+
+    Returns:
+    dict: The figure.
+    """
+    x, y = np.asarray(x, dtype=object), np.asarray(y)
+    bars = groups(x)
+    palette = colours()
+    data = [{
+        'hovertemplate': f"{labels['x']}=%{{x}}<br>{labels['y']}=%{{text}}<extra></extra>",
+        'legendgroup': key,
+        'marker': {'color': palette[i % len(palette)], 'pattern': {'shape': ''}},
+        'name': key,
+        'orientation': 'v',
+        'showlegend': True,
+        'text': array(y[rows]),
+        'textposition': 'auto',
+        'x': x[rows].tolist(),
+        'xaxis': 'x',
+        'y': array(y[rows]),
+        'yaxis': 'y',
+        'type': 'bar',
+    } for i, (key, rows) in enumerate(bars)]
+    fig = {'data': data, 'layout': layout(labels['x'], labels['y'], labels['x'])}
+    update(fig['layout'], {
+        'xaxis': {'categoryorder': 'array', 'categoryarray': [key for key, _ in bars]},
+        'barmode': 'relative',
+    })
+    return fig
+
+def plain(fig):
+    """
+    Returns a figure (a go.Figure, or a dict) as the browser receives it: JSON
+    types only, with numeric arrays as typed arrays.
+    """
+    return json.loads(to_json_plotly(fig))
+
+def _nested(value):
+    # dicts are diffed key by key, except typed arrays, which change as a whole
+    return isinstance(value, dict) and 'bdata' not in value
+
+def _diff(patch, old, new):
+    # records the deletions and assignments turning dict old into new, and counts them
+    changes = 0
+    for key in old:
+        if key not in new:
+            del patch[key]
+            changes += 1
+    for key, value in new.items():
+        if key in old and old[key] == value:
+            continue
+        if key in old and _nested(old[key]) and _nested(value):
+            changes += _diff(patch[key], old[key], value)
+        else:
+            patch[key] = value
+            changes += 1
+    return changes
+
+def diff(old, new):
+    """
+    Returns the changes turning figure old into figure new, as a dash.Patch
+    applied by the browser to the old figure it shows.
+
+    Traces are matched by name (e.g. a region's), so that adding or removing
+    a group inserts or deletes its trace, and only the properties that differ
+    (e.g. the colours, which follow the groups' positions) are resent in the
+    traces kept. Traces without unique names, or kept in another order, are
+    matched by position, or resent when their number changes.
+
+    Parameters:
+    old (dict): The figure shown, as serialised (see memo.FigureJSON.figure).
+    new (dict): The figure to show, in the same form.
+
+    Returns:
+    dash.Patch: The changes, or dash.no_update when the figures are the same.
+    """
+    patch = dash.Patch()
+    changes = _diff(patch['layout'], old['layout'], new['layout'])
+
+    old_names = [trace.get('name') for trace in old['data']]
+    new_names = [trace.get('name') for trace in new['data']]
+    kept = [name for name in old_names if name in new_names]
+    if (len(set(old_names)) == len(old_names) and len(set(new_names)) == len(new_names)
+            and kept == [name for name in new_names if name in old_names]):
+        # deleted from the end, so the indices of the remaining traces hold
+        for i in reversed(range(len(old_names))):
+            if old_names[i] not in new_names:
+                del patch['data'][i]
+                changes += 1
+        traces = dict(zip(old_names, old['data']))
+        for i, trace in enumerate(new['data']):
+            if trace.get('name') in traces:
+                changes += _diff(patch['data'][i], traces[trace.get('name')], trace)
+            else:
+                patch['data'].insert(i, trace)
+                changes += 1
+    elif len(old['data']) == len(new['data']):
+        for i, (old_trace, new_trace) in enumerate(zip(old['data'], new['data'])):
+            changes += _diff(patch['data'][i], old_trace, new_trace)
+    else:
+        patch['data'] = new['data']
+        changes += 1
+
+    return patch if changes else dash.no_update
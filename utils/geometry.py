@@ -0,0 +1,212 @@
+## Simplified, coordinate-quantised variants of the regions' GeoJSON.
+## The source boundaries (assets/regions.geojson) carry ~23,000 vertices at
+## 15 significant digits (and Scotland twice, once under another key), far
+## more than a 12-region UK map at dashboard size can show. Each level simplifies every ring (Douglas-Peucker, at the level's
+## tolerance in degrees), rounds the coordinates to the level's precision and
+## drops the islands (and holes) too small to see, then checks that every
+## region is still there, once, under the same properties.RGN24NM key.
+##
+## The variants are static assets, served (and cached by the browser) from
+## assets/; rebuild them after changing the source with: python -m utils.geometry
+
+import json
+import os
+import numpy as np
+
+SOURCE_PATH = 'assets/regions.geojson'
+ASSETS_DIR = 'assets'
+
+# the property the maps match regions on (featureidkey="properties.RGN24NM")
+KEY = 'RGN24NM'
+
+# level -> (simplification tolerance in degrees, decimals kept), finest first;
+# at dashboard size one pixel of the UK map spans roughly 0.015 degrees
+LEVELS = {
+    'full': (None, None),
+    'high': (0.002, 4),
+    'medium': (0.0075, 3),
+    'low': (0.015, 2),
+}
+DEFAULT_LEVEL = 'medium'
+
+# rings smaller than a square this many tolerances wide are dropped
+MIN_RING_WIDTH = 3
+
+def asset_name(level):
+    """
+    Returns the file name, within assets/, of a level's GeoJSON.
+    """
+    return 'regions.geojson' if level == 'full' else f'regions-{level}.geojson'
+
+def simplify_line(points, tolerance):
+    """
+    Simplifies an open polyline with the Douglas-Peucker algorithm.
+
+    Parameters:
+    points (np.ndarray): (n, 2) array of coordinates.
+    tolerance (float): Maximum distance of a dropped point from the simplified line.
+
+    Returns:
+    np.ndarray: The kept points, always including both ends.
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        inner = points[first + 1:last]
+        dx, dy = end - start
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(*(inner - start).T)
+        else:
+            distances = np.abs(dx * (inner[:, 1] - start[1]) - dy * (inner[:, 0] - start[0])) / length
+        furthest = int(np.argmax(distances))
+        if distances[furthest] > tolerance:
+            split = first + 1 + furthest
+            keep[split] = True
+            stack += [(first, split), (split, last)]
+    return points[keep]
+
+def simplify_ring(ring, tolerance, decimals):
+    """
+    Simplifies and quantises a closed ring.
+
+    The ring is split at the vertex furthest from its start, so both halves
+    are simplified as open lines with distinct ends.
+
+    Returns:
+    list: The ring's [lon, lat] pairs, closed, or None if it is too small to
+        show or collapses to fewer than three vertices.
+    """
+    points = np.asarray(ring, dtype=np.float64)
+    x, y = points.T
+    if abs(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])) / 2 < (MIN_RING_WIDTH * tolerance) ** 2:
+        return None
+    split = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    if split == 0:
+        return None
+    points = np.vstack([simplify_line(points[:split + 1], tolerance)[:-1],
+                        simplify_line(points[split:], tolerance)])
+    points = np.round(points, decimals)
+    # quantising can make neighbouring vertices equal
+    points = points[np.r_[True, np.any(points[1:] != points[:-1], axis=1)]]
+    if len(points) < 4:
+        return None
+    points[-1] = points[0]
+    return points.tolist()
+
+def simplify_geometry(geometry, tolerance, decimals):
+    """
+    Simplifies a Polygon or MultiPolygon, dropping the polygons (and holes)
+    that collapse. The largest polygon is always kept, so no region vanishes.
+    """
+    polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+    kept = []
+    for polygon in polygons:
+        rings = [simplify_ring(ring, tolerance, decimals) for ring in polygon]
+        if rings[0] is not None:
+            kept.append([rings[0]] + [ring for ring in rings[1:] if ring is not None])
+    if not kept:
+        largest = max(polygons, key=lambda polygon: len(polygon[0]))
+        kept = [[np.round(largest[0], decimals).tolist()]]
+    if len(kept) == 1:
+        return {'type': 'Polygon', 'coordinates': kept[0]}
+    return {'type': 'MultiPolygon', 'coordinates': kept}
+
+def simplify(geojson, level):
+    """
+    Builds a level's variant of a regions GeoJSON.
+
+    Only the features carrying the KEY property are kept, with just that property.
+
+    Parameters:
+    geojson (dict): The source FeatureCollection.
+    level (str): A key of LEVELS other than 'full'.
+
+    Returns:
+    dict: The simplified FeatureCollection.
+    """
+    tolerance, decimals = LEVELS[level]
+    features = []
+    for feature in geojson['features']:
+        name = feature['properties'].get(KEY)
+        if name is None:
+            continue
+        features.append({
+            'type': 'Feature',
+            'properties': {KEY: name},
+            'geometry': simplify_geometry(feature['geometry'], tolerance, decimals),
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+def vertex_count(geojson):
+    count = 0
+    for feature in geojson['features']:
+        geometry = feature['geometry']
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        count += sum(len(ring) for polygon in polygons for ring in polygon)
+    return count
+
+def validate(source, variant):
+    """
+    Checks that a variant has exactly the source's regions, each once, with valid rings.
+
+    Raises:
+    ValueError: If a region is missing, duplicated or added, or a ring is not closed.
+    """
+    expected = {f['properties'][KEY] for f in source['features'] if f['properties'].get(KEY) is not None}
+    names = [f['properties'].get(KEY) for f in variant['features']]
+    if sorted(names) != sorted(expected):
+        raise ValueError(f"{KEY} keys differ from the source: {sorted(set(names) ^ expected)} "
+                         f"({len(names)} features for {len(expected)} regions)")
+    for feature in variant['features']:
+        geometry = feature['geometry']
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        for polygon in polygons:
+            for ring in polygon:
+                if len(ring) < 4 or ring[0] != ring[-1]:
+                    raise ValueError(f"{feature['properties'][KEY]}: ring is not closed or has under 3 vertices")
+
+def dumps(geojson):
+    return json.dumps(geojson, separators=(',', ':'))
+
+_loaded = {}
+
+def load(level=DEFAULT_LEVEL):
+    """
+    Returns a level's GeoJSON, read from assets/ once per process.
+    """
+    if level not in _loaded:
+        with open(os.path.join(ASSETS_DIR, asset_name(level))) as f:
+            _loaded[level] = json.load(f)
+    return _loaded[level]
+
+def build():
+    """
+    Writes every simplified level to assets/, validated against the source.
+
+    Returns:
+    dict: Level -> (bytes, vertices) of its file, 'full' being the source.
+    """
+    with open(SOURCE_PATH) as f:
+        source = json.load(f)
+    sizes = {'full': (os.path.getsize(SOURCE_PATH), vertex_count(source))}
+    for level in LEVELS:
+        if level == 'full':
+            continue
+        variant = simplify(source, level)
+        validate(source, variant)
+        text = dumps(variant)
+        with open(os.path.join(ASSETS_DIR, asset_name(level)), 'w') as f:
+            f.write(text)
+        sizes[level] = (len(text.encode()), vertex_count(variant))
+    return sizes
+
+
+if __name__ == '__main__':
+    for level, (size, vertices) in build().items():
+        print(f"{level:<8} {asset_name(level):<24} {size / 1e3:8.1f} KB  {vertices:6} vertices")
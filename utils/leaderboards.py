@@ -0,0 +1,91 @@
+## Precomputed leaderboards for the National Overview.
+## The leaderboard's metrics are national aggregates of the static datasets,
+## so the top institutions for each metric are computed once when the data is
+## loaded and held as plain arrays; switching the leaderboard dropdown only
+## assembles the table component.
+
+from utils import data_partition
+from utils.aggregation import aggregate
+
+# number of institutions listed on a leaderboard
+TOP_N = 10
+
+# metric (the dropdown's value) -> (dataset, rows, profile, value column, aggregation)
+#   rows    - 'sources' to aggregate the per-source income rows only
+#   profile - GPA profile to aggregate over (results only)
+METRICS = {
+    'Overall GPA': ('results', None, 'Overall', 'GPA', 'mean'),
+    'Outputs GPA': ('results', None, 'Outputs', 'GPA', 'mean'),
+    'Impact GPA': ('results', None, 'Impact', 'GPA', 'mean'),
+    'Environment GPA': ('results', None, 'Environment', 'GPA', 'mean'),
+    'Income': ('income', 'sources', None, '2013-2020 (total)', 'sum'),
+    'Income In-Kind': ('incomeiK', 'sources', None, '2013-2020 (total)', 'sum'),
+    'PhDs Awarded': ('phd', None, None, 'Total', 'sum'),
+    'Staff FTE': ('results', None, 'Overall', 'FTE staff', 'sum'),
+}
+
+class Leaderboard:
+    """
+    The top institutions of one metric, highest first.
+
+    Attributes:
+    names (list): Institution names.
+    values (np.ndarray): Their values of the metric.
+    column (str): The metric's value column.
+    """
+    def __init__(self, names, values, column):
+        self.names = names
+        self.values = values
+        self.column = column
+
+def compute(frames, metric, weighted=False):
+    """
+    Computes the leaderboard of one metric.
+
+    Parameters:
+    frames (dict): Dataset name -> DataFrame, as in data_store.DATASETS.
+    metric (str): A key of METRICS.
+    weighted (bool): Rank GPAs by their FTE-weighted mean (no effect on sums).
+
+    Returns:
+    Leaderboard: The top TOP_N institutions.
+    """
+    dataset, rows, profile, column, agg = METRICS[metric]
+    df = frames[dataset]
+    if rows == 'sources':
+        df = data_partition.source_rows(df)
+    if profile is not None:
+        df = df[df['Profile'] == profile]
+
+    df = aggregate(df, 'Institution name', {column: agg}, weights='FTE staff' if weighted else None)
+    # ties keep the order the dashboard has always listed them in (the
+    # aggregates were sorted once more before the table was cut to TOP_N)
+    if column != 'FTE staff':
+        df = df.sort_values(by=column, ascending=False)
+    top = df.sort_values(column, ascending=False).head(TOP_N)
+    return Leaderboard(top['Institution name'].tolist(), top[column].to_numpy(), column)
+
+# (metric, weighted) -> Leaderboard, for the store's frames
+_boards = {}
+
+def build(frames):
+    """
+    Computes every metric's leaderboard (and FTE-weighted GPA leaderboards) for the store's frames.
+    """
+    for metric, (_, _, _, column, _) in METRICS.items():
+        _boards[(metric, False)] = compute(frames, metric)
+        if column == 'GPA':
+            _boards[(metric, True)] = compute(frames, metric, weighted=True)
+
+def get(metric, weighted=False):
+    """
+    Returns the precomputed leaderboard of a metric.
+
+    Parameters:
+    metric (str): A key of METRICS.
+    weighted (bool): For GPA metrics, the FTE-weighted leaderboard.
+
+    Returns:
+    Leaderboard: The top institutions.
+    """
+    return _boards[(metric, weighted and METRICS[metric][3] == 'GPA')]
@@ -0,0 +1,296 @@
+## Memoisation for the dashboard's figure-generating component functions.
+## The figures are pure functions of their (normalised) arguments and the
+## static datasets, so a selection computed for one user is reused for every
+## other user who picks it. Results are held in one bounded LRU shared by all
+## memoised functions, capped both in entries and in (estimated) bytes, and
+## keyed by a dataset version so results never outlive the data they came from.
+## Figures can be held pre-serialised, as the JSON Dash would send for them:
+## a hit then skips figure construction, Plotly's property validation and the
+## figure-to-dict conversion, and hands Dash plain JSON data to encode.
+## An optional second tier on local disk (utils/disk_cache.py) shares results
+## between the server's worker processes.
+##
+## The hit / miss counters are served as JSON at /cache-stats (see app.py).
+
+import functools
+import json
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+from plotly.basedatatypes import BaseFigure
+from plotly.io.json import to_json_plotly
+from utils import disk_cache
+
+# bounds of the shared cache - sized from the hit / miss counters (see stats())
+MAX_ENTRIES = 512
+MAX_BYTES = 128 << 20
+
+_MISSING = object()
+
+def sizeof(obj):
+    """
+    Estimates the memory held by a cached result, in bytes.
+
+    Walks containers, NumPy arrays, Plotly figures and Dash components; shared
+    objects are counted once.
+
+    Parameters:
+    obj: The object to measure.
+
+    Returns:
+    int: Approximate size in bytes.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, FigureJSON):
+            total += len(item.json)
+            continue
+        if isinstance(item, np.ndarray):
+            total += item.nbytes
+            if item.dtype == object:
+                stack.extend(item.ravel().tolist())
+            continue
+        if hasattr(item, 'to_plotly_json'):
+            # figures hold their traces and layout as plain dicts (_data/_layout),
+            # Dash components their props
+            if hasattr(item, '_data') and hasattr(item, '_layout'):
+                stack.extend([item._data, item._layout])
+            else:
+                stack.append(item.to_plotly_json())
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache bounded in entries and in bytes.
+
+    Parameters:
+    max_entries (int): Most entries held at once.
+    max_bytes (int): Most bytes (as estimated by sizeof) held at once; a single
+        value larger than this is never cached.
+    """
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()       # key -> (value, size)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached under key (marking it recently used), or default.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        """
+        Caches value under key, evicting the least recently used entries to stay
+        within the bounds.
+
+        Parameters:
+        key (hashable): The cache key.
+        value: The value to cache.
+        size (int): Its size in bytes (estimated with sizeof when not given).
+        """
+        size = sizeof(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """
+        Summarises the cache's usage.
+
+        Returns:
+        dict: hits, misses, hit rate, evictions, entries and bytes held, and the bounds.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+        }
+
+class FigureJSON:
+    """
+    A figure serialised to the JSON bytes Dash sends for it.
+
+    Parameters:
+    json (bytes): The serialised figure.
+    """
+    __slots__ = ('json',)
+
+    def __init__(self, json):
+        self.json = json
+
+    @classmethod
+    def of(cls, fig):
+        return cls(to_json_plotly(fig).encode())
+
+    def figure(self):
+        """
+        Returns the figure as a plain dict (a new one on every call), which
+        dcc.Graph accepts in place of a go.Figure.
+        """
+        return json.loads(self.json)
+
+def serialise(result):
+    """
+    Replaces the figures in a result (a figure, or a tuple holding figures) by FigureJSON.
+    Figures are go.Figure objects or plain figure dicts (see utils/figures.py).
+    """
+    if isinstance(result, BaseFigure) or isinstance(result, dict) and 'data' in result and 'layout' in result:
+        return FigureJSON.of(result)
+    if isinstance(result, tuple):
+        return tuple(serialise(item) for item in result)
+    return result
+
+def deserialise(result):
+    """
+    Replaces the FigureJSON in a serialised result by plain figure dicts.
+    """
+    if isinstance(result, FigureJSON):
+        return result.figure()
+    if isinstance(result, tuple):
+        return tuple(deserialise(item) for item in result)
+    return result
+
+# the cache shared by every memoised function, the optional disk tier shared
+# with the other workers (None when not configured), and per-function counters
+cache = LRUCache()
+disk = disk_cache.from_environment()
+counters = {}
+
+def freeze(value):
+    """
+    Turns an argument into a hashable key part (lists and dicts become tuples).
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    return value
+
+def unordered(value):
+    """
+    Normalises a list argument whose order does not change the result (e.g. a
+    selection of regions) to a sorted tuple.
+    """
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(freeze(v) for v in value))
+    return value
+
+def memoize(namespace, key=None, figures=False):
+    """
+    Memoises a function in the shared cache.
+
+    Parameters:
+    namespace (callable): Returns the version of the data the function reads
+        (e.g. the datasets' content hash), which prefixes every key; when it
+        returns None the result is computed and not cached.
+    key (callable): Maps the function's arguments to the hashable key of its
+        result; defaults to the frozen arguments. Arguments that give the same
+        result (e.g. the same regions in another order) should share a key.
+    figures (bool): Hold the figures in results pre-serialised (see FigureJSON).
+        Callers then get figures as plain dicts, on a miss as on a hit.
+
+    Returns:
+    callable: The decorator. Cached results other than figure dicts are shared
+        between callers and must not be mutated.
+
+    Example:
+    >>> @memoize(data_version, key=lambda region, uoa: (unordered(region), uoa))
+    ... def generateRegionIncomeSankey(region, uoa): ...
+    """
+    def decorator(func):
+        name = func.__qualname__
+        counter = counters.setdefault(name, {'hits': 0, 'disk_hits': 0, 'misses': 0})
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            version = namespace()
+            if version is None:
+                return func(*args, **kwargs)
+            if key is None:
+                cache_key = (version, name, freeze(args), freeze(kwargs))
+            else:
+                cache_key = (version, name, key(*args, **kwargs))
+
+            result = cache.get(cache_key, _MISSING)
+            if result is not _MISSING:
+                counter['hits'] += 1
+            elif disk is not None and (result := disk.get(cache_key, _MISSING)) is not _MISSING:
+                # computed by another worker
+                counter['disk_hits'] += 1
+                cache.put(cache_key, result)
+            else:
+                counter['misses'] += 1
+                result = func(*args, **kwargs)
+                if figures:
+                    result = serialise(result)
+                cache.put(cache_key, result)
+                if disk is not None:
+                    disk.put(cache_key, result)
+            return deserialise(result) if figures else result
+
+        return wrapper
+    return decorator
+
+def stats():
+    """
+    Returns the shared cache's statistics, with the hit / miss counts of each memoised function.
+    """
+    return dict(
+        cache.stats(),
+        disk=disk.stats() if disk is not None else None,
+        functions={name: dict(c) for name, c in counters.items()},
+    )
+
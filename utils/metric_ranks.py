@@ -0,0 +1,184 @@
+## Ranks and percentiles of every institution on every metric.
+## For each metric of the National Overview's leaderboards (the four GPA
+## profiles, income, income in-kind, PhDs awarded and staff FTE), every
+## institution is ranked nationally, within its region and within each Main
+## panel it submits to, for every UOA and across all UOAs. All metrics, levels
+## and scopes are stacked into one long table and ranked in one vectorised pass
+## when the data is loaded, so the Multi-level View's cards are dictionary
+## lookups.
+
+import numpy as np
+import pandas as pd
+from utils import data_partition
+from utils.aggregation import aggregate, group_codes, group_rank
+from utils.leaderboards import METRICS
+
+# equal values can differ in their last bits depending on summation order
+RANK_DECIMALS = 9
+
+SCOPES = ['National', 'Region', 'Main panel']
+
+# levels a metric is ranked at: across all UOAs, per UOA and per Main panel
+LEVELS = [None, 'UOA name', 'Main panel']
+
+def panel_label(panel):
+    return f'Main panel {panel}'
+
+def percentile(rank_min, rank_max, size):
+    """
+    Percentile rank of ranked values: the share of their group below them, plus
+    half the share tied with them (so tied values share one percentile).
+
+    Parameters:
+    rank_min (np.ndarray): Competition ('min') rank of each value, highest first.
+    rank_max (np.ndarray): 'max' rank of each value.
+    size (np.ndarray): Number of ranked values in each value's group.
+
+    Returns:
+    np.ndarray: Percentiles between 0 and 100 (100 - 50 / size for a sole leader).
+    """
+    return 100 * (size - (rank_min + rank_max) / 2 + 0.5) / size
+
+def metric_rows(frames, metric, weighted=False):
+    """
+    Returns a metric's value for every institution, across all UOAs, per UOA and per Main panel.
+
+    Parameters:
+    frames (dict): Dataset name -> DataFrame, as in data_store.DATASETS.
+    metric (str): A key of leaderboards.METRICS.
+    weighted (bool): Use FTE-weighted GPAs (no effect on sums).
+
+    Returns:
+    pd.DataFrame: Columns 'Level' (0 across all UOAs, 1 per UOA, 2 per Main panel),
+        'Key' (the UOA or Main panel's category code, 0 across all UOAs),
+        'Institution name', 'Region' and 'value'.
+    """
+    dataset, rows, profile, column, agg = METRICS[metric]
+    df = frames[dataset]
+    if rows == 'sources':
+        df = data_partition.source_rows(df)
+    if profile is not None:
+        df = df[df['Profile'] == profile]
+    weights = 'FTE staff' if weighted and agg == 'mean' else None
+
+    levels = []
+    for level, key in enumerate(LEVELS):
+        by = ['Institution name', 'Region'] if key is None else [key, 'Institution name', 'Region']
+        values = aggregate(df, by, {column: agg}, weights)
+        levels.append(pd.DataFrame({
+            'Level': level,
+            'Key': 0 if key is None else values[key].cat.codes.to_numpy(),
+            'Institution name': values['Institution name'],
+            'Region': values['Region'],
+            'value': values[column].to_numpy(dtype=np.float64),
+        }))
+    return pd.concat(levels, ignore_index=True)
+
+class MetricRanks:
+    """
+    National, regional and Main panel ranks and percentiles of every institution
+    on every metric of leaderboards.METRICS.
+
+    The national rank compares an institution with every institution in the
+    same UOA (or across all UOAs), and the regional rank with those of its own
+    region. The Main panel rank compares institutions' totals (or mean GPAs)
+    over the UOAs of a Main panel. Ties share the best rank (1, 2, 2, 4) and
+    the same percentile; institutions without a value are not ranked.
+    GPAs are also ranked by their FTE-weighted mean.
+    """
+
+    def __init__(self, frames):
+        # (metric, weighted) variants; sums are the same either way
+        variants = [(metric, False) for metric in METRICS]
+        variants += [(metric, True) for metric, spec in METRICS.items() if spec[4] == 'mean']
+        table = pd.concat(
+            [metric_rows(frames, metric, weighted).assign(Metric=i) for i, (metric, weighted) in enumerate(variants)],
+            ignore_index=True,
+        )
+        results = frames['results']
+        self.panels = results.groupby('UOA name', observed=True)['Main panel'].first().astype(str).to_dict()
+
+        values = np.round(table['value'].to_numpy(), RANK_DECIMALS)
+        missing = np.isnan(values)
+        level = table['Level'].to_numpy()
+        # national (and Main panel) groups: every institution of a metric, level and key;
+        # regional groups: the same split by region, across all UOAs and per UOA
+        national, _ = group_codes(table, ['Metric', 'Level', 'Key'])
+        regional, _ = group_codes(table, ['Metric', 'Level', 'Key', 'Region'])
+        regional[level == LEVELS.index('Main panel')] = -1
+
+        # scope -> (rank, group size, percentile) of each row, rank 0 where unranked
+        self.columns = []
+        for codes in [national, regional]:
+            codes[missing] = -1
+            size = codes.max() + 1
+            counts = np.bincount(codes[codes >= 0], minlength=size)
+            counts = np.where(codes >= 0, counts[codes], 0)
+            rank = group_rank(codes, values, size)
+            rank_max = group_rank(codes, values, size, method='max')
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self.columns.append((rank, counts, percentile(rank, rank_max, counts)))
+
+        # (institution, UOA / 'All' / panel_label, (metric, weighted)) -> row
+        groups = [
+            np.array(['All'], dtype=object),
+            np.asarray(results['UOA name'].cat.categories, dtype=object),
+            np.array([panel_label(p) for p in results['Main panel'].cat.categories], dtype=object),
+        ]
+        group = np.empty(len(table), dtype=object)
+        for i, labels in enumerate(groups):
+            rows = level == i
+            group[rows] = labels[table['Key'].to_numpy()[rows]]
+        keys = zip(table['Institution name'].astype(object).tolist(), group.tolist(),
+                   [variants[i] for i in table['Metric'].tolist()])
+        self.index = dict(zip(keys, range(len(table))))
+
+    def _scope(self, scope, row):
+        rank, counts, pct = self.columns[scope]
+        if row is None or rank[row] == 0:
+            return None
+        return int(rank[row]), int(counts[row]), float(pct[row])
+
+    def get(self, uni, uoa, weighted=False):
+        """
+        Returns an institution's ranks on every metric, for a UOA or 'All'.
+
+        Parameters:
+        uni (str): Institution name.
+        uoa (str): UOA name, or 'All'.
+        weighted (bool): Rank GPAs by their FTE-weighted mean.
+
+        Returns:
+        dict: Metric -> {scope: (rank, group size, percentile) or None} for each of SCOPES;
+            None where the institution has no value, or (Main panel, for 'All') no single panel.
+        """
+        panel = panel_label(self.panels[uoa]) if uoa in self.panels else None
+        ranks = {}
+        for metric, spec in METRICS.items():
+            variant = (metric, weighted and spec[4] == 'mean')
+            row = self.index.get((uni, uoa, variant))
+            panel_row = self.index.get((uni, panel, variant))
+            ranks[metric] = dict(zip(SCOPES, [self._scope(0, row), self._scope(1, row), self._scope(0, panel_row)]))
+        return ranks
+
+# the store's frames' MetricRanks
+_ranks = None
+
+def build(frames):
+    """
+    Ranks every metric, with mean and FTE-weighted GPAs, for the store's frames.
+    """
+    global _ranks
+    _ranks = MetricRanks(frames)
+
+def get_panel(uoa):
+    """
+    Returns the Main panel ('A' to 'D') of a UOA.
+    """
+    return _ranks.panels[uoa]
+
+def get(uni, uoa, weighted=False):
+    """
+    Returns an institution's precomputed ranks on every metric (see MetricRanks.get).
+    """
+    return _ranks.get(uni, uoa, weighted)
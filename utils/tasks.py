@@ -0,0 +1,150 @@
+## Concurrent execution of a callback's independent computations.
+## The pages' update callbacks call several figure generators that do not
+## depend on each other, so run serially their latencies add up. run()
+## executes them in one of three modes, set by FIGURE_CONCURRENCY:
+##
+##   serial    - one after another in the calling thread (the default)
+##   threads   - on a thread pool shared by every callback of the process
+##   processes - the CPU-bound tasks in a pool of worker processes, forked from
+##               the loaded app so they share its data, and the rest on the
+##               thread pool. Each worker process memoises its own results;
+##               set FIGURE_CACHE_DIR to share them (see utils/disk_cache.py).
+##
+## Both pools are bounded by FIGURE_CONCURRENCY_WORKERS (default: the CPU
+## count, at most 8). The generators are mostly Python and hold the GIL, so
+## threads mainly overlap the parts NumPy and pandas run without it; only
+## processes run them in parallel, at the cost of sending each result back.
+## Run `python -m benchmarks.bench_concurrency` to compare the modes.
+##
+## Every task's duration, and every run's wall-clock time, is recorded in
+## stats(), served as JSON at /task-stats (see app.py).
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+MODES = ('serial', 'threads', 'processes')
+
+MODE = os.environ.get('FIGURE_CONCURRENCY', 'serial')
+MAX_WORKERS = int(os.environ.get('FIGURE_CONCURRENCY_WORKERS', 0)) or min(os.cpu_count() or 1, 8)
+
+class Task:
+    """
+    One independent computation of a callback.
+
+    Attributes:
+    label (str): Name its timings are recorded under.
+    func (callable): The computation; in 'processes' mode a CPU-bound task's
+        function must be importable by name (e.g. a memoised component function).
+    args (tuple): Its positional arguments.
+    cpu_bound (bool): Run it in the process pool in 'processes' mode.
+    """
+    def __init__(self, label, func, *args, cpu_bound=False):
+        self.label = label
+        self.func = func
+        self.args = args
+        self.cpu_bound = cpu_bound
+
+# the pools of this process (a forked worker creates its own), created on first use
+_pools = {}
+_pools_pid = None
+_lock = threading.Lock()
+
+# label -> {'calls', 'seconds', 'max_seconds', 'last_seconds'} of tasks, and of runs
+timings = {'tasks': {}, 'runs': {}}
+
+def _pool(kind):
+    global _pools_pid
+    with _lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+            atexit.register(shutdown)
+        if kind not in _pools:
+            if kind == 'threads':
+                _pools[kind] = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix='figure-task')
+            else:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+                _pools[kind] = ProcessPoolExecutor(MAX_WORKERS, mp_context=context)
+                # fork the workers now, rather than from whichever thread submits first
+                list(_pools[kind].map(abs, range(MAX_WORKERS)))
+        return _pools[kind]
+
+def shutdown():
+    """
+    Shuts this process's pools down, waiting for their tasks; they are recreated on next use.
+    """
+    with _lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+def _call(func, args):
+    # runs in the pool's thread or process: the duration excludes queueing and transfer
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def _record(kind, label, seconds):
+    with _lock:
+        entry = timings[kind].setdefault(label, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'last_seconds': 0.0})
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['max_seconds'] = max(entry['max_seconds'], seconds)
+        entry['last_seconds'] = seconds
+
+def run(tasks, name=None, mode=None):
+    """
+    Runs independent tasks and returns their results.
+
+    Parameters:
+    tasks (list): The Tasks.
+    name (str): Optionally, the label the run's wall-clock time is recorded under.
+    mode (str): One of MODES; defaults to MODE.
+
+    Returns:
+    list: Each task's result, in the tasks' order.
+
+    Raises:
+    Exception: The first failed task's exception, once every task has finished.
+    """
+    mode = MODE if mode is None else mode
+    if mode not in MODES:
+        raise ValueError(f"unknown concurrency mode {mode!r}, expected one of {MODES}")
+    start = time.perf_counter()
+
+    if mode == 'serial' or len(tasks) < 2:
+        outcomes = [_call(task.func, task.args) for task in tasks]
+    else:
+        futures = []
+        for task in tasks:
+            kind = 'processes' if mode == 'processes' and task.cpu_bound else 'threads'
+            futures.append(_pool(kind).submit(_call, task.func, task.args))
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        outcomes = [future.result() for future in futures]
+
+    for task, (_, seconds) in zip(tasks, outcomes):
+        _record('tasks', task.label, seconds)
+    if name is not None:
+        _record('runs', name, time.perf_counter() - start)
+    return [result for result, _ in outcomes]
+
+def stats():
+    """
+    Returns the mode and worker bound, and the timings of every task and run.
+    """
+    with _lock:
+        return {
+            'mode': MODE,
+            'max_workers': MAX_WORKERS,
+            'tasks': {label: dict(entry) for label, entry in timings['tasks'].items()},
+            'runs': {label: dict(entry) for label, entry in timings['runs'].items()},
+        }
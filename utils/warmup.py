@@ -0,0 +1,124 @@
+## Background warm-up of the figure caches after the server starts.
+## The first visitor after a (re)start would otherwise pay for every cold
+## computation. Once the pages are registered, a daemon thread precomputes the
+## most common selections through the pages' own (memoised) callbacks, one at
+## a time, and pauses while any request is being served, so live requests
+## never queue behind it. Progress is reported as a readiness flag at /ready.
+##
+## The warm-up runs in every process that serves requests: gunicorn workers
+## start it as soon as they have loaded the app (see gunicorn.conf.py), as
+## does the development server (`python app.py`).
+## Set FIGURE_CACHE_WARMUP=0 to turn it off.
+
+import os
+import threading
+import time
+
+# seconds to wait after the last live request before resuming the warm-up
+IDLE_SECONDS = 0.05
+
+REGIONS = [
+    'London', 'South West', 'South East', 'East of England', 'West Midlands', 'East Midlands',
+    'North West', 'North East', 'Yorkshire and The Humber', 'Northern Ireland', 'Wales', 'Scotland',
+]
+
+_lock = threading.Lock()
+_active = 0                 # requests being served
+_last_request = 0.0
+_started_pid = None
+
+state = {
+    'ready': False,
+    'done': 0,
+    'total': 0,
+    'failed': 0,
+    'current': None,
+    'seconds': None,
+}
+
+def enabled():
+    return os.environ.get('FIGURE_CACHE_WARMUP', '1') not in ('0', 'false', 'False', '')
+
+def selections():
+    """
+    Lists the selections to precompute, most requested first.
+
+    Returns:
+    list: (label, function) pairs; calling the function computes (and caches) the selection.
+    """
+    # imported here: the pages can only be imported once the app is created
+    from pages import multi_level_view, national_overview, regional_trends
+
+    tasks = [
+        ('leaderboard: Overall GPA', lambda: national_overview.generateLeaderboard('Overall GPA', False)),
+        ('multi-level view: national, all UOAs',
+         lambda: multi_level_view.updatePanels(1, 'nat', None, None, 'All', 'Overall', False)),
+    ]
+    for region in REGIONS:
+        tasks.append((f'multi-level view: {region}, all UOAs',
+                      lambda region=region: multi_level_view.updatePanels(1, 'reg', None, region, 'All', 'Overall', False)))
+    for region in REGIONS:
+        tasks.append((f'regional trends: {region}, all UOAs',
+                      lambda region=region: regional_trends.updatePage(1, [region], 'All', 'Overall')))
+    return tasks
+
+def request_started():
+    global _active
+    with _lock:
+        _active += 1
+
+def request_finished(*_):
+    global _active, _last_request
+    with _lock:
+        _active = max(_active - 1, 0)
+        _last_request = time.monotonic()
+
+def _wait_for_idle():
+    while _active > 0 or time.monotonic() - _last_request < IDLE_SECONDS:
+        time.sleep(IDLE_SECONDS)
+
+def run(tasks=None):
+    """
+    Precomputes the selections in the current thread, yielding to live requests
+    between them. A selection that fails is counted and skipped.
+    """
+    tasks = selections() if tasks is None else tasks
+    state.update(ready=False, done=0, total=len(tasks), failed=0, seconds=None)
+    start = time.perf_counter()
+    for label, task in tasks:
+        _wait_for_idle()
+        state['current'] = label
+        try:
+            task()
+        except Exception:
+            state['failed'] += 1
+        state['done'] += 1
+    state.update(ready=True, current=None, seconds=time.perf_counter() - start)
+
+def start():
+    """
+    Starts the warm-up in a daemon thread, once per process (a forked worker
+    starts its own).
+
+    Returns:
+    bool: Whether a warm-up was started.
+    """
+    global _started_pid
+    with _lock:
+        if not enabled() or _started_pid == os.getpid():
+            return False
+        _started_pid = os.getpid()
+    threading.Thread(target=run, name='figure-cache-warmup', daemon=True).start()
+    return True
+
+def init_app(server):
+    """
+    Hooks the warm-up into a Flask server: requests are tracked so the warm-up
+    pauses while they are served, and /ready reports its progress.
+    """
+    server.before_request(request_started)
+    server.teardown_request(request_finished)
+
+    @server.route('/ready')
+    def ready():
+        return dict(state)